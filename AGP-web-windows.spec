@@ -29,16 +29,35 @@ hiddenimports = (
         'models.pago',
         'models.caja',
         'models.reporte',
+        'models.secuencia',
+        'models.resumen',
+        'models.paginacion',
+        'models.mora',
+        'models.evento',
         'services.amortizacion',
+        'services.amortizacion_vectorial',
         'services.backup',
         'services.excel_exporter',
         'services.mora_calculator',
+        'services.mora_acumulacion',
+        'services.importador_pagos',
+        'services.cola_recibos',
+        'services.servidor_web',
+        'services.prueba_carga',
+        'services.dinero',
+        'services.eventos',
+        'services.resumen',
         'services.pdf_generator',
         'services.terminal_pago',
         'database.connection',
+        'database.busqueda',
+        'database.instrumentacion',
+        'database.migraciones',
         'database.schema',
         'database.seed',
         'app_web',
+        'api_web',
+        'waitress',
         'fpdf',
         'openpyxl',
         'dateutil',
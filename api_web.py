@@ -0,0 +1,208 @@
+"""
+AGP — JSON API v1 (Flask blueprint, mounted by app_web at /api/v1).
+
+Read-only views over the controllers for the web front-end. Every GET is
+validated against the data version (database.connection.version_datos):
+the ETag and Last-Modified come from it, so a conditional request whose
+data did not change is answered 304 before any query runs. Bodies larger
+than _MIN_GZIP bytes are gzip-compressed when the client accepts it.
+"""
+
+import gzip
+import os
+import time
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.exceptions import HTTPException, NotFound
+
+from database.connection import version_datos
+
+api = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+_ARRANQUE = f"{os.getpid():x}{int(time.time()):x}"    # new ETags after a restart
+_MIN_GZIP = 512
+
+
+def _inicio_del_dia() -> float:
+    return datetime.combine(date.today(), datetime.min.time()).timestamp()
+
+
+def _validadores():
+    """(etag, last_modified) of the current data. Date-based reports
+    (mora, proyección, "hoy") change at midnight, so the day is part of it."""
+    numero, mtime = version_datos()
+    etag = f"{_ARRANQUE}-{numero}-{date.today().isoformat()}"
+    modificado = datetime.fromtimestamp(int(max(mtime, _inicio_del_dia())), timezone.utc)
+    return etag, modificado
+
+
+def _sin_cambios(etag: str, modificado: datetime) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and modificado <= request.if_modified_since
+
+
+def condicional(vista):
+    """JSON GET view with ETag/Last-Modified; 304 without calling the view."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        etag, modificado = _validadores()
+        if _sin_cambios(etag, modificado):
+            respuesta = Response(status=304)
+        else:
+            respuesta = jsonify(vista(*args, **kwargs))
+        respuesta.set_etag(etag, weak=True)
+        respuesta.last_modified = modificado
+        respuesta.cache_control.private = True
+        respuesta.cache_control.no_cache = True     # always revalidate
+        return respuesta
+    return envoltura
+
+
+@api.after_request
+def _comprimir(respuesta: Response):
+    respuesta.vary.add("Accept-Encoding")
+    if (respuesta.status_code != 200 or respuesta.direct_passthrough
+            or "Content-Encoding" in respuesta.headers
+            or not request.accept_encodings["gzip"]):
+        return respuesta
+    datos = respuesta.get_data()
+    if len(datos) < _MIN_GZIP:
+        return respuesta
+    respuesta.set_data(gzip.compress(datos, compresslevel=6))
+    respuesta.headers["Content-Encoding"] = "gzip"
+    return respuesta
+
+
+@api.errorhandler(HTTPException)
+def _error_http(e: HTTPException):
+    return jsonify({"error": e.description}), e.code
+
+
+@api.errorhandler(ValueError)
+def _error_valor(e: ValueError):
+    return jsonify({"error": str(e)}), 400
+
+
+def _o_404(fila, mensaje: str):
+    if fila is None:
+        raise NotFound(mensaje)
+    return fila
+
+
+def _entero(nombre: str, defecto: int) -> int:
+    try:
+        return int(request.args.get(nombre) or defecto)
+    except ValueError:
+        raise ValueError(f"Parámetro {nombre} inválido.")
+
+
+# ── Versión ───────────────────────────────────────────────────────────────────
+
+@api.route("/version")
+def version():
+    """Cheap poll target: tells whether anything changed, never cached."""
+    etag, modificado = _validadores()
+    return jsonify({"version": etag, "modificado": modificado.isoformat()})
+
+
+# ── Clientes ──────────────────────────────────────────────────────────────────
+
+@api.route("/clientes")
+@condicional
+def clientes():
+    from controllers.cliente_controller import buscar, pagina
+    q = request.args.get("q", "").strip()
+    if q:
+        return {"filas": buscar(q), "siguiente": None, "total": None}
+    return pagina(request.args.get("cursor"), min(_entero("limite", 50), 200))
+
+
+@api.route("/clientes/<int:cliente_id>")
+@condicional
+def cliente(cliente_id):
+    from controllers.cliente_controller import obtener
+    return _o_404(obtener(cliente_id), "Cliente no encontrado.")
+
+
+@api.route("/clientes/<int:cliente_id>/prestamos")
+@condicional
+def prestamos_cliente(cliente_id):
+    from controllers.prestamo_controller import listar
+    return listar(cliente_id=cliente_id)
+
+
+# ── Préstamos y cuotas ────────────────────────────────────────────────────────
+
+@api.route("/prestamos")
+@condicional
+def prestamos():
+    from controllers.prestamo_controller import buscar, pagina
+    q = request.args.get("q", "").strip()
+    if q:
+        return {"filas": buscar(q), "siguiente": None, "total": None}
+    return pagina(request.args.get("estado") or None, None,
+                  request.args.get("cursor"), min(_entero("limite", 50), 200))
+
+
+@api.route("/prestamos/<int:prestamo_id>")
+@condicional
+def prestamo(prestamo_id):
+    from controllers.prestamo_controller import obtener
+    return _o_404(obtener(prestamo_id), "Préstamo no encontrado.")
+
+
+@api.route("/prestamos/<int:prestamo_id>/cuotas")
+@condicional
+def cuotas(prestamo_id):
+    from controllers.prestamo_controller import cuotas as cuotas_de
+    return cuotas_de(prestamo_id, request.args.get("pendientes") == "1")
+
+
+@api.route("/prestamos/<int:prestamo_id>/pagos")
+@condicional
+def pagos(prestamo_id):
+    from controllers.pago_controller import pagina_pagos_prestamo
+    return pagina_pagos_prestamo(prestamo_id, request.args.get("cursor"),
+                                 min(_entero("limite", 50), 200))
+
+
+# ── Reportes ──────────────────────────────────────────────────────────────────
+
+@api.route("/dashboard")
+@condicional
+def dashboard():
+    from controllers.reporte_controller import dashboard as datos
+    return datos()
+
+
+@api.route("/reportes/caja")
+@condicional
+def reporte_caja():
+    from controllers.reporte_controller import caja
+    caja_id = request.args.get("caja_id")
+    return caja(request.args.get("fecha") or None, int(caja_id) if caja_id else None)
+
+
+@api.route("/reportes/mora")
+@condicional
+def reporte_mora():
+    from controllers.reporte_controller import mora
+    return mora()
+
+
+@api.route("/reportes/proyeccion")
+@condicional
+def reporte_proyeccion():
+    from controllers.reporte_controller import proyeccion
+    return proyeccion(min(_entero("dias", 30), 365))
+
+
+@api.route("/reportes/antiguedad")
+@condicional
+def reporte_antiguedad():
+    from controllers.reporte_controller import antiguedad, tendencia_antiguedad
+    return {"actual": antiguedad(request.args.get("fecha") or None),
+            "tendencia": tendencia_antiguedad(min(_entero("dias", 90), 730))}
@@ -1,9 +1,10 @@
 """AGP — Sistema de Gestión de Préstamos — Flask web app."""
 
-import os, sys
+import functools, os, sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, session,
+                   send_file, abort)
 from datetime import date
 
 # En bundle PyInstaller los recursos están en sys._MEIPASS;
@@ -20,6 +21,28 @@ app = Flask(
 )
 app.secret_key = "agp-secret-2026"
 
+# ── API JSON v1 (ETag / 304 / gzip) ──────────────────────────────────────────
+
+from api_web import api
+app.register_blueprint(api)
+
+# ── Instrumentación SQL (AGP_SQL_DEBUG=1) ────────────────────────────────────
+
+from database import instrumentacion
+
+@app.before_request
+def _sql_abrir_alcance():
+    if instrumentacion.activa():
+        ruta = request.url_rule.rule if request.url_rule else request.path
+        instrumentacion.abrir_alcance(f"{request.method} {ruta}")
+
+@app.teardown_request
+def _sql_cerrar_alcance(_exc=None):
+    instrumentacion.cerrar_alcance()
+
+# Hot paths: a cobro runs ~11 statements today
+instrumentacion.establecer_presupuesto("POST /caja/cobrar", 12)
+
 # ── Filtros Jinja2 ────────────────────────────────────────────────────────────
 
 @app.template_filter("moneda")
@@ -63,9 +86,17 @@ def dashboard():
 @app.route("/clientes")
 def clientes_lista():
     q = request.args.get("q", "").strip()
-    from controllers.cliente_controller import buscar, todos
-    rows = buscar(q) if q else todos()
+    from controllers.cliente_controller import buscar, pagina
+    if q:
+        rows, total, siguiente = buscar(q), None, None
+    else:
+        try:
+            pag = pagina(request.args.get("cursor"))
+        except ValueError:
+            return redirect(url_for("clientes_lista"))
+        rows, total, siguiente = pag["filas"], pag["total"], pag["siguiente"]
     return render_template("clientes/lista.html", clientes=rows, q=q,
+                           total=total, siguiente=siguiente,
                            active_section="clientes")
 
 @app.route("/clientes/nuevo", methods=["GET", "POST"])
@@ -126,9 +157,17 @@ ESTADOS_PRESTAMO = ["ACTIVO", "AL_DIA", "VENCIDO", "CANCELADO", "REFINANCIADO"]
 def prestamos_lista():
     q      = request.args.get("q", "").strip()
     estado = request.args.get("estado", "")
-    from controllers.prestamo_controller import buscar, listar
-    rows = buscar(q) if q else listar(estado=estado or None)
+    from controllers.prestamo_controller import buscar, pagina
+    if q:
+        rows, total, siguiente = buscar(q), None, None
+    else:
+        try:
+            pag = pagina(estado=estado or None, cursor=request.args.get("cursor"))
+        except ValueError:
+            return redirect(url_for("prestamos_lista", estado=estado))
+        rows, total, siguiente = pag["filas"], pag["total"], pag["siguiente"]
     return render_template("prestamos/lista.html", prestamos=rows, q=q,
+                           total=total, siguiente=siguiente,
                            estado=estado, estados=ESTADOS_PRESTAMO,
                            active_section="prestamos")
 
@@ -172,33 +211,52 @@ def prestamo_preview():
 @app.route("/prestamos/<int:pid>")
 def prestamo_detalle(pid):
     from controllers.prestamo_controller import obtener, cuotas
-    from controllers.pago_controller import historial_pagos_prestamo
+    from controllers.pago_controller import pagina_pagos_prestamo
     prestamo     = obtener(pid)
     tabla_cuotas = cuotas(pid)
-    pagos        = historial_pagos_prestamo(pid)
+    try:
+        pag = pagina_pagos_prestamo(pid, request.args.get("pagos_cursor"))
+    except ValueError:
+        return redirect(url_for("prestamo_detalle", pid=pid))
     return render_template("prestamos/detalle.html", prestamo=prestamo,
-                           cuotas=tabla_cuotas, pagos=pagos,
+                           cuotas=tabla_cuotas, pagos=pag["filas"],
+                           pagos_total=pag["total"], pagos_siguiente=pag["siguiente"],
                            active_section="prestamos")
 
 # ── Caja ──────────────────────────────────────────────────────────────────────
+# Each browser works in the session of the cashier it opened (or took over)
+# with the apertura form; the name is kept in the Flask session cookie.
+
+def _cajero():
+    from config import CAJERO
+    return session.get("cajero") or CAJERO
 
 @app.route("/caja")
 def caja():
-    from controllers.caja_controller import caja_activa
-    caja_abierta = caja_activa()
+    from controllers.caja_controller import caja_activa, sesiones_dia
+    caja_abierta = caja_activa(_cajero())
     if caja_abierta:
         from database.seed import get_config
         moneda = get_config("moneda_simbolo") or "RD$"
         return render_template("caja/cobro.html", caja=caja_abierta,
                                moneda=moneda, active_section="caja")
-    return render_template("caja/apertura.html", active_section="caja")
+    abiertas = [c for c in sesiones_dia(date.today().isoformat()) if c["estado"] == "ABIERTA"]
+    return render_template("caja/apertura.html", cajero=_cajero(), abiertas=abiertas,
+                           active_section="caja")
 
 @app.route("/caja/apertura", methods=["POST"])
 def caja_apertura():
-    from controllers.caja_controller import abrir
+    from controllers.caja_controller import abrir, caja_activa
     try:
+        cajero = (request.form.get("cajero") or _cajero()).strip().upper()
+        if request.form.get("continuar"):
+            if not caja_activa(cajero):
+                raise ValueError(f"El cajero {cajero} no tiene una caja abierta hoy.")
+            session["cajero"] = cajero
+            return redirect(url_for("caja"))
         monto = float(request.form.get("monto_apertura", 0) or 0)
-        abrir(monto)
+        abrir(monto, cajero=cajero)
+        session["cajero"] = cajero
         flash("Caja abierta correctamente.", "success")
     except Exception as e:
         flash(str(e), "danger")
@@ -224,9 +282,9 @@ def caja_calcular(pid):
         from database.seed import get_config
         moneda = get_config("moneda_simbolo") or "RD$"
         if tipo == "CUOTA_NORMAL":
-            info = calcular_pago_cuota_normal(pid)
+            info = calcular_pago_cuota_normal(pid, _cajero())
         else:
-            info = calcular_cancelacion(pid)
+            info = calcular_cancelacion(pid, _cajero())
         return render_template("_partials/calculo_cuota.html",
                                info=info, tipo=tipo, moneda=moneda, prestamo_id=pid)
     except Exception as e:
@@ -240,19 +298,14 @@ def caja_cobrar():
         tipo   = request.form["tipo"]
         metodo = request.form["metodo_pago"]
         ref    = request.form.get("referencia", "")
-        from controllers.pago_controller import (
-            calcular_pago_cuota_normal, cobrar_cuota_normal,
-            cobrar_cancelacion_total,
-        )
+        from controllers.pago_controller import cobrar_cuota_normal, cobrar_cancelacion_total
         from database.seed import get_config
         moneda = get_config("moneda_simbolo") or "RD$"
         if tipo == "CUOTA_NORMAL":
-            info  = calcular_pago_cuota_normal(pid)
-            cuota = info["cuota"]
-            pago  = cobrar_cuota_normal(pid, cuota["id"], metodo, ref)
+            pago = cobrar_cuota_normal(pid, None, metodo, ref, cajero=_cajero())
             return render_template("_partials/recibo.html", pago=pago, moneda=moneda)
         else:
-            cobrar_cancelacion_total(pid, metodo, ref)
+            cobrar_cancelacion_total(pid, metodo, ref, cajero=_cajero())
             return '''<div class="bg-green-50 border border-green-200 rounded-xl p-6 text-center">
                 <p class="text-green-700 text-xl font-bold mb-3">✅ Préstamo cancelado</p>
                 <p class="text-slate-500 text-sm mb-4">El préstamo ha sido saldado completamente.</p>
@@ -262,10 +315,38 @@ def caja_cobrar():
     except Exception as e:
         return f'<div class="bg-red-50 border border-red-200 rounded-lg p-4 text-red-700 font-medium">❌ {e}</div>'
 
+@app.route("/caja/importar", methods=["GET", "POST"])
+def caja_importar():
+    informe = None
+    if request.method == "POST":
+        archivo = request.files.get("archivo")
+        if not archivo or not archivo.filename:
+            flash("Seleccione un archivo CSV.", "danger")
+            return redirect(url_for("caja_importar"))
+        try:
+            from controllers.pago_controller import importar_transferencias
+            informe = importar_transferencias(archivo.stream, bool(request.form.get("simular")),
+                                              _cajero())
+            informe["archivo"] = archivo.filename
+        except Exception as e:
+            flash(str(e), "danger")
+    return render_template("caja/importar.html", informe=informe, cajero=_cajero(),
+                           active_section="caja")
+
+@app.route("/caja/recibo/<int:pago_id>.pdf")
+def caja_recibo_pdf(pago_id):
+    """Receipt PDF; usually already rendered by the receipt queue."""
+    from models.pago import obtener_pago
+    from services.cola_recibos import recibo
+    pago = obtener_pago(pago_id)
+    if not pago:
+        abort(404)
+    return send_file(recibo(pago), mimetype="application/pdf")
+
 @app.route("/caja/cerrar", methods=["POST"])
 def caja_cerrar():
     from controllers.caja_controller import caja_activa, cerrar
-    caja_abierta = caja_activa()
+    caja_abierta = caja_activa(_cajero())
     if not caja_abierta:
         flash("No hay caja abierta.", "danger")
         return redirect(url_for("caja"))
@@ -297,6 +378,10 @@ def reportes():
         elif tab == "mora":
             from controllers.reporte_controller import mora
             data["mora"] = mora()
+        elif tab == "antiguedad":
+            from controllers.reporte_controller import antiguedad, tendencia_antiguedad
+            data["antiguedad"] = antiguedad(fecha)
+            data["tendencia"] = tendencia_antiguedad()
         elif tab == "proyeccion":
             from controllers.reporte_controller import proyeccion
             data["proyeccion"] = proyeccion(dias)
@@ -325,23 +410,33 @@ def reporte_pdf_caja():
         flash(str(e), "danger")
     return redirect(url_for("reportes", tab="caja", fecha=fecha))
 
+@app.route("/reportes/pdf/recibos")
+def reporte_pdf_recibos():
+    """All receipts of the day in one multi-page PDF, for reprinting."""
+    fecha = request.args.get("fecha", date.today().isoformat())
+    try:
+        from services.pdf_generator import generar_recibos_caja
+        return send_file(generar_recibos_caja(fecha), mimetype="application/pdf")
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("reportes", tab="caja", fecha=fecha))
+
 @app.route("/reportes/excel/<tipo>")
 def reporte_excel(tipo):
     fecha = request.args.get("fecha", date.today().isoformat())
     dias  = int(request.args.get("dias", 30) or 30)
     try:
+        from controllers.reporte_controller import (
+            excel_caja, excel_mora, excel_proyeccion, excel_antiguedad,
+        )
         if tipo == "mora":
-            from controllers.reporte_controller import mora
-            from services.excel_exporter import exportar_mora
-            path = exportar_mora(mora())
+            path = excel_mora()
+        elif tipo == "antiguedad":
+            path = excel_antiguedad(fecha)
         elif tipo == "proyeccion":
-            from controllers.reporte_controller import proyeccion
-            from services.excel_exporter import exportar_proyeccion
-            path = exportar_proyeccion(proyeccion(dias))
+            path = excel_proyeccion(dias)
         else:
-            from controllers.reporte_controller import caja as rep_caja
-            from services.excel_exporter import exportar_caja
-            path = exportar_caja(rep_caja(fecha))
+            path = excel_caja(fecha)
         import subprocess, platform
         if platform.system() == "Windows":
             os.startfile(path)
@@ -380,6 +475,40 @@ def hacer_backup():
         flash(str(e), "danger")
     return redirect(url_for("configuracion"))
 
+# ── Depuración SQL ────────────────────────────────────────────────────────────
+# Raw SQL, parameters and plans: only while instrumentation is on (404
+# otherwise, as if the routes did not exist) and only from this machine,
+# even when the server listens on the LAN.
+
+_LOCALES = {"127.0.0.1", "::1"}
+
+def _solo_depuracion_local(vista):
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        if not instrumentacion.activa():
+            abort(404)
+        if request.remote_addr not in _LOCALES:
+            abort(403)
+        return vista(*args, **kwargs)
+    return envoltura
+
+@app.route("/api/debug/sql")
+@_solo_depuracion_local
+def api_debug_sql():
+    return jsonify(instrumentacion.informe(int(request.args.get("limite", 50))))
+
+@app.route("/api/debug/sql/reiniciar", methods=["POST"])
+@_solo_depuracion_local
+def api_debug_sql_reiniciar():
+    instrumentacion.reiniciar()
+    return jsonify({"ok": True})
+
+@app.route("/debug/sql")
+@_solo_depuracion_local
+def debug_sql():
+    return render_template("debug/sql.html", info=instrumentacion.informe(),
+                           active_section="")
+
 # ── Run ───────────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
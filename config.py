@@ -29,6 +29,10 @@ APP_HEIGHT  = 800
 APP_MIN_W   = 1100
 APP_MIN_H   = 650
 
+# Sesión de caja de esta terminal: cada cajero/terminal abre la suya.
+# Varias terminales sobre la misma base se distinguen con AGP_CAJERO.
+CAJERO = os.environ.get("AGP_CAJERO", "").strip() or "PRINCIPAL"
+
 # CustomTkinter
 CTK_APPEARANCE  = "light"
 CTK_COLOR_THEME = "blue"
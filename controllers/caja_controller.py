@@ -1,37 +1,56 @@
 from typing import Optional, List
-"""Business logic for daily cash session management."""
+"""Business logic for cash sessions: one per cashier/terminal and day."""
 
+import sqlite3
+
+from config import CAJERO
 from models.caja import (
     obtener_caja_hoy, abrir_caja, cerrar_caja,
-    listar_cajas, obtener_caja,
+    listar_cajas, listar_cajas_fecha, listar_dias, obtener_caja,
 )
+from services.dinero import centavos
+
 
+def _cajero(cajero: Optional[str]) -> str:
+    return (cajero or CAJERO).strip().upper()
 
-def caja_activa() -> Optional[dict]:
-    """Return today's open cash session or None."""
-    caja = obtener_caja_hoy()
+
+def caja_activa(cajero: Optional[str] = None) -> Optional[dict]:
+    """Return today's open session of cajero (default: this terminal) or None."""
+    caja = obtener_caja_hoy(_cajero(cajero))
     if caja and caja["estado"] == "ABIERTA":
         return caja
     return None
 
 
-def abrir(monto_apertura: float, notas: str = "") -> int:
-    existente = obtener_caja_hoy()
+def abrir(monto_apertura: float, notas: str = "", cajero: Optional[str] = None) -> int:
+    cajero = _cajero(cajero)
+    existente = obtener_caja_hoy(cajero)
     if existente:
-        raise ValueError("Ya existe una sesión de caja para hoy.")
+        raise ValueError(f"Ya existe una sesión de caja para hoy del cajero {cajero}.")
     if monto_apertura < 0:
         raise ValueError("El monto de apertura no puede ser negativo.")
-    return abrir_caja(monto_apertura, notas)
+    try:
+        return abrir_caja(centavos(monto_apertura), notas, cajero)
+    except sqlite3.IntegrityError:   # opened from another terminal meanwhile
+        raise ValueError(f"Ya existe una sesión de caja para hoy del cajero {cajero}.")
 
 
 def cerrar(caja_id: int, monto_cierre: float, notas: str = ""):
     caja = obtener_caja(caja_id)
     if not caja:
         raise ValueError("Sesión de caja no encontrada.")
-    if caja["estado"] == "CERRADA":
+    if caja["estado"] == "CERRADA" or not cerrar_caja(caja_id, centavos(monto_cierre), notas):
         raise ValueError("La caja ya está cerrada.")
-    cerrar_caja(caja_id, monto_cierre, notas)
+
+
+def sesiones_dia(fecha: str) -> List[dict]:
+    return listar_cajas_fecha(fecha)
 
 
 def historial(limite: int = 30) -> List[dict]:
     return listar_cajas(limite)
+
+
+def historial_dias(limite: int = 30) -> List[dict]:
+    return listar_dias(limite)
@@ -3,7 +3,7 @@ from typing import Optional, List
 
 from models.cliente import (
     crear_cliente, actualizar_cliente, obtener_cliente,
-    buscar_clientes, listar_clientes,
+    buscar_clientes, listar_clientes, listar_clientes_pagina, desactivar_cliente,
 )
 
 
@@ -59,5 +59,15 @@ def todos() -> List[dict]:
     return listar_clientes()
 
 
+def pagina(cursor: Optional[str] = None, limite: int = 50) -> dict:
+    """One page of active clients: {"filas", "siguiente", "total"}."""
+    return listar_clientes_pagina(cursor, limite)
+
+
 def obtener(cliente_id: int) -> Optional[dict]:
     return obtener_cliente(cliente_id)
+
+
+def desactivar(cliente_id: int):
+    """Hide a client from lists and searches; history is kept."""
+    desactivar_cliente(cliente_id)
@@ -6,12 +6,17 @@ Orchestrates: mora calc → payment → cuota update → loan balance → caja.
 from typing import Optional, List
 from datetime import date
 from database.seed import get_config
-from services.mora_calculator import (
-    calcular_mora_cuota, calcular_cancelacion_total,
+from services.mora_calculator import calcular_mora_cuota
+from models.mora import cotizar_cancelacion, desglose_cancelacion
+from models.prestamo import (
+    obtener_prestamo, obtener_proxima_cuota, cuota_para_cobro,
+)
+from models.pago import (
+    registrar_pago, registrar_pagos_cancelacion,
+    listar_pagos_prestamo, listar_pagos_prestamo_pagina, listar_pagos_caja,
 )
-from models.prestamo import obtener_prestamo, obtener_cuotas, obtener_proxima_cuota
-from models.pago import registrar_pago, listar_pagos_prestamo, listar_pagos_caja
 from controllers.caja_controller import caja_activa
+from services.dinero import a_pesos
 
 
 def _tasa_mora() -> float:
@@ -26,14 +31,14 @@ def calcular_cuota_con_mora(cuota: dict, hoy: Optional[date] = None) -> dict:
     """
     Enrich a cuota dict with live mora calculation for today.
     Returns cuota + pendiente, dias_mora, monto_mora, total_a_cobrar.
+    Amounts in centavos: pass a cuota read with en_centavos=True.
     """
     if hoy is None:
         hoy = date.today()
 
-    pendiente = round(
-        cuota["cuota_total"] - cuota["capital_pagado"] - cuota["intereses_pagados"], 2
+    pendiente = max(
+        0, cuota["cuota_total"] - cuota["capital_pagado"] - cuota["intereses_pagados"]
     )
-    pendiente = max(0.0, pendiente)
 
     _fv = str(cuota["fecha_vencimiento"] or "").strip()
     try:
@@ -54,32 +59,32 @@ def calcular_cuota_con_mora(cuota: dict, hoy: Optional[date] = None) -> dict:
         "pendiente":    pendiente,
         "dias_mora":    mora_info["dias_mora"],
         "monto_mora":   mora_info["monto_mora"],
-        "total_a_cobrar": round(pendiente + mora_info["monto_mora"], 2),
+        "total_a_cobrar": pendiente + mora_info["monto_mora"],
     }
 
 
-def calcular_pago_cuota_normal(prestamo_id: int) -> dict:
+def calcular_pago_cuota_normal(prestamo_id: int, cajero: Optional[str] = None) -> dict:
     """
     Returns the breakdown for paying the next installment.
-    Raises if no active caja or no pending cuota.
+    Raises if cajero has no open session or no pending cuota.
     """
-    caja = caja_activa()
+    caja = caja_activa(cajero)
     if not caja:
         raise ValueError("No hay una sesión de caja abierta. Abra la caja primero.")
 
-    cuota = obtener_proxima_cuota(prestamo_id)
+    cuota = obtener_proxima_cuota(prestamo_id, en_centavos=True)
     if not cuota:
         raise ValueError("Este préstamo no tiene cuotas pendientes.")
 
     return {
         "caja":  caja,
-        "cuota": calcular_cuota_con_mora(cuota),
+        "cuota": a_pesos(calcular_cuota_con_mora(cuota)),
     }
 
 
-def calcular_cancelacion(prestamo_id: int) -> dict:
-    """Returns full payoff breakdown for early cancellation."""
-    caja = caja_activa()
+def calcular_cancelacion(prestamo_id: int, cajero: Optional[str] = None) -> dict:
+    """Returns full payoff breakdown for early cancellation (one aggregate query)."""
+    caja = caja_activa(cajero)
     if not caja:
         raise ValueError("No hay una sesión de caja abierta.")
 
@@ -87,65 +92,57 @@ def calcular_cancelacion(prestamo_id: int) -> dict:
     if not prestamo:
         raise ValueError("Préstamo no encontrado.")
 
-    cuotas_pend = obtener_cuotas(prestamo_id, solo_pendientes=True)
-    resultado = calcular_cancelacion_total(
-        saldo_capital=prestamo["saldo_capital"],
-        cuotas_pendientes=cuotas_pend,
-        fecha_calculo=date.today(),
-        tasa_mora_diaria=_tasa_mora(),
-        dias_gracia=_dias_gracia(),
-    )
+    resultado = cotizar_cancelacion(prestamo_id, date.today().isoformat())
     return {"caja": caja, "prestamo": prestamo, "cancelacion": resultado}
 
 
 def cobrar_cuota_normal(
     prestamo_id: int,
-    cuota_id: int,
+    cuota_id: Optional[int],
     metodo_pago: str = "EFECTIVO",
     referencia_pago: str = "",
     notas: str = "",
+    cajero: Optional[str] = None,
 ) -> dict:
     """
-    Process a standard installment payment.
+    Process a standard installment payment in cajero's session
+    (default: this terminal's). cuota_id None pays the next pending cuota.
     Returns the registered payment dict (with numero_recibo).
     """
-    caja = caja_activa()
+    caja = caja_activa(cajero)
     if not caja:
         raise ValueError("No hay sesión de caja abierta.")
 
-    # Re-fetch cuota to get fresh state
-    from database.connection import get_connection
-    conn = get_connection()
-    cuota_row = conn.execute(
-        "SELECT * FROM cuotas WHERE id = ? AND prestamo_id = ?",
-        (cuota_id, prestamo_id),
-    ).fetchone()
+    # Fresh cuota state and the loan's client in one read; registrar_pago
+    # writes from this state instead of re-reading it.
+    cuota_row = cuota_para_cobro(prestamo_id, cuota_id)
     if not cuota_row:
-        raise ValueError("Cuota no encontrada.")
+        raise ValueError("Cuota no encontrada." if cuota_id
+                         else "Este préstamo no tiene cuotas pendientes.")
 
-    cuota = calcular_cuota_con_mora(dict(cuota_row))
-    prestamo = obtener_prestamo(prestamo_id)
+    cuota = calcular_cuota_con_mora(cuota_row)
 
-    # Allocation: mora first, then intereses, then capital
-    pendiente = cuota["pendiente"]
-    interes_pendiente = round(cuota["intereses"] - cuota["intereses_pagados"], 2)
-    capital_pendiente = round(cuota["capital"]   - cuota["capital_pagado"],   2)
+    # Allocation: mora first, then intereses, then capital (centavos)
+    interes_pendiente = cuota["intereses"] - cuota["intereses_pagados"]
+    capital_pendiente = cuota["capital"]   - cuota["capital_pagado"]
 
     datos_pago = {
         "caja_id":        caja["id"],
-        "cuota_id":       cuota_id,
+        "cuota_id":       cuota["id"],
         "prestamo_id":    prestamo_id,
-        "cliente_id":     prestamo["cliente_id"],
+        "cliente_id":     cuota["cliente_id"],
         "tipo_pago":      "CUOTA_NORMAL",
-        "monto_capital":  round(capital_pendiente, 2),
-        "monto_intereses": round(interes_pendiente, 2),
-        "monto_mora":     round(cuota["monto_mora"], 2),
-        "monto_total":    round(capital_pendiente + interes_pendiente + cuota["monto_mora"], 2),
+        "monto_capital":  capital_pendiente,
+        "monto_intereses": interes_pendiente,
+        "monto_mora":     cuota["monto_mora"],
+        "monto_total":    capital_pendiente + interes_pendiente + cuota["monto_mora"],
         "metodo_pago":    metodo_pago,
         "referencia_pago": referencia_pago,
         "notas":          notas,
     }
-    return registrar_pago(datos_pago)
+    pago = registrar_pago(datos_pago, cuota)
+    _emitir_recibos([pago])
+    return pago
 
 
 def cobrar_cancelacion_total(
@@ -153,49 +150,62 @@ def cobrar_cancelacion_total(
     metodo_pago: str = "EFECTIVO",
     referencia_pago: str = "",
     notas: str = "",
+    cajero: Optional[str] = None,
 ) -> List[dict]:
     """
     Pay off all remaining installments atomically — all or nothing.
     Returns list of payment dicts (one per pending cuota).
     """
-    caja = caja_activa()
+    caja = caja_activa(cajero)
     if not caja:
         raise ValueError("No hay sesión de caja abierta.")
 
-    prestamo = obtener_prestamo(prestamo_id)
-    cuotas_pend = obtener_cuotas(prestamo_id, solo_pendientes=True)
-
-    # Build all payment data before touching the DB
+    # The whole breakdown, live mora included, in one query
     lista_pagos = []
-    for cuota in cuotas_pend:
-        c = calcular_cuota_con_mora(cuota)
-        if c["total_a_cobrar"] <= 0:
+    for fila in desglose_cancelacion(prestamo_id, date.today().isoformat()):
+        if fila.pop("pendiente") + fila["monto_mora"] <= 0:
             continue
-        interes_p = round(cuota["intereses"] - cuota["intereses_pagados"], 2)
-        capital_p = round(cuota["capital"]   - cuota["capital_pagado"],   2)
         lista_pagos.append({
+            **fila,
             "caja_id":         caja["id"],
-            "cuota_id":        cuota["id"],
             "prestamo_id":     prestamo_id,
-            "cliente_id":      prestamo["cliente_id"],
             "tipo_pago":       "CANCELACION_TOTAL",
-            "monto_capital":   capital_p,
-            "monto_intereses": interes_p,
-            "monto_mora":      c["monto_mora"],
-            "monto_total":     round(capital_p + interes_p + c["monto_mora"], 2),
+            "monto_total":     fila["monto_capital"] + fila["monto_intereses"] + fila["monto_mora"],
             "metodo_pago":     metodo_pago,
             "referencia_pago": referencia_pago,
             "notas":           notas,
         })
 
     # Execute all payments in a single atomic transaction
-    from models.pago import registrar_pagos_cancelacion
-    return registrar_pagos_cancelacion(lista_pagos)
+    pagos = registrar_pagos_cancelacion(lista_pagos)
+    _emitir_recibos(pagos)
+    return pagos
+
+
+def _emitir_recibos(pagos: List[dict]):
+    """Hand the new payments to the receipt queue; the cashier does not wait for the PDFs."""
+    from services.cola_recibos import encolar_pagos
+    encolar_pagos(pagos)
+
+
+def importar_transferencias(archivo, simular: bool = False,
+                            cajero: Optional[str] = None) -> dict:
+    """Bulk-import a CSV / bank statement into cajero's session (see services.importador_pagos)."""
+    from services.importador_pagos import importar_pagos
+    caja = caja_activa(cajero)
+    if not caja and not simular:
+        raise ValueError("No hay sesión de caja abierta.")
+    return importar_pagos(archivo, simular, caja["id"] if caja else None)
 
 
 def historial_pagos_prestamo(prestamo_id: int) -> List[dict]:
     return listar_pagos_prestamo(prestamo_id)
 
 
+def pagina_pagos_prestamo(prestamo_id: int, cursor: Optional[str] = None,
+                          limite: int = 50) -> dict:
+    return listar_pagos_prestamo_pagina(prestamo_id, cursor, limite)
+
+
 def pagos_de_caja(caja_id: int) -> List[dict]:
     return listar_pagos_caja(caja_id)
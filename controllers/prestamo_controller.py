@@ -2,10 +2,11 @@
 
 from typing import Optional, List
 from datetime import date
-from services.amortizacion import calcular_prestamo
+from services.amortizacion import calcular_prestamo, en_pesos
+from services.dinero import centavos
 from models.prestamo import (
-    numero_prestamo_nuevo, crear_prestamo,
-    obtener_prestamo, listar_prestamos, buscar_prestamos,
+    crear_prestamo,
+    obtener_prestamo, listar_prestamos, listar_prestamos_pagina, buscar_prestamos,
     obtener_cuotas, obtener_proxima_cuota,
 )
 
@@ -28,10 +29,15 @@ def previsualizar(datos: dict) -> dict:
     Calculate amortization without saving.
     datos: monto, tasa, tipo_tasa, plazo, frecuencia_pago,
            tipo_amortizacion, fecha_inicio (str YYYY-MM-DD)
-    Returns full result from services/amortizacion.calcular_prestamo
+    Returns full result from services/amortizacion.calcular_prestamo, in pesos.
     """
+    return en_pesos(_calcular(datos))
+
+
+def _calcular(datos: dict) -> dict:
+    """calcular_prestamo() on the form data, amounts in centavos."""
     return calcular_prestamo(
-        monto=float(datos["monto"]),
+        monto=centavos(datos["monto"]),
         tasa=float(datos["tasa"]),
         tipo_tasa=datos["tipo_tasa"],
         plazo=int(datos["plazo"]),
@@ -54,15 +60,14 @@ def crear(cliente_id: int, datos: dict) -> int:
     if int(datos.get("plazo", 0)) <= 0:
         raise ValueError("El plazo debe ser mayor a cero.")
 
-    resultado = previsualizar(datos)
+    resultado = _calcular(datos)
 
-    numero = numero_prestamo_nuevo()
     hoy = date.today().isoformat()
 
     prestamo_datos = {
         "cliente_id":       cliente_id,
-        "numero_prestamo":  numero,
-        "monto_principal":  float(datos["monto"]),
+        "numero_prestamo":  None,    # reserved inside crear_prestamo
+        "monto_principal":  centavos(datos["monto"]),
         "tasa_interes":     float(datos["tasa"]),
         "tipo_tasa":        datos["tipo_tasa"],
         "plazo":            int(datos["plazo"]),
@@ -73,7 +78,7 @@ def crear(cliente_id: int, datos: dict) -> int:
         "cuota_base":       resultado["cuota_base"],
         "total_intereses":  resultado["total_intereses"],
         "total_a_pagar":    resultado["total_a_pagar"],
-        "saldo_capital":    float(datos["monto"]),
+        "saldo_capital":    centavos(datos["monto"]),
         "fecha_desembolso": hoy,
         "notas":            datos.get("notas", ""),
     }
@@ -89,6 +94,13 @@ def listar(estado: Optional[str] = None, cliente_id: Optional[int] = None) -> Li
     return listar_prestamos(estado=estado, cliente_id=cliente_id)
 
 
+def pagina(estado: Optional[str] = None, cliente_id: Optional[int] = None,
+           cursor: Optional[str] = None, limite: int = 50) -> dict:
+    """One page of loans, newest first: {"filas", "siguiente", "total"}."""
+    return listar_prestamos_pagina(estado=estado, cliente_id=cliente_id,
+                                   cursor=cursor, limite=limite)
+
+
 def buscar(termino: str) -> List[dict]:
     return buscar_prestamos(termino.strip())
 
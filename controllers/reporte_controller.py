@@ -1,9 +1,11 @@
 from typing import Optional, List
 """Controller for report data assembly."""
 
-from datetime import date
+from datetime import date, timedelta
+from models.antiguedad import reporte_antiguedad, leer_fotos
 from models.reporte import (
     reporte_caja_dia, reporte_mora, reporte_proyeccion, resumen_dashboard,
+    cursor_pagos_caja, cursor_mora, cursor_proyeccion,
 )
 
 
@@ -11,10 +13,11 @@ def dashboard() -> dict:
     return resumen_dashboard()
 
 
-def caja(fecha: Optional[str] = None) -> dict:
+def caja(fecha: Optional[str] = None, caja_id: Optional[int] = None) -> dict:
+    """Consolidated day report, or a single cashier session with caja_id."""
     if not fecha:
         fecha = date.today().isoformat()
-    return reporte_caja_dia(fecha)
+    return reporte_caja_dia(fecha, caja_id)
 
 
 def mora() -> List[dict]:
@@ -23,3 +26,38 @@ def mora() -> List[dict]:
 
 def proyeccion(dias: int = 30) -> List[dict]:
     return reporte_proyeccion(dias)
+
+
+def antiguedad(fecha: Optional[str] = None) -> dict:
+    """Aging buckets (1-30/31-60/61-90/90+) with PAR30/PAR90, from cuotas."""
+    return reporte_antiguedad(fecha)
+
+
+def tendencia_antiguedad(dias: int = 90) -> List[dict]:
+    """Aging of the last `dias` days, read from the nightly snapshots."""
+    hoy = date.today()
+    return leer_fotos((hoy - timedelta(days=dias)).isoformat(), hoy.isoformat())
+
+
+# ── Streaming rows for the Excel exports (services.excel_exporter) ──
+
+def excel_caja(fecha: Optional[str] = None, caja_id: Optional[int] = None) -> str:
+    from services.excel_exporter import exportar_caja
+    if not fecha:
+        fecha = date.today().isoformat()
+    return exportar_caja(fecha, cursor_pagos_caja(fecha, caja_id))
+
+
+def excel_mora() -> str:
+    from services.excel_exporter import exportar_mora
+    return exportar_mora(cursor_mora())
+
+
+def excel_proyeccion(dias: int = 30) -> str:
+    from services.excel_exporter import exportar_proyeccion
+    return exportar_proyeccion(cursor_proyeccion(dias))
+
+
+def excel_antiguedad(fecha: Optional[str] = None, dias: int = 90) -> str:
+    from services.excel_exporter import exportar_antiguedad
+    return exportar_antiguedad(antiguedad(fecha), tendencia_antiguedad(dias))
@@ -0,0 +1,25 @@
+"""Helpers for the FTS5 search tables created in database/schema.py."""
+
+import re
+
+_fts_disponible = None
+
+
+def fts_disponible(conn) -> bool:
+    """True when the clientes_fts/prestamos_fts tables exist (checked once per process)."""
+    global _fts_disponible
+    if _fts_disponible is None:
+        _fts_disponible = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'clientes_fts'"
+        ).fetchone() is not None
+    return _fts_disponible
+
+
+def expresion_fts(termino: str) -> str:
+    """
+    Turn free text into an FTS5 prefix query: every word must match the
+    start of some indexed token. "ana per" → "ana"* "per"*
+    Returns "" when the text has nothing searchable.
+    """
+    palabras = [p for p in re.findall(r"[\w\-]+", termino) if re.search(r"[^\W_]", p)]
+    return " ".join(f'"{p}"*' for p in palabras)
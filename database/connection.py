@@ -1,17 +1,29 @@
 import sqlite3
 import os
 import threading
+from typing import Tuple
 from config import DB_PATH
+from database import instrumentacion
+from services.mora_calculator import mora_cuota_sql
 
 # Cada hilo tiene su propia conexión para evitar deadlocks
 _local = threading.local()
 
+# Seconds a writer waits for another connection's lock before
+# "database is locked" (cobros from several cashiers / web workers).
+BUSY_TIMEOUT = 10.0
+
 
 def get_connection() -> sqlite3.Connection:
     if not hasattr(_local, "conn") or _local.conn is None:
         os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        conn = sqlite3.connect(DB_PATH)
+        factory = (instrumentacion.ConexionInstrumentada
+                   if instrumentacion.activa() else sqlite3.Connection)
+        conn = sqlite3.connect(DB_PATH, factory=factory, timeout=BUSY_TIMEOUT)
         conn.row_factory = sqlite3.Row
+        # calcular_mora_cuota(pendiente, vencimiento, fecha, tasa, gracia):
+        # live mora inside set-based queries (see models/mora.py)
+        conn.create_function("calcular_mora_cuota", 5, mora_cuota_sql, deterministic=True)
         conn.execute("PRAGMA foreign_keys = ON")
         conn.execute("PRAGMA journal_mode = WAL")
         conn.execute("PRAGMA synchronous = NORMAL")
@@ -23,3 +35,64 @@ def close_connection():
     if hasattr(_local, "conn") and _local.conn:
         _local.conn.close()
         _local.conn = None
+
+
+# Data version: bumped whenever the database contents change.
+_version_lock = threading.Lock()
+_version_firma = None
+_version_numero = 0
+_version_mtime = 0.0
+_vigia = None               # (path, inode, connection) reading PRAGMA data_version
+_vigia_valor = None
+
+
+def _data_version(inodo):
+    """PRAGMA data_version on a connection kept only for this: it changes
+    whenever any other connection (another thread here, another process)
+    commits. Reopened when the file is replaced (a restored backup), which
+    the old handle would not notice. None while there is no database file.
+    Caller holds _version_lock."""
+    global _vigia
+    if _vigia is not None and _vigia[:2] != (DB_PATH, inodo):
+        _vigia[2].close()
+        _vigia = None
+    if inodo is None:
+        return None
+    if _vigia is None:
+        _vigia = (DB_PATH, inodo, sqlite3.connect(DB_PATH, check_same_thread=False,
+                                                  timeout=BUSY_TIMEOUT))
+    return _vigia[2].execute("PRAGMA data_version").fetchone()[0]
+
+
+def version_datos() -> Tuple[int, float]:
+    """
+    (counter, last modification time) of the database contents, for HTTP
+    caching. The counter goes up when PRAGMA data_version reports a commit
+    from any connection or process (desktop and web share the file); a
+    size/mtime check alone misses a commit after a WAL reset that leaves
+    the file sizes equal on a filesystem with coarse timestamps. os.stat
+    is kept as a cheap extra signal (a changed size/mtime also bumps the
+    counter) and supplies the modification time. The PRAGMA reads only
+    the WAL index header, on its own connection, never the thread's. The
+    time moves forward at least a second per change, so If-Modified-Since
+    (whole seconds) never matches data newer than the client's copy.
+    """
+    global _version_firma, _version_numero, _version_mtime, _vigia_valor
+    firma, mtime, inodo = [], 0.0, None
+    for ruta in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(ruta)
+        except FileNotFoundError:
+            firma.append(None)
+            continue
+        firma.append((st.st_mtime_ns, st.st_size))
+        mtime = max(mtime, st.st_mtime)
+        if ruta == DB_PATH:
+            inodo = st.st_ino
+    with _version_lock:
+        valor = _data_version(inodo)
+        if firma != _version_firma or valor != _vigia_valor:
+            _version_firma, _vigia_valor = firma, valor
+            _version_numero += 1
+            _version_mtime = max(mtime, int(_version_mtime) + 1)
+        return _version_numero, _version_mtime
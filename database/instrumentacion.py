@@ -0,0 +1,308 @@
+"""
+SQL instrumentation for the connection layer.
+
+When enabled (env AGP_SQL_DEBUG=1 or activar()), get_connection opens its
+per-thread connections with ConexionInstrumentada, a sqlite3.Connection
+subclass whose cursors record, per statement:
+  * latency (execute + fetch), rows returned or affected, and call site;
+  * slow statements (>= AGP_SQL_LENTA_MS, default 50 ms) together with
+    their EXPLAIN QUERY PLAN, kept in a ring buffer and logged to 'agp.sql'.
+
+Statements are also grouped into scopes ("alcances"): one per Flask
+request (by route) and one per background task. Each scope has a query
+budget; executions over budget are counted and logged.
+
+Disabled, get_connection returns plain sqlite3 connections and alcance()
+is a no-op, so production pays nothing.
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+log = logging.getLogger("agp.sql")
+
+_activa = os.environ.get("AGP_SQL_DEBUG", "") not in ("", "0")
+UMBRAL_LENTA_MS = float(os.environ.get("AGP_SQL_LENTA_MS", "50"))
+PRESUPUESTO_POR_DEFECTO = 25          # statements per scope execution
+
+_lock = threading.Lock()
+_hilo = threading.local()
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+_RAIZ = os.path.dirname(os.path.dirname(_ESTE_ARCHIVO))
+_DIR_SQLITE3 = os.path.dirname(os.path.abspath(sqlite3.__file__))
+
+
+def activa() -> bool:
+    return _activa
+
+
+def activar(valor: bool = True):
+    """Toggle instrumentation. Only connections opened afterwards are affected."""
+    global _activa
+    _activa = valor
+
+
+# ── Statistics ────────────────────────────────────────────────────────────────
+
+@dataclass
+class EstadisticaSQL:
+    sql: str
+    llamadas: int = 0
+    filas: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    sitios: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Sentencia:
+    sql: str
+    sitio: str
+    ms: float = 0.0
+    filas: int = 0
+    lenta: bool = False
+
+
+@dataclass
+class EstadisticaAlcance:
+    nombre: str
+    presupuesto: int = PRESUPUESTO_POR_DEFECTO
+    ejecuciones: int = 0
+    consultas_total: int = 0
+    consultas_max: int = 0
+    ms_total: float = 0.0
+    ms_max: float = 0.0
+    excedidos: int = 0
+    ultima: List[dict] = field(default_factory=list)
+
+
+_sentencias: Dict[str, EstadisticaSQL] = {}
+_alcances: Dict[str, EstadisticaAlcance] = {}
+_presupuestos: Dict[str, int] = {}
+_lentas: deque = deque(maxlen=100)
+
+
+def establecer_presupuesto(nombre: str, max_consultas: int):
+    """Query budget for a scope, e.g. establecer_presupuesto('POST /caja/cobrar', 12)."""
+    with _lock:
+        _presupuestos[nombre] = max_consultas
+        if nombre in _alcances:
+            _alcances[nombre].presupuesto = max_consultas
+
+
+def reiniciar():
+    with _lock:
+        _sentencias.clear()
+        _alcances.clear()
+        _lentas.clear()
+
+
+def informe(limite: int = 50) -> dict:
+    """Snapshot for the debug API/page."""
+    with _lock:
+        sentencias = sorted(_sentencias.values(), key=lambda e: e.total_ms, reverse=True)
+        return {
+            "activa": _activa,
+            "umbral_lenta_ms": UMBRAL_LENTA_MS,
+            "sentencias": [
+                {**e.__dict__, "total_ms": round(e.total_ms, 3), "max_ms": round(e.max_ms, 3),
+                 "media_ms": round(e.total_ms / e.llamadas, 3) if e.llamadas else 0.0,
+                 "sitios": dict(sorted(e.sitios.items(), key=lambda s: -s[1])[:5])}
+                for e in sentencias[:limite]
+            ],
+            "alcances": [
+                {**a.__dict__, "ms_total": round(a.ms_total, 3), "ms_max": round(a.ms_max, 3),
+                 "consultas_media": round(a.consultas_total / a.ejecuciones, 2)
+                 if a.ejecuciones else 0.0}
+                for a in sorted(_alcances.values(), key=lambda a: -a.consultas_max)
+            ],
+            "lentas": list(_lentas),
+        }
+
+
+# ── Scopes ────────────────────────────────────────────────────────────────────
+
+class _Alcance:
+    __slots__ = ("nombre", "t0", "sentencias")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.t0 = time.perf_counter()
+        self.sentencias: List[Sentencia] = []
+
+
+def abrir_alcance(nombre: str):
+    if _activa:
+        _hilo.alcance = _Alcance(nombre)
+
+
+def cerrar_alcance():
+    a = getattr(_hilo, "alcance", None)
+    if a is None:
+        return
+    _hilo.alcance = None
+    ms = (time.perf_counter() - a.t0) * 1000
+    n = len(a.sentencias)
+    with _lock:
+        e = _alcances.get(a.nombre)
+        if e is None:
+            e = _alcances[a.nombre] = EstadisticaAlcance(
+                a.nombre, _presupuestos.get(a.nombre, PRESUPUESTO_POR_DEFECTO))
+        e.ejecuciones += 1
+        e.consultas_total += n
+        e.consultas_max = max(e.consultas_max, n)
+        e.ms_total += ms
+        e.ms_max = max(e.ms_max, ms)
+        e.ultima = [{"sql": s.sql, "sitio": s.sitio, "ms": round(s.ms, 3), "filas": s.filas}
+                    for s in a.sentencias]
+        excedido = n > e.presupuesto
+        if excedido:
+            e.excedidos += 1
+    if excedido:
+        log.warning("%s: %d consultas (presupuesto %d)", a.nombre, n, e.presupuesto)
+
+
+@contextmanager
+def alcance(nombre: str):
+    """Group the statements run inside the block (current thread) under nombre."""
+    if not _activa:
+        yield
+        return
+    anterior = getattr(_hilo, "alcance", None)
+    abrir_alcance(nombre)
+    try:
+        yield
+    finally:
+        cerrar_alcance()
+        _hilo.alcance = anterior
+
+
+# ── Recording ─────────────────────────────────────────────────────────────────
+
+def _normalizar(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def _sitio() -> str:
+    """First caller frame outside this module and sqlite3, as 'path:line function'."""
+    f = sys._getframe(2)
+    while f is not None:
+        ruta = os.path.abspath(f.f_code.co_filename)
+        if ruta != _ESTE_ARCHIVO and os.path.dirname(ruta) != _DIR_SQLITE3:
+            return f"{os.path.relpath(ruta, _RAIZ)}:{f.f_lineno} {f.f_code.co_name}"
+        f = f.f_back
+    return "?"
+
+
+def _registrar(sentencia: Sentencia, ms: float, filas: int, conn, params, nueva: bool):
+    sentencia.ms += ms
+    sentencia.filas += filas
+    with _lock:
+        e = _sentencias.get(sentencia.sql)
+        if e is None:
+            e = _sentencias[sentencia.sql] = EstadisticaSQL(sentencia.sql)
+        if nueva:
+            e.llamadas += 1
+            e.sitios[sentencia.sitio] = e.sitios.get(sentencia.sitio, 0) + 1
+        e.filas += filas
+        e.total_ms += ms
+        e.max_ms = max(e.max_ms, sentencia.ms)
+    if not sentencia.lenta and sentencia.ms >= UMBRAL_LENTA_MS:
+        sentencia.lenta = True
+        plan = _plan(conn, sentencia.sql, params)
+        _lentas.append({"sql": sentencia.sql, "ms": round(sentencia.ms, 3),
+                        "sitio": sentencia.sitio, "plan": plan,
+                        "hora": time.strftime("%H:%M:%S")})
+        log.warning("SQL lenta (%.1f ms) en %s: %s\n%s", sentencia.ms, sentencia.sitio,
+                    sentencia.sql, "\n".join(plan))
+
+
+def _plan(conn, sql: str, params) -> List[str]:
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+        return []
+    try:
+        filas = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params or ())
+        return [f"{r[0]}|{r[1]}| {r[3]}" for r in filas.fetchall()]
+    except sqlite3.Error as exc:
+        return [f"(sin plan: {exc})"]
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor that times execute and fetch calls and counts rows."""
+
+    _sentencia: Optional[Sentencia] = None
+    _params = None
+
+    def _antes(self, sql: str, params):
+        self._sentencia = Sentencia(_normalizar(sql), _sitio())
+        self._params = params
+        a = getattr(_hilo, "alcance", None)
+        if a is not None:
+            a.sentencias.append(self._sentencia)
+
+    def _despues(self, t0: float, filas: int, nueva: bool = False):
+        if self._sentencia is not None:
+            _registrar(self._sentencia, (time.perf_counter() - t0) * 1000, filas,
+                       self.connection, self._params, nueva)
+
+    def execute(self, sql, parameters=()):
+        self._antes(sql, parameters)
+        t0 = time.perf_counter()
+        super().execute(sql, parameters)
+        self._despues(t0, max(self.rowcount, 0), nueva=True)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._antes(sql, None)
+        t0 = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._despues(t0, max(self.rowcount, 0), nueva=True)
+        return self
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        fila = super().fetchone()
+        self._despues(t0, 0 if fila is None else 1)
+        return fila
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._despues(t0, len(filas))
+        return filas
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        filas = super().fetchall()
+        self._despues(t0, len(filas))
+        return filas
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        fila = super().__next__()
+        self._despues(t0, 1)
+        return fila
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """sqlite3.Connection whose shortcut execute methods use CursorInstrumentado."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
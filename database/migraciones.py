@@ -0,0 +1,145 @@
+"""
+Schema migration runner keyed on PRAGMA user_version.
+
+Each Paso has a strictly increasing version. migrar() reads user_version
+once; when it matches the last step there is nothing else to do. Otherwise
+all pending steps run in a single BEGIN IMMEDIATE transaction that also
+bumps user_version, so a failed step leaves the database as it was and a
+second process starting at the same time waits and then finds nothing
+pending.
+
+Steps are either a SQL script (split into statements, triggers kept whole)
+or a callable fn(conn). Data migrations over large tables use por_lotes(),
+which walks the table in rowid windows so each statement touches a bounded
+number of rows. Constraint changes SQLite's ALTER TABLE cannot express go
+through reconstruir_tabla().
+
+Foreign keys are switched off while steps run (a table rebuild drops the
+parent of existing rows) and checked with PRAGMA foreign_key_check before
+the commit.
+"""
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Paso:
+    version: int
+    descripcion: str
+    sql: Optional[str] = None
+    fn: Optional[Callable[[sqlite3.Connection], None]] = None
+
+    def aplicar(self, conn: sqlite3.Connection):
+        if self.sql:
+            for sentencia in sentencias(self.sql):
+                conn.execute(sentencia)
+        if self.fn:
+            self.fn(conn)
+
+
+def por_lotes(tabla: str, sql: str, tam_lote: int = 5_000) -> Callable[[sqlite3.Connection], None]:
+    """
+    Data-migration step over `tabla` in rowid windows. `sql` receives the
+    named parameters :desde and :hasta (inclusive rowid bounds), e.g.
+        UPDATE pagos SET x = ... WHERE rowid BETWEEN :desde AND :hasta
+    """
+    def paso(conn: sqlite3.Connection):
+        desde, hasta_max = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {tabla}").fetchone()
+        if desde is None:
+            return
+        while desde <= hasta_max:
+            conn.execute(sql, {"desde": desde, "hasta": desde + tam_lote - 1})
+            desde += tam_lote
+    return paso
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn: sqlite3.Connection, pasos: List[Paso]) -> List[int]:
+    """Apply the pending steps. Returns the versions applied (empty when up to date)."""
+    if not pasos or version_actual(conn) >= pasos[-1].version:
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+    claves_foraneas = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")     # no-op inside a transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        actual = version_actual(conn)     # another process may have migrated meanwhile
+        pendientes = [p for p in pasos if p.version > actual]
+        for paso in pendientes:
+            paso.aplicar(conn)
+        if claves_foraneas and conn.execute("PRAGMA foreign_key_check").fetchone():
+            raise sqlite3.IntegrityError("La migración deja claves foráneas inválidas.")
+        if pendientes:
+            conn.execute(f"PRAGMA user_version = {int(pendientes[-1].version)}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        if claves_foraneas:
+            conn.execute("PRAGMA foreign_keys = ON")
+    return [p.version for p in pendientes]
+
+
+def reconstruir_tabla(conn: sqlite3.Connection, tabla: str, ddl: str,
+                      convertir: Optional[Dict[str, str]] = None):
+    """
+    Replace `tabla` with the definition in `ddl` (a CREATE TABLE whose name
+    is written as {tabla}), keeping rowids and the columns both versions
+    share. `convertir` maps a column to the SQL expression (over the old
+    row) that fills it, e.g. {"monto": "CAST(ROUND(monto * 100) AS INTEGER)"}.
+    Indexes on the table and triggers/views that mention it are dropped and
+    recreated around the swap, as in SQLite's documented rebuild procedure.
+    Must run inside migrar() (foreign keys off).
+    """
+    temporal = f"{tabla}__nueva"
+    patron = re.compile(rf"\b{re.escape(tabla)}\b", re.IGNORECASE)
+    dependientes = [
+        (r[0], r[1], r[2]) for r in conn.execute(
+            """SELECT type, name, sql FROM sqlite_master
+               WHERE type IN ('trigger', 'view') AND sql IS NOT NULL""")
+        if patron.search(r[2])
+    ]
+    indices = [r[0] for r in conn.execute(
+        """SELECT sql FROM sqlite_master
+           WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL""", (tabla,))]
+    for tipo, nombre, _ in dependientes:
+        conn.execute(f"DROP {tipo.upper()} {nombre}")
+
+    conn.execute(ddl.format(tabla=temporal))
+    viejas = {r[1] for r in conn.execute(f"PRAGMA table_info({tabla})")}
+    comunes = [r[1] for r in conn.execute(f"PRAGMA table_info({temporal})") if r[1] in viejas]
+    valores = [(convertir or {}).get(c, c) for c in comunes]
+    conn.execute(f"INSERT INTO {temporal} ({', '.join(comunes)}) "
+                 f"SELECT {', '.join(valores)} FROM {tabla}")
+    conn.execute(f"DROP TABLE {tabla}")
+    conn.execute(f"ALTER TABLE {temporal} RENAME TO {tabla}")
+
+    for sql in indices:
+        conn.execute(sql)
+    for _, _, sql in dependientes:
+        conn.execute(sql)
+
+
+def columna_existe(conn: sqlite3.Connection, tabla: str, columna: str) -> bool:
+    return any(r[1] == columna for r in conn.execute(f"PRAGMA table_info({tabla})"))
+
+
+def sentencias(script: str) -> list:
+    """Split a DDL script into statements, keeping trigger bodies whole."""
+    resultado, actual = [], []
+    for linea in script.strip().splitlines():
+        actual.append(linea)
+        texto = "\n".join(actual)
+        if sqlite3.complete_statement(texto):
+            resultado.append(texto)
+            actual = []
+    return resultado
@@ -1,4 +1,7 @@
+import re
+import sqlite3
 from database.connection import get_connection
+from database.migraciones import Paso, migrar, columna_existe, reconstruir_tabla, sentencias
 
 DDL = """
 CREATE TABLE IF NOT EXISTS clientes (
@@ -24,6 +27,7 @@ CREATE TABLE IF NOT EXISTS clientes (
 );
 CREATE INDEX IF NOT EXISTS idx_clientes_cedula  ON clientes(cedula);
 CREATE INDEX IF NOT EXISTS idx_clientes_nombre  ON clientes(nombres, apellidos);
+CREATE INDEX IF NOT EXISTS idx_clientes_orden   ON clientes(activo, apellidos, nombres, id);
 
 CREATE TABLE IF NOT EXISTS prestamos (
     id                  INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -50,6 +54,8 @@ CREATE TABLE IF NOT EXISTS prestamos (
 CREATE INDEX IF NOT EXISTS idx_prestamos_cliente ON prestamos(cliente_id);
 CREATE INDEX IF NOT EXISTS idx_prestamos_estado  ON prestamos(estado);
 CREATE INDEX IF NOT EXISTS idx_prestamos_numero  ON prestamos(numero_prestamo);
+CREATE INDEX IF NOT EXISTS idx_prestamos_creacion ON prestamos(fecha_creacion, id);
+CREATE INDEX IF NOT EXISTS idx_prestamos_estado_creacion ON prestamos(estado, fecha_creacion, id);
 
 CREATE TABLE IF NOT EXISTS garantes_prestamo (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -118,36 +124,484 @@ CREATE TABLE IF NOT EXISTS pagos (
 CREATE INDEX IF NOT EXISTS idx_pagos_prestamo ON pagos(prestamo_id);
 CREATE INDEX IF NOT EXISTS idx_pagos_caja     ON pagos(caja_id);
 CREATE INDEX IF NOT EXISTS idx_pagos_fecha    ON pagos(fecha_pago);
+CREATE INDEX IF NOT EXISTS idx_pagos_prestamo_orden ON pagos(prestamo_id, fecha_pago, hora_pago, id);
+
+-- Contadores de numeración (recibos, préstamos); ver models/secuencia.py
+CREATE TABLE IF NOT EXISTS secuencias (
+    nombre      TEXT PRIMARY KEY,
+    siguiente   INTEGER NOT NULL DEFAULT 1
+);
+
+-- Una fila por fecha procesada por la acumulación nocturna de mora
+CREATE TABLE IF NOT EXISTS mora_acumulaciones (
+    fecha               TEXT PRIMARY KEY,
+    tasa_mora_diaria    REAL NOT NULL,
+    dias_gracia         INTEGER NOT NULL,
+    cuotas_con_mora     INTEGER NOT NULL DEFAULT 0,
+    cuotas_vencidas     INTEGER NOT NULL DEFAULT 0,
+    prestamos_vencidos  INTEGER NOT NULL DEFAULT 0,
+    ejecutado_en        TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
 
 CREATE TABLE IF NOT EXISTS configuracion (
     clave   TEXT PRIMARY KEY,
     valor   TEXT NOT NULL,
     tipo    TEXT NOT NULL DEFAULT 'TEXT'
 );
+
+-- Dashboard counters, maintained by the triggers below in the same
+-- transaction as the change. Rebuild/verify with services/resumen.py.
+CREATE TABLE IF NOT EXISTS resumen_cartera (
+    id                  INTEGER PRIMARY KEY CHECK (id = 1),
+    prestamos_activos   INTEGER NOT NULL DEFAULT 0,
+    prestamos_vencidos  INTEGER NOT NULL DEFAULT 0,
+    clientes_total      INTEGER NOT NULL DEFAULT 0,
+    cartera_total       REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS resumen_diario (
+    fecha       TEXT PRIMARY KEY,   -- fecha de la caja
+    cobrado     REAL NOT NULL DEFAULT 0,
+    num_pagos   INTEGER NOT NULL DEFAULT 0
+);
+
+-- Backfill once, when the counters row does not exist yet
+INSERT INTO resumen_diario (fecha, cobrado, num_pagos)
+SELECT ca.fecha, SUM(p.monto_total), COUNT(*)
+FROM pagos p JOIN cajas ca ON ca.id = p.caja_id
+WHERE p.anulado = 0 AND NOT EXISTS (SELECT 1 FROM resumen_cartera)
+GROUP BY ca.fecha;
+INSERT INTO resumen_cartera (id, prestamos_activos, prestamos_vencidos, clientes_total, cartera_total)
+SELECT 1,
+       (SELECT COUNT(*) FROM prestamos WHERE estado IN ('ACTIVO', 'AL_DIA')),
+       (SELECT COUNT(*) FROM prestamos WHERE estado = 'VENCIDO'),
+       (SELECT COUNT(*) FROM clientes WHERE activo = 1),
+       (SELECT COALESCE(SUM(saldo_capital), 0) FROM prestamos
+        WHERE estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO'))
+WHERE NOT EXISTS (SELECT 1 FROM resumen_cartera);
+
+CREATE TRIGGER IF NOT EXISTS resumen_prestamos_ai AFTER INSERT ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos  = prestamos_activos  + (new.estado IN ('ACTIVO', 'AL_DIA')),
+        prestamos_vencidos = prestamos_vencidos + (new.estado = 'VENCIDO'),
+        cartera_total      = cartera_total
+            + CASE WHEN new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN new.saldo_capital ELSE 0 END;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_prestamos_au
+AFTER UPDATE OF estado, saldo_capital ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos  = prestamos_activos
+            + (new.estado IN ('ACTIVO', 'AL_DIA')) - (old.estado IN ('ACTIVO', 'AL_DIA')),
+        prestamos_vencidos = prestamos_vencidos
+            + (new.estado = 'VENCIDO') - (old.estado = 'VENCIDO'),
+        cartera_total      = cartera_total
+            + CASE WHEN new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN new.saldo_capital ELSE 0 END
+            - CASE WHEN old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN old.saldo_capital ELSE 0 END;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_prestamos_ad AFTER DELETE ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos  = prestamos_activos  - (old.estado IN ('ACTIVO', 'AL_DIA')),
+        prestamos_vencidos = prestamos_vencidos - (old.estado = 'VENCIDO'),
+        cartera_total      = cartera_total
+            - CASE WHEN old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN old.saldo_capital ELSE 0 END;
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumen_clientes_ai AFTER INSERT ON clientes BEGIN
+    UPDATE resumen_cartera SET clientes_total = clientes_total + (new.activo = 1);
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_clientes_au AFTER UPDATE OF activo ON clientes BEGIN
+    UPDATE resumen_cartera SET clientes_total = clientes_total + (new.activo = 1) - (old.activo = 1);
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_clientes_ad AFTER DELETE ON clientes BEGIN
+    UPDATE resumen_cartera SET clientes_total = clientes_total - (old.activo = 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumen_pagos_ai AFTER INSERT ON pagos
+WHEN new.anulado = 0 BEGIN
+    INSERT INTO resumen_diario (fecha, cobrado, num_pagos)
+    SELECT fecha, new.monto_total, 1 FROM cajas WHERE id = new.caja_id
+    ON CONFLICT (fecha) DO UPDATE SET
+        cobrado   = cobrado + excluded.cobrado,
+        num_pagos = num_pagos + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_pagos_au AFTER UPDATE OF anulado ON pagos
+WHEN old.anulado != new.anulado BEGIN
+    INSERT INTO resumen_diario (fecha, cobrado, num_pagos)
+    SELECT fecha,
+           CASE WHEN new.anulado THEN -old.monto_total ELSE new.monto_total END,
+           CASE WHEN new.anulado THEN -1 ELSE 1 END
+    FROM cajas WHERE id = new.caja_id
+    ON CONFLICT (fecha) DO UPDATE SET
+        cobrado   = cobrado + excluded.cobrado,
+        num_pagos = num_pagos + excluded.num_pagos;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_pagos_ad AFTER DELETE ON pagos
+WHEN old.anulado = 0 BEGIN
+    UPDATE resumen_diario SET
+        cobrado   = cobrado - old.monto_total,
+        num_pagos = num_pagos - 1
+    WHERE fecha = (SELECT fecha FROM cajas WHERE id = old.caja_id);
+END;
+"""
+
+
+# Full-text search over clients and loans, kept in sync by triggers.
+# Documents and phones are indexed twice: as typed and with the separators
+# stripped, so "001-0000001" and "0010000001" both find the same client.
+DDL_BUSQUEDA = """
+CREATE VIRTUAL TABLE clientes_fts USING fts5(
+    nombres, apellidos, documento, telefono,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+);
+CREATE VIRTUAL TABLE prestamos_fts USING fts5(
+    numero,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+);
+
+CREATE TRIGGER clientes_fts_ai AFTER INSERT ON clientes BEGIN
+    INSERT INTO clientes_fts (rowid, nombres, apellidos, documento, telefono)
+    VALUES (new.id, new.nombres, new.apellidos,
+            new.cedula || ' ' || replace(replace(new.cedula, '-', ''), ' ', ''),
+            new.telefono_principal || ' ' ||
+            replace(replace(replace(replace(new.telefono_principal, '-', ''), ' ', ''), '(', ''), ')', ''));
+END;
+CREATE TRIGGER clientes_fts_au
+AFTER UPDATE OF nombres, apellidos, cedula, telefono_principal ON clientes BEGIN
+    DELETE FROM clientes_fts WHERE rowid = old.id;
+    INSERT INTO clientes_fts (rowid, nombres, apellidos, documento, telefono)
+    VALUES (new.id, new.nombres, new.apellidos,
+            new.cedula || ' ' || replace(replace(new.cedula, '-', ''), ' ', ''),
+            new.telefono_principal || ' ' ||
+            replace(replace(replace(replace(new.telefono_principal, '-', ''), ' ', ''), '(', ''), ')', ''));
+END;
+CREATE TRIGGER clientes_fts_ad AFTER DELETE ON clientes BEGIN
+    DELETE FROM clientes_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER prestamos_fts_ai AFTER INSERT ON prestamos BEGIN
+    INSERT INTO prestamos_fts (rowid, numero)
+    VALUES (new.id, new.numero_prestamo || ' ' || replace(new.numero_prestamo, '-', ''));
+END;
+CREATE TRIGGER prestamos_fts_au AFTER UPDATE OF numero_prestamo ON prestamos BEGIN
+    DELETE FROM prestamos_fts WHERE rowid = old.id;
+    INSERT INTO prestamos_fts (rowid, numero)
+    VALUES (new.id, new.numero_prestamo || ' ' || replace(new.numero_prestamo, '-', ''));
+END;
+CREATE TRIGGER prestamos_fts_ad AFTER DELETE ON prestamos BEGIN
+    DELETE FROM prestamos_fts WHERE rowid = old.id;
+END;
+
+INSERT INTO clientes_fts (rowid, nombres, apellidos, documento, telefono)
+SELECT id, nombres, apellidos,
+       cedula || ' ' || replace(replace(cedula, '-', ''), ' ', ''),
+       telefono_principal || ' ' ||
+       replace(replace(replace(replace(telefono_principal, '-', ''), ' ', ''), '(', ''), ')', '')
+FROM clientes;
+INSERT INTO prestamos_fts (rowid, numero)
+SELECT id, numero_prestamo || ' ' || replace(numero_prestamo, '-', '') FROM prestamos;
+"""
+
+
+# Columns added after the first release. The base step adds them to
+# databases created by those releases.
+_COLUMNAS_LEGADO = [
+    ("clientes", "tasa_sugerida",         "REAL DEFAULT 0"),
+    ("clientes", "tipo_tasa_sugerida",    "TEXT DEFAULT 'MENSUAL'"),
+    ("pagos",    "autorizacion_terminal", "TEXT"),
+    ("pagos",    "terminal_estado",       "TEXT"),
+]
+
+
+def _esquema_base(conn):
+    """
+    v1: the schema as of the migration engine. Idempotent, so databases
+    created by earlier releases (user_version 0) converge on it too.
+    """
+    for sentencia in sentencias(DDL):
+        conn.execute(sentencia)
+    for tabla, columna, tipo in _COLUMNAS_LEGADO:
+        if not columna_existe(conn, tabla, columna):
+            conn.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+    _crear_indices_busqueda(conn)
+
+
+def _crear_indices_busqueda(conn):
+    """Create the FTS5 search tables once and backfill them from existing rows.
+    Builds without FTS5 keep working: searches fall back to LIKE."""
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'clientes_fts'"
+    ).fetchone()
+    if existe:
+        return
+    conn.execute("SAVEPOINT busqueda")
+    try:
+        for sentencia in sentencias(DDL_BUSQUEDA):
+            conn.execute(sentencia)
+    except sqlite3.OperationalError:
+        conn.execute("ROLLBACK TO busqueda")  # SQLite compiled without FTS5
+    conn.execute("RELEASE busqueda")
+
+
+# v2: one cash session per cashier/terminal and day instead of one per day.
+CAJAS_V2 = """
+CREATE TABLE {tabla} (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha               TEXT NOT NULL,
+    cajero              TEXT NOT NULL DEFAULT 'PRINCIPAL',
+    monto_apertura      REAL NOT NULL DEFAULT 0,
+    monto_cierre        REAL,
+    total_cobrado       REAL NOT NULL DEFAULT 0,
+    total_desembolsado  REAL NOT NULL DEFAULT 0,
+    estado              TEXT NOT NULL DEFAULT 'ABIERTA',
+    hora_apertura       TEXT NOT NULL DEFAULT (time('now', 'localtime')),
+    hora_cierre         TEXT,
+    notas               TEXT,
+    UNIQUE(fecha, cajero)
+)
+"""
+
+# Daily roll-up of the sessions; monto_cierre only once every session is closed
+DDL_CAJAS_DIA = """
+CREATE VIEW IF NOT EXISTS cajas_dia AS
+SELECT fecha,
+       COUNT(*)                      AS sesiones,
+       SUM(estado = 'ABIERTA')       AS abiertas,
+       CASE WHEN SUM(estado = 'ABIERTA') > 0 THEN 'ABIERTA' ELSE 'CERRADA' END AS estado,
+       MIN(hora_apertura)            AS hora_apertura,
+       CASE WHEN SUM(estado = 'ABIERTA') = 0 THEN MAX(hora_cierre) END        AS hora_cierre,
+       SUM(monto_apertura)           AS monto_apertura,
+       SUM(total_cobrado)            AS total_cobrado,
+       SUM(total_desembolsado)       AS total_desembolsado,
+       CASE WHEN SUM(estado = 'ABIERTA') = 0 THEN SUM(monto_cierre) END       AS monto_cierre
+FROM cajas
+GROUP BY fecha;
+"""
+
+
+def _cajas_por_sesion(conn):
+    reconstruir_tabla(conn, "cajas", CAJAS_V2)
+    for sentencia in sentencias(DDL_CAJAS_DIA):
+        conn.execute(sentencia)
+
+
+# v5: money as integer centavos (services/dinero.py). Each table is rebuilt
+# from its current definition with these columns declared INTEGER, so the
+# values keep integer affinity, and the stored pesos are converted once.
+_COLUMNAS_DINERO = {
+    "prestamos": ("monto_principal", "cuota_base", "total_intereses", "total_a_pagar",
+                  "saldo_capital"),
+    "cuotas":    ("cuota_total", "capital", "intereses", "saldo_restante",
+                  "capital_pagado", "intereses_pagados", "mora_acumulada", "mora_pagada"),
+    "cajas":     ("monto_apertura", "monto_cierre", "total_cobrado", "total_desembolsado"),
+    "pagos":     ("monto_capital", "monto_intereses", "monto_mora", "monto_total"),
+    "resumen_cartera":    ("cartera_total",),
+    "resumen_diario":     ("cobrado",),
+    "antiguedad_cartera": ("saldo_capital", "monto_vencido"),
+}
+
+
+def _dinero_en_centavos(conn):
+    for tabla, columnas in _COLUMNAS_DINERO.items():
+        ddl = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+        ).fetchone()[0]
+        ddl = re.sub(rf'^CREATE TABLE\s+"?{tabla}"?', "CREATE TABLE {tabla}", ddl)
+        for columna in columnas:
+            ddl = re.sub(rf"\b({columna}\s+)REAL\b", r"\1INTEGER", ddl)
+        reconstruir_tabla(conn, tabla, ddl, {
+            c: f"CAST(ROUND({c} * 100) AS INTEGER)" for c in columnas
+        })
+
+
+# v6: transactional outbox (models/evento.py, services/eventos.py). The
+# triggers write the event in the same transaction as the change itself, so
+# registrar_pago, anular_pago, the cancellation and batch postings,
+# crear_prestamo and client saves announce themselves without a single
+# extra statement from Python. Amounts in datos are centavos.
+DDL_EVENTOS = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,   -- the dispatcher's cursor; never reused
+    tipo        TEXT NOT NULL,
+    entidad_id  INTEGER NOT NULL,
+    datos       TEXT NOT NULL DEFAULT '{}',          -- JSON
+    fecha       TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TRIGGER IF NOT EXISTS eventos_pagos_ai AFTER INSERT ON pagos BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('PAGO_REGISTRADO', new.id, json_object(
+        'id', new.id, 'numero_recibo', new.numero_recibo, 'caja_id', new.caja_id,
+        'prestamo_id', new.prestamo_id, 'cuota_id', new.cuota_id,
+        'cliente_id', new.cliente_id, 'tipo_pago', new.tipo_pago,
+        'monto_total', new.monto_total));
+END;
+CREATE TRIGGER IF NOT EXISTS eventos_pagos_au AFTER UPDATE OF anulado ON pagos
+WHEN old.anulado = 0 AND new.anulado = 1 BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('PAGO_ANULADO', new.id, json_object(
+        'id', new.id, 'numero_recibo', new.numero_recibo, 'caja_id', new.caja_id,
+        'prestamo_id', new.prestamo_id, 'cuota_id', new.cuota_id,
+        'monto_total', new.monto_total, 'motivo', new.motivo_anulacion));
+END;
+
+CREATE TRIGGER IF NOT EXISTS eventos_prestamos_ai AFTER INSERT ON prestamos BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('PRESTAMO_CREADO', new.id, json_object(
+        'id', new.id, 'numero_prestamo', new.numero_prestamo,
+        'cliente_id', new.cliente_id, 'monto_principal', new.monto_principal));
+END;
+CREATE TRIGGER IF NOT EXISTS eventos_prestamos_au AFTER UPDATE OF estado ON prestamos
+WHEN old.estado != new.estado BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('PRESTAMO_ESTADO', new.id, json_object(
+        'id', new.id, 'anterior', old.estado, 'estado', new.estado,
+        'saldo_capital', new.saldo_capital));
+END;
+
+CREATE TRIGGER IF NOT EXISTS eventos_clientes_ai AFTER INSERT ON clientes BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('CLIENTE_GUARDADO', new.id, json_object('id', new.id, 'nuevo', 1));
+END;
+CREATE TRIGGER IF NOT EXISTS eventos_clientes_au AFTER UPDATE ON clientes BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('CLIENTE_GUARDADO', new.id, json_object('id', new.id, 'nuevo', 0));
+END;
+"""
+
+
+# v7: the dashboard counters go back to the original definitions.
+# prestamos_activos counts every loan with a balance, VENCIDO included,
+# and "en mora" is live again: loans with an unpaid cuota past due today.
+# That depends on the date, so no stored counter can hold it. Instead
+# resumen_vencimientos keeps each loan's earliest unpaid due date, and
+# the count is a range count on its index. The cuota triggers maintain it;
+# the partial index makes their recompute a single index probe.
+RESUMEN_CARTERA_V7 = """
+CREATE TABLE {tabla} (
+    id                  INTEGER PRIMARY KEY CHECK (id = 1),
+    prestamos_activos   INTEGER NOT NULL DEFAULT 0,
+    clientes_total      INTEGER NOT NULL DEFAULT 0,
+    cartera_total       INTEGER NOT NULL DEFAULT 0
+)"""
+
+DDL_VENCIMIENTOS = """
+CREATE TRIGGER resumen_prestamos_ai AFTER INSERT ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos = prestamos_activos + (new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')),
+        cartera_total     = cartera_total
+            + CASE WHEN new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN new.saldo_capital ELSE 0 END;
+END;
+CREATE TRIGGER resumen_prestamos_au
+AFTER UPDATE OF estado, saldo_capital ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos = prestamos_activos
+            + (new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO'))
+            - (old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')),
+        cartera_total     = cartera_total
+            + CASE WHEN new.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN new.saldo_capital ELSE 0 END
+            - CASE WHEN old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN old.saldo_capital ELSE 0 END;
+END;
+CREATE TRIGGER resumen_prestamos_ad AFTER DELETE ON prestamos BEGIN
+    UPDATE resumen_cartera SET
+        prestamos_activos = prestamos_activos - (old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')),
+        cartera_total     = cartera_total
+            - CASE WHEN old.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO') THEN old.saldo_capital ELSE 0 END;
+END;
+UPDATE resumen_cartera SET prestamos_activos =
+    (SELECT COUNT(*) FROM prestamos WHERE estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO'));
+
+CREATE INDEX idx_cuotas_pendientes ON cuotas(prestamo_id, fecha_vencimiento)
+    WHERE estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL');
+
+CREATE TABLE resumen_vencimientos (
+    prestamo_id         INTEGER PRIMARY KEY,
+    primer_pendiente    TEXT NOT NULL       -- earliest unpaid cuota's fecha_vencimiento
+);
+CREATE INDEX idx_resumen_vencimientos ON resumen_vencimientos(primer_pendiente);
+INSERT INTO resumen_vencimientos (prestamo_id, primer_pendiente)
+SELECT prestamo_id, MIN(fecha_vencimiento) FROM cuotas
+WHERE estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')
+GROUP BY prestamo_id;
+
+CREATE TRIGGER resumen_cuotas_ai AFTER INSERT ON cuotas
+WHEN new.estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL') BEGIN
+    INSERT INTO resumen_vencimientos (prestamo_id, primer_pendiente)
+    VALUES (new.prestamo_id, new.fecha_vencimiento)
+    ON CONFLICT (prestamo_id) DO UPDATE SET
+        primer_pendiente = MIN(primer_pendiente, excluded.primer_pendiente);
+END;
+-- Paying a cuota only matters when it was the loan's earliest unpaid one;
+-- any other change to the pending set (a void, a new due date) recomputes.
+CREATE TRIGGER resumen_cuotas_au AFTER UPDATE OF estado, fecha_vencimiento ON cuotas
+WHEN CASE
+    WHEN old.fecha_vencimiento != new.fecha_vencimiento THEN 1
+    WHEN (old.estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')) = (new.estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')) THEN 0
+    WHEN new.estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL') THEN 1
+    ELSE old.fecha_vencimiento <= (SELECT primer_pendiente FROM resumen_vencimientos
+                                   WHERE prestamo_id = old.prestamo_id)
+END BEGIN
+    DELETE FROM resumen_vencimientos WHERE prestamo_id = new.prestamo_id;
+    INSERT INTO resumen_vencimientos (prestamo_id, primer_pendiente)
+    SELECT prestamo_id, fecha_vencimiento FROM cuotas
+    WHERE prestamo_id = new.prestamo_id AND estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')
+    ORDER BY fecha_vencimiento LIMIT 1;
+END;
+CREATE TRIGGER resumen_cuotas_ad AFTER DELETE ON cuotas
+WHEN old.estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')
+ AND old.fecha_vencimiento <= (SELECT primer_pendiente FROM resumen_vencimientos
+                               WHERE prestamo_id = old.prestamo_id) BEGIN
+    DELETE FROM resumen_vencimientos WHERE prestamo_id = old.prestamo_id;
+    INSERT INTO resumen_vencimientos (prestamo_id, primer_pendiente)
+    SELECT prestamo_id, fecha_vencimiento FROM cuotas
+    WHERE prestamo_id = old.prestamo_id AND estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')
+    ORDER BY fecha_vencimiento LIMIT 1;
+END;
+"""
+
+
+def _vencidos_en_vivo(conn):
+    for trigger in ("resumen_prestamos_ai", "resumen_prestamos_au", "resumen_prestamos_ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    reconstruir_tabla(conn, "resumen_cartera", RESUMEN_CARTERA_V7)
+    for sentencia in sentencias(DDL_VENCIMIENTOS):
+        conn.execute(sentencia)
+
+
+# v8: live mora (models/mora.mora_por_cobrar) reads only the unpaid cuotas
+# already past grace. The WHERE must repeat the estado list exactly as
+# written here for SQLite to use the partial index.
+DDL_MORA_EN_VIVO = """
+CREATE INDEX IF NOT EXISTS idx_cuotas_abiertas_vencimiento ON cuotas(fecha_vencimiento)
+    WHERE estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA');
 """
 
 
-MIGRACIONES = [
-    # v1 → v2: tasa sugerida por cliente y campo autorización en pagos
-    "ALTER TABLE clientes ADD COLUMN tasa_sugerida REAL DEFAULT 0",
-    "ALTER TABLE clientes ADD COLUMN tipo_tasa_sugerida TEXT DEFAULT 'MENSUAL'",
-    "ALTER TABLE pagos ADD COLUMN autorizacion_terminal TEXT",
-    "ALTER TABLE pagos ADD COLUMN terminal_estado TEXT",
+# Append new steps at the end with the next version number; never edit a
+# step that has shipped.
+PASOS = [
+    Paso(1, "Esquema base", fn=_esquema_base),
+    Paso(2, "Sesiones de caja por cajero", fn=_cajas_por_sesion),
+    Paso(3, "Índice de referencias de pago", sql="""
+        CREATE INDEX IF NOT EXISTS idx_pagos_referencia
+            ON pagos(referencia_pago) WHERE referencia_pago <> '';
+    """),
+    Paso(4, "Fotos diarias de antigüedad de cartera", sql="""
+        CREATE TABLE IF NOT EXISTS antiguedad_cartera (
+            fecha           TEXT NOT NULL,
+            tramo           INTEGER NOT NULL,   -- 0 al día, 1..4 = 1-30 .. 90+ (models/antiguedad.py)
+            prestamos       INTEGER NOT NULL DEFAULT 0,
+            saldo_capital   REAL NOT NULL DEFAULT 0,
+            monto_vencido   REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, tramo)
+        ) WITHOUT ROWID;
+    """),
+    Paso(5, "Importes en centavos enteros", fn=_dinero_en_centavos),
+    Paso(6, "Tabla de eventos (outbox)", sql=DDL_EVENTOS),
+    Paso(7, "Préstamos en mora en vivo en el tablero", fn=_vencidos_en_vivo),
+    Paso(8, "Índice de cuotas abiertas por vencimiento", sql=DDL_MORA_EN_VIVO),
 ]
 
 
 def crear_tablas():
-    conn = get_connection()
-    conn.executescript(DDL)
-    conn.commit()
-    _aplicar_migraciones(conn)
-
-
-def _aplicar_migraciones(conn):
-    """Safe migrations: execute each ALTER TABLE, ignore if column already exists."""
-    for sql in MIGRACIONES:
-        try:
-            conn.execute(sql)
-            conn.commit()
-        except Exception:
-            pass  # Column already exists — harmless
+    """Bring the database to the latest schema version. When it is already
+    current this is a single PRAGMA user_version read."""
+    migrar(get_connection(), PASOS)
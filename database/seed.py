@@ -1,4 +1,5 @@
-from database.connection import get_connection
+import threading
+from database.connection import get_connection, version_datos
 
 DEFAULTS = [
     ("nombre_agencia",       "Agencia de Préstamos AGP",  "TEXT"),
@@ -9,8 +10,6 @@ DEFAULTS = [
     ("tasa_mora_diaria",     "0.5",                       "REAL"),   # 0.5% por día
     ("dias_gracia",          "3",                         "INTEGER"),
     ("moneda_simbolo",       "RD$",                       "TEXT"),
-    ("proximo_num_prestamo", "1",                         "INTEGER"),
-    ("proximo_num_recibo",   "1",                         "INTEGER"),
     ("logo_path",            "assets/logo.png",           "TEXT"),
     # Terminal de pago
     ("terminal_habilitado",  "0",                         "INTEGER"),
@@ -19,8 +18,52 @@ DEFAULTS = [
     ("terminal_modo",        "DISPLAY",                   "TEXT"),   # DISPLAY o SERIAL
     ("tasa_default",         "5.0",                       "REAL"),   # tasa sugerida global
     ("tipo_tasa_default",    "MENSUAL",                   "TEXT"),
+    ("foto_antiguedad",      "1",                         "INTEGER"),  # foto diaria de antigüedad
 ]
 
+# Legacy counters stored in configuracion, moved to the secuencias table
+_SECUENCIAS_LEGADO = [
+    ("prestamo", "proximo_num_prestamo"),
+    ("recibo",   "proximo_num_recibo"),
+]
+
+# Process-wide cache shared by the Flask thread and the Qt workers.
+# Each thread has its own connection, so the cache lives at module level.
+# It is tagged with the data version it was read at and reloaded once
+# that moves, so a change saved by the other process (desktop or web)
+# is seen on the next read.
+_cache_lock = threading.Lock()
+_cache: dict = {}
+_cache_cargado = False
+_cache_version = 0
+_cache_datos = None
+
+
+def _refrescar_cache(conn):
+    global _cache, _cache_cargado, _cache_datos, _cache_version
+    version = version_datos()[0]
+    if _cache_cargado and version == _cache_datos:
+        return
+    rows = conn.execute("SELECT clave, valor FROM configuracion").fetchall()
+    nuevo = {r["clave"]: r["valor"] for r in rows}
+    if _cache_cargado and nuevo != _cache:
+        _cache_version += 1
+    _cache, _cache_cargado, _cache_datos = nuevo, True, version
+
+
+def invalidar_cache():
+    """Drop cached values; the next read reloads the whole table."""
+    global _cache, _cache_cargado, _cache_version
+    with _cache_lock:
+        _cache = {}
+        _cache_cargado = False
+        _cache_version += 1
+
+
+def config_version() -> int:
+    """Monotonic counter bumped on every configuration change."""
+    return _cache_version
+
 
 def insertar_defaults():
     conn = get_connection()
@@ -28,26 +71,41 @@ def insertar_defaults():
         "INSERT OR IGNORE INTO configuracion (clave, valor, tipo) VALUES (?, ?, ?)",
         DEFAULTS
     )
+    # Seed the sequences, carrying over counters from older databases
+    for nombre, clave in _SECUENCIAS_LEGADO:
+        conn.execute(
+            """INSERT OR IGNORE INTO secuencias (nombre, siguiente)
+               VALUES (?, COALESCE((SELECT CAST(valor AS INTEGER) FROM configuracion
+                                    WHERE clave = ?), 1))""",
+            (nombre, clave),
+        )
+        conn.execute("DELETE FROM configuracion WHERE clave = ?", (clave,))
     conn.commit()
+    invalidar_cache()
 
 
 def get_config(clave: str) -> str:
     conn = get_connection()
-    row = conn.execute(
-        "SELECT valor FROM configuracion WHERE clave = ?", (clave,)
-    ).fetchone()
-    return row["valor"] if row else ""
+    with _cache_lock:
+        _refrescar_cache(conn)
+        return _cache.get(clave, "")
 
 
 def set_config(clave: str, valor: str):
+    global _cache_version
     conn = get_connection()
     conn.execute(
         "UPDATE configuracion SET valor = ? WHERE clave = ?", (valor, clave)
     )
     conn.commit()
+    with _cache_lock:
+        if _cache_cargado and clave in _cache:
+            _cache[clave] = valor
+        _cache_version += 1
 
 
 def get_all_config() -> dict:
     conn = get_connection()
-    rows = conn.execute("SELECT clave, valor FROM configuracion").fetchall()
-    return {r["clave"]: r["valor"] for r in rows}
+    with _cache_lock:
+        _refrescar_cache(conn)
+        return dict(_cache)
@@ -16,6 +16,9 @@ def bootstrap():
     crear_tablas()
     insertar_defaults()
     _backup_al_iniciar()
+    _mora_al_iniciar()
+    _recibos_al_iniciar()
+    _eventos_al_iniciar()
 
 
 def _backup_al_iniciar():
@@ -29,6 +32,21 @@ def _backup_al_iniciar():
     threading.Thread(target=_run, daemon=True).start()
 
 
+def _mora_al_iniciar():
+    from services.mora_acumulacion import iniciar_acumulacion_diaria
+    iniciar_acumulacion_diaria()
+
+
+def _recibos_al_iniciar():
+    from services.cola_recibos import iniciar
+    iniciar()
+
+
+def _eventos_al_iniciar():
+    from services.eventos import iniciar
+    iniciar()
+
+
 def main():
     bootstrap()
 
@@ -1,4 +1,9 @@
-"""Lanzador web — Flask en hilo + QWebEngineView (ventana de escritorio nativa, sin pythonnet)."""
+"""
+Lanzador web — Flask en hilo + QWebEngineView (ventana de escritorio nativa, sin pythonnet).
+
+Modo servidor para la LAN (sin ventana, varias PCs de caja):
+    python main_web.py --servidor [--host 0.0.0.0] [--puerto 8080] [--hilos 8]
+"""
 
 import os, sys, threading, socket
 
@@ -7,6 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import RECEIPTS_DIR, REPORTS_DIR, APP_WIDTH, APP_HEIGHT, APP_MIN_W, APP_MIN_H, APP_TITLE, ASSETS_DIR
 from database.schema import crear_tablas
 from database.seed import insertar_defaults
+from services.mora_acumulacion import iniciar_acumulacion_diaria
 
 PORT = 8080
 
@@ -16,10 +22,18 @@ def bootstrap():
     os.makedirs(REPORTS_DIR, exist_ok=True)
     crear_tablas()
     insertar_defaults()
+    iniciar_acumulacion_diaria()
+    from services.cola_recibos import iniciar
+    iniciar()
+    from services import eventos
+    eventos.iniciar()
 
 
 def _iniciar_flask():
+    """Serve the UI on localhost in a background thread; returns the server
+    (None when waitress is missing and Flask's own server is used)."""
     from app_web import app
+    from services.servidor_web import WAITRESS_AVAILABLE, crear
     import traceback as tb
 
     @app.errorhandler(Exception)
@@ -29,21 +43,54 @@ def _iniciar_flask():
             500,
         )
 
-    app.run(debug=False, port=PORT, host="127.0.0.1", use_reloader=False)
+    if WAITRESS_AVAILABLE:
+        servidor = crear(app, "127.0.0.1", PORT)
+        servidor.iniciar()
+        return servidor
+    threading.Thread(target=app.run, daemon=True, kwargs=dict(
+        debug=False, port=PORT, host="127.0.0.1", use_reloader=False)).start()
+    return None
+
+
+def servir_en_red(host: str, puerto: int, hilos: int):
+    """Headless production mode: waitress in the foreground until SIGINT/SIGTERM."""
+    import logging
+    from app_web import app
+    from services.servidor_web import WAITRESS_AVAILABLE, crear
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if not WAITRESS_AVAILABLE:
+        sys.exit("El modo servidor requiere waitress:  pip install waitress")
+    crear(app, host, puerto, hilos).servir()
 
 
 if __name__ == "__main__":
+    import argparse
+    from services.servidor_web import HILOS
+
+    ap = argparse.ArgumentParser(description="AGP web")
+    ap.add_argument("--servidor", action="store_true", help="servir en la red, sin ventana")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--puerto", type=int, default=PORT)
+    ap.add_argument("--hilos", type=int, default=HILOS)
+    args, qt_args = ap.parse_known_args()
+
     bootstrap()
+    if args.servidor:
+        servir_en_red(args.host, args.puerto, args.hilos)
+        sys.exit(0)
 
-    # Arrancar Flask en hilo daemon ANTES de iniciar Qt
-    threading.Thread(target=_iniciar_flask, daemon=True).start()
+    # Arrancar el servidor en hilo ANTES de iniciar Qt
+    servidor = _iniciar_flask()
 
     from PyQt6.QtWidgets import QApplication, QMainWindow
     from PyQt6.QtWebEngineWidgets import QWebEngineView
     from PyQt6.QtCore import QUrl, QTimer
     from PyQt6.QtGui import QIcon
 
-    qt_app = QApplication(sys.argv)
+    qt_app = QApplication(sys.argv[:1] + qt_args)
+    if servidor:
+        qt_app.aboutToQuit.connect(servidor.detener)
 
     # Ventana principal
     window = QMainWindow()
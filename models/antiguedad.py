@@ -0,0 +1,125 @@
+"""
+Portfolio aging: open loans bucketed by the age of their oldest overdue
+cuota, with PAR30/PAR90 (share of the outstanding principal held by loans
+more than 30/90 days in arrears).
+
+The buckets come out of one aggregate statement: cuotas are grouped per
+loan and the loans per bucket in the same query. guardar_foto() stores a
+day's buckets in antiguedad_cartera so trends are read back from the
+snapshots instead of rescanning cuotas.
+"""
+
+from datetime import date
+from typing import List, Optional
+from database.connection import get_connection
+from services.dinero import pesos
+
+# (tramo, label); tramo 0 holds loans with nothing overdue
+TRAMOS = [
+    (0, "Al día"),
+    (1, "1-30"),
+    (2, "31-60"),
+    (3, "61-90"),
+    (4, "90+"),
+]
+
+_TRAMOS_SQL = """
+    SELECT CASE WHEN dias <= 0  THEN 0
+                WHEN dias <= 30 THEN 1
+                WHEN dias <= 60 THEN 2
+                WHEN dias <= 90 THEN 3
+                ELSE 4
+           END                         AS tramo,
+           COUNT(*)                    AS prestamos,
+           SUM(saldo_capital)          AS saldo_capital,
+           SUM(monto_vencido)          AS monto_vencido
+    FROM (
+        SELECT p.saldo_capital,
+               COALESCE(CAST(julianday(:fecha) - julianday(MIN(
+                   CASE WHEN cu.fecha_vencimiento < :fecha
+                        THEN substr(cu.fecha_vencimiento, 1, 10) END)) AS INTEGER), 0) AS dias,
+               COALESCE(SUM(CASE WHEN cu.fecha_vencimiento < :fecha
+                                 THEN MAX(0, cu.cuota_total - cu.capital_pagado
+                                             - cu.intereses_pagados) END), 0) AS monto_vencido
+        FROM prestamos p
+        LEFT JOIN cuotas cu ON cu.prestamo_id = p.id
+                           AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+        WHERE p.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')
+        GROUP BY p.id
+    )
+    GROUP BY tramo
+"""
+
+
+def _informe(fecha: str, filas) -> dict:
+    """Shape bucket rows (any subset of TRAMOS, amounts in centavos) into
+    the report dict, amounts in pesos."""
+    por_tramo = {r["tramo"]: r for r in filas}
+    tramos = []
+    for tramo, etiqueta in TRAMOS:
+        r = por_tramo.get(tramo)
+        tramos.append({
+            "tramo":         etiqueta,
+            "prestamos":     r["prestamos"] if r else 0,
+            "saldo_capital": r["saldo_capital"] if r else 0,
+            "monto_vencido": r["monto_vencido"] if r else 0,
+        })
+    cartera = sum(t["saldo_capital"] for t in tramos)
+    vencido = sum(t["monto_vencido"] for t in tramos)
+
+    def par(desde: int) -> float:
+        en_riesgo = sum(t["saldo_capital"] for t in tramos[desde:])
+        return round(100 * en_riesgo / cartera, 2) if cartera else 0.0
+
+    for t in tramos:
+        t["pct_cartera"] = round(100 * t["saldo_capital"] / cartera, 2) if cartera else 0.0
+    informe = {
+        "fecha":          fecha,
+        "tramos":         tramos,
+        "prestamos":      sum(t["prestamos"] for t in tramos),
+        "cartera_total":  pesos(cartera),
+        "monto_vencido":  pesos(vencido),
+        "par30":          par(2),
+        "par90":          par(4),
+    }
+    for t in tramos:
+        t["saldo_capital"] = pesos(t["saldo_capital"])
+        t["monto_vencido"] = pesos(t["monto_vencido"])
+    return informe
+
+
+def reporte_antiguedad(fecha: Optional[str] = None) -> dict:
+    """Aging buckets as of fecha (default today), computed from cuotas."""
+    fecha = fecha or date.today().isoformat()
+    conn = get_connection()
+    return _informe(fecha, conn.execute(_TRAMOS_SQL, {"fecha": fecha}).fetchall())
+
+
+def guardar_foto(fecha: str) -> int:
+    """Store (or replace) the buckets of fecha in antiguedad_cartera."""
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM antiguedad_cartera WHERE fecha = :fecha", {"fecha": fecha})
+        cur = conn.execute(
+            f"""INSERT INTO antiguedad_cartera
+                    (fecha, tramo, prestamos, saldo_capital, monto_vencido)
+                SELECT :fecha, tramo, prestamos, saldo_capital, monto_vencido
+                FROM ({_TRAMOS_SQL})""",
+            {"fecha": fecha},
+        )
+    return cur.rowcount
+
+
+def leer_fotos(desde: str, hasta: str) -> List[dict]:
+    """One report dict per snapshot date in [desde, hasta], oldest first."""
+    conn = get_connection()
+    rows = conn.execute(
+        """SELECT * FROM antiguedad_cartera
+           WHERE fecha BETWEEN ? AND ?
+           ORDER BY fecha, tramo""",
+        (desde, hasta),
+    ).fetchall()
+    por_fecha: dict = {}
+    for r in rows:
+        por_fecha.setdefault(r["fecha"], []).append(r)
+    return [_informe(f, filas) for f, filas in por_fecha.items()]
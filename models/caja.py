@@ -1,36 +1,39 @@
 from typing import Optional, List
 from datetime import date
 from database.connection import get_connection
+from services.dinero import a_pesos
 
 
-def obtener_caja_hoy() -> Optional[dict]:
+def obtener_caja_hoy(cajero: str) -> Optional[dict]:
     conn = get_connection()
     row = conn.execute(
-        "SELECT * FROM cajas WHERE fecha = ?",
-        (date.today().isoformat(),),
+        "SELECT * FROM cajas WHERE fecha = ? AND cajero = ?",
+        (date.today().isoformat(), cajero),
     ).fetchone()
-    return dict(row) if row else None
+    return a_pesos(row) if row else None
 
 
-def abrir_caja(monto_apertura: float, notas: str = "") -> int:
+def abrir_caja(monto_apertura: int, notas: str = "", cajero: str = "PRINCIPAL") -> int:
+    """monto_apertura in centavos."""
     conn = get_connection()
     cur = conn.execute(
-        """INSERT INTO cajas (fecha, monto_apertura, notas)
-           VALUES (?, ?, ?)""",
-        (date.today().isoformat(), monto_apertura, notas),
+        """INSERT INTO cajas (fecha, cajero, monto_apertura, notas)
+           VALUES (?, ?, ?, ?)""",
+        (date.today().isoformat(), cajero, monto_apertura, notas),
     )
     conn.commit()
     return cur.lastrowid
 
 
-def cerrar_caja(caja_id: int, monto_cierre: float, notas: str = ""):
+def cerrar_caja(caja_id: int, monto_cierre: int, notas: str = "") -> bool:
+    """Close an open session (monto_cierre in centavos). False when it was already closed."""
     conn = get_connection()
     from datetime import datetime
-    conn.execute(
+    cur = conn.execute(
         """UPDATE cajas
            SET estado = 'CERRADA', monto_cierre = ?,
                hora_cierre = ?, notas = ?
-           WHERE id = ?""",
+           WHERE id = ? AND estado = 'ABIERTA'""",
         (
             monto_cierre,
             datetime.now().strftime("%H:%M:%S"),
@@ -39,24 +42,55 @@ def cerrar_caja(caja_id: int, monto_cierre: float, notas: str = ""):
         ),
     )
     conn.commit()
+    return cur.rowcount == 1
 
 
-def sumar_cobro(caja_id: int, monto: float):
+def sumar_cobro(caja_id: int, monto: int):
+    """monto in centavos."""
     conn = get_connection()
     conn.execute(
         "UPDATE cajas SET total_cobrado = total_cobrado + ? WHERE id = ?",
-        (round(monto, 2), caja_id),
+        (monto, caja_id),
     )
     conn.commit()
 
 
 def listar_cajas(limite: int = 30) -> List[dict]:
+    """Latest sessions, one row per cashier and day."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT * FROM cajas ORDER BY fecha DESC, hora_apertura DESC, id DESC LIMIT ?",
+        (limite,),
+    ).fetchall()
+    return [a_pesos(r) for r in rows]
+
+
+def listar_cajas_fecha(fecha: str) -> List[dict]:
+    """Every session opened on fecha."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT * FROM cajas WHERE fecha = ? ORDER BY hora_apertura, id",
+        (fecha,),
+    ).fetchall()
+    return [a_pesos(r) for r in rows]
+
+
+def obtener_caja_dia(fecha: str) -> Optional[dict]:
+    """Consolidated figures of all sessions of fecha (view cajas_dia)."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT * FROM cajas_dia WHERE fecha = ?", (fecha,)
+    ).fetchone()
+    return a_pesos(row) if row else None
+
+
+def listar_dias(limite: int = 30) -> List[dict]:
     conn = get_connection()
     rows = conn.execute(
-        "SELECT * FROM cajas ORDER BY fecha DESC LIMIT ?",
+        "SELECT * FROM cajas_dia ORDER BY fecha DESC LIMIT ?",
         (limite,),
     ).fetchall()
-    return [dict(r) for r in rows]
+    return [a_pesos(r) for r in rows]
 
 
 def obtener_caja(caja_id: int) -> Optional[dict]:
@@ -64,4 +98,4 @@ def obtener_caja(caja_id: int) -> Optional[dict]:
     row = conn.execute(
         "SELECT * FROM cajas WHERE id = ?", (caja_id,)
     ).fetchone()
-    return dict(row) if row else None
+    return a_pesos(row) if row else None
@@ -1,5 +1,7 @@
 from typing import Optional, List
 from database.connection import get_connection
+from database.busqueda import expresion_fts, fts_disponible
+from models.paginacion import decodificar_cursor, armar_pagina
 
 
 def crear_cliente(datos: dict) -> int:
@@ -53,7 +55,23 @@ def obtener_cliente(cliente_id: int) -> Optional[dict]:
 
 
 def buscar_clientes(termino: str) -> List[dict]:
+    """Ranked prefix search by name, cédula or phone."""
     conn = get_connection()
+    expresion = expresion_fts(termino)
+    if not expresion or not fts_disponible(conn):
+        return _buscar_clientes_like(conn, termino)
+    rows = conn.execute(
+        """SELECT c.* FROM clientes_fts f
+           JOIN clientes c ON c.id = f.rowid
+           WHERE clientes_fts MATCH ? AND c.activo = 1
+           ORDER BY bm25(clientes_fts, 4.0, 4.0, 2.0, 1.0), c.apellidos, c.nombres
+           LIMIT 100""",
+        (expresion,),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _buscar_clientes_like(conn, termino: str) -> List[dict]:
     t = f"%{termino}%"
     rows = conn.execute(
         """SELECT * FROM clientes
@@ -76,6 +94,34 @@ def listar_clientes(solo_activos: bool = True) -> List[dict]:
     return [dict(r) for r in rows]
 
 
+def listar_clientes_pagina(cursor: Optional[str] = None, limite: int = 50) -> dict:
+    """
+    Active clients ordered by (apellidos, nombres, id), one keyset page at a time.
+    The total comes from the dashboard counters, so every page is O(limite).
+    """
+    conn = get_connection()
+    clave, total = decodificar_cursor(cursor)
+    if total is None:
+        total = conn.execute(
+            "SELECT clientes_total FROM resumen_cartera WHERE id = 1"
+        ).fetchone()[0]
+    desde = "AND (apellidos, nombres, id) > (?, ?, ?)" if clave else ""
+    rows = conn.execute(
+        f"""SELECT * FROM clientes
+            WHERE activo = 1 {desde}
+            ORDER BY apellidos, nombres, id
+            LIMIT ?""",
+        (clave or []) + [limite + 1],
+    ).fetchall()
+    return armar_pagina(rows, limite, ["apellidos", "nombres", "id"], total)
+
+
+def desactivar_cliente(cliente_id: int):
+    conn = get_connection()
+    conn.execute("UPDATE clientes SET activo = 0 WHERE id = ?", (cliente_id,))
+    conn.commit()
+
+
 def nombre_completo(cliente: dict) -> str:
     return f"{cliente['nombres']} {cliente['apellidos']}"
 
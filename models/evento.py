@@ -0,0 +1,37 @@
+import json
+from typing import List
+from database.connection import get_connection
+from services.dinero import a_pesos
+
+
+def ultimo_evento() -> int:
+    """Id of the newest event (0 when there is none): where a new cursor starts."""
+    conn = get_connection()
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+
+
+def eventos_desde(ultimo_id: int, limite: int = 500) -> List[dict]:
+    """
+    Events after ultimo_id in commit order, oldest first. The outbox rows
+    are written by triggers (database/schema.py, DDL_EVENTOS) in the same
+    transaction as the change, so an event is visible exactly when its
+    change is. datos is decoded, amounts in pesos.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        """SELECT id, tipo, entidad_id, datos, fecha FROM eventos
+           WHERE id > ? ORDER BY id LIMIT ?""",
+        (ultimo_id, limite),
+    ).fetchall()
+    return [{**dict(r), "datos": a_pesos(json.loads(r["datos"]))} for r in rows]
+
+
+def purgar_eventos(dias: int) -> int:
+    """Delete events older than `dias` days. Returns the rows deleted."""
+    conn = get_connection()
+    with conn:
+        cur = conn.execute(
+            "DELETE FROM eventos WHERE fecha < datetime('now', 'localtime', ?)",
+            (f"-{int(dias)} days",),
+        )
+    return cur.rowcount
@@ -0,0 +1,185 @@
+from typing import List, Optional
+from database.connection import get_connection
+from database.seed import get_config
+from services.dinero import a_pesos
+
+# Unpaid cuotas of open loans with their pending amount and days past grace
+# as of :fecha. Mirrors services/mora_calculator.calcular_mora_cuota.
+_CUOTAS_EN_CURSO = """
+    SELECT cu.id,
+           MAX(0, cu.cuota_total - cu.capital_pagado - cu.intereses_pagados) AS pendiente,
+           CAST(julianday(:fecha) - julianday(substr(cu.fecha_vencimiento, 1, 10))
+                AS INTEGER) - :gracia AS dias_mora,
+           cu.fecha_vencimiento < :fecha AS vencida
+    FROM cuotas cu
+    JOIN prestamos p ON p.id = cu.prestamo_id
+    WHERE cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+      AND p.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')
+"""
+
+_TIENE_CUOTA_VENCIDA = """
+    EXISTS (SELECT 1 FROM cuotas cu
+            WHERE cu.prestamo_id = prestamos.id
+              AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+              AND cu.fecha_vencimiento < :fecha)
+"""
+
+
+def acumular_mora(fecha: str, tasa_mora_diaria: float, dias_gracia: int) -> dict:
+    """
+    Set-based mora accrual for one date (YYYY-MM-DD), in one transaction:
+    - cuotas.mora_acumulada = mora owed as of fecha (absolute, not a delta)
+    - PENDIENTE cuotas past their due date  → VENCIDA
+    - open loans with an overdue cuota       → VENCIDO, and back to ACTIVO
+      once they have none
+    Values are recomputed from scratch, so re-running a date is harmless.
+    tasa_mora_diaria is a decimal (0.005 = 0.5%); mora is whole centavos.
+    """
+    params = {"fecha": fecha, "tasa": tasa_mora_diaria, "gracia": dias_gracia}
+    conn = get_connection()
+    with conn:
+        cur = conn.execute(
+            f"""UPDATE cuotas SET
+                   mora_acumulada = m.mora,
+                   estado = CASE
+                       WHEN cuotas.estado = 'PENDIENTE' AND m.vencida THEN 'VENCIDA'
+                       ELSE cuotas.estado
+                   END
+                FROM (
+                    SELECT id, vencida,
+                           CASE WHEN pendiente > 0 AND dias_mora > 0
+                                THEN CAST(ROUND(pendiente * :tasa * dias_mora) AS INTEGER)
+                                ELSE 0
+                           END AS mora
+                    FROM ({_CUOTAS_EN_CURSO})
+                ) AS m
+                WHERE cuotas.id = m.id
+                  AND (cuotas.mora_acumulada != m.mora
+                       OR (cuotas.estado = 'PENDIENTE' AND m.vencida))""",
+            params,
+        )
+        cuotas_actualizadas = cur.rowcount
+
+        conn.execute(
+            f"""UPDATE prestamos SET estado = 'VENCIDO'
+                WHERE estado IN ('ACTIVO', 'AL_DIA') AND {_TIENE_CUOTA_VENCIDA}""",
+            params,
+        )
+        conn.execute(
+            f"""UPDATE prestamos SET estado = 'ACTIVO'
+                WHERE estado = 'VENCIDO' AND NOT {_TIENE_CUOTA_VENCIDA}""",
+            params,
+        )
+
+        resumen = conn.execute(
+            """SELECT
+                   (SELECT COUNT(*) FROM cuotas
+                    WHERE mora_acumulada > 0
+                      AND estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA'))  AS cuotas_con_mora,
+                   (SELECT COUNT(*) FROM cuotas WHERE estado = 'VENCIDA') AS cuotas_vencidas,
+                   (SELECT COUNT(*) FROM prestamos WHERE estado = 'VENCIDO') AS prestamos_vencidos""",
+        ).fetchone()
+
+        conn.execute(
+            """INSERT OR REPLACE INTO mora_acumulaciones
+               (fecha, tasa_mora_diaria, dias_gracia,
+                cuotas_con_mora, cuotas_vencidas, prestamos_vencidos)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (fecha, tasa_mora_diaria, dias_gracia,
+             resumen["cuotas_con_mora"], resumen["cuotas_vencidas"],
+             resumen["prestamos_vencidos"]),
+        )
+
+    return {**dict(resumen), "fecha": fecha, "cuotas_actualizadas": cuotas_actualizadas}
+
+
+def ultima_acumulacion() -> Optional[dict]:
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT * FROM mora_acumulaciones ORDER BY fecha DESC LIMIT 1"
+    ).fetchone()
+    return dict(row) if row else None
+
+
+# Live mora of the cuota aliased cu as of :fecha, through the SQL function
+# registered in database/connection.py; bind parametros_mora().
+MORA_CUOTA = """calcular_mora_cuota(
+    MAX(0, cu.cuota_total - cu.capital_pagado - cu.intereses_pagados),
+    cu.fecha_vencimiento, :fecha, :tasa, :gracia)"""
+
+
+def parametros_mora(fecha: str) -> dict:
+    """Query parameters for MORA_CUOTA: fecha plus the configured rate and grace days."""
+    return {
+        "fecha":  fecha,
+        "tasa":   float(get_config("tasa_mora_diaria") or 0) / 100.0,
+        "gracia": int(get_config("dias_gracia") or 0),
+    }
+
+
+def cotizar_cancelacion(prestamo_id: int, fecha: str) -> Optional[dict]:
+    """
+    Payoff quote as of fecha in one aggregate query, amounts in pesos:
+    capital, intereses_pendientes, mora_total and total — the figures of
+    services/mora_calculator.calcular_cancelacion_total.
+    """
+    conn = get_connection()
+    row = conn.execute(
+        f"""SELECT p.saldo_capital AS capital,
+                   COALESCE(SUM(MAX(0, cu.intereses - cu.intereses_pagados)), 0)
+                       AS intereses_pendientes,
+                   COALESCE(SUM({MORA_CUOTA}), 0) AS mora_total
+            FROM prestamos p
+            LEFT JOIN cuotas cu ON cu.prestamo_id = p.id
+                               AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+            WHERE p.id = :prestamo_id
+            GROUP BY p.id""",
+        {**parametros_mora(fecha), "prestamo_id": prestamo_id},
+    ).fetchone()
+    if row is None:
+        return None
+    cotizacion = dict(row)
+    cotizacion["total"] = sum(cotizacion.values())
+    return a_pesos(cotizacion)
+
+
+def mora_por_cobrar(fecha: str) -> int:
+    """Live mora owed across open loans as of fecha, in centavos. Only the
+    unpaid cuotas already past their grace days are read, through the
+    partial index of schema step 8; without INDEXED BY the planner prefers
+    idx_cuotas_estado and visits every unpaid cuota."""
+    conn = get_connection()
+    return conn.execute(
+        f"""SELECT COALESCE(SUM({MORA_CUOTA}), 0)
+            FROM cuotas cu INDEXED BY idx_cuotas_abiertas_vencimiento
+            JOIN prestamos p ON p.id = cu.prestamo_id
+            WHERE cu.fecha_vencimiento < date(:fecha, '-' || :gracia || ' days')
+              AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+              AND p.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')""",
+        parametros_mora(fecha),
+    ).fetchone()[0]
+
+
+def desglose_cancelacion(prestamo_id: int, fecha: str) -> List[dict]:
+    """
+    Per pending cuota, what a total cancellation as of fecha pays, in
+    centavos and in one query: cuota_id, cliente_id, pendiente,
+    monto_capital, monto_intereses, monto_mora, plus the paid amounts the
+    posting is guarded on (previo_capital, previo_intereses, previo_mora).
+    """
+    conn = get_connection()
+    return [dict(r) for r in conn.execute(
+        f"""SELECT cu.id AS cuota_id, p.cliente_id,
+                   MAX(0, cu.cuota_total - cu.capital_pagado - cu.intereses_pagados) AS pendiente,
+                   cu.capital - cu.capital_pagado       AS monto_capital,
+                   cu.intereses - cu.intereses_pagados  AS monto_intereses,
+                   {MORA_CUOTA}                         AS monto_mora,
+                   cu.capital_pagado AS previo_capital, cu.intereses_pagados AS previo_intereses,
+                   cu.mora_pagada    AS previo_mora
+            FROM cuotas cu
+            JOIN prestamos p ON p.id = cu.prestamo_id
+            WHERE cu.prestamo_id = :prestamo_id
+              AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+            ORDER BY cu.numero_cuota""",
+        {**parametros_mora(fecha), "prestamo_id": prestamo_id},
+    )]
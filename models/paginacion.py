@@ -0,0 +1,37 @@
+"""Keyset pagination helpers shared by the listing queries."""
+
+import base64
+import json
+from typing import Callable, List, Optional
+
+
+def codificar_cursor(clave: list, total: int) -> str:
+    """Opaque, URL-safe cursor: sort key of the last row seen + the total estimate."""
+    datos = json.dumps({"k": clave, "t": total}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]):
+    """Returns (clave, total), or (None, None) for the first page."""
+    if not cursor:
+        return None, None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return list(datos["k"]), int(datos["t"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor de paginación inválido.")
+
+
+def armar_pagina(rows: list, limite: int, campos_clave: List[str], total: int,
+                 convertir: Callable = dict) -> dict:
+    """
+    rows must come from a query with LIMIT limite + 1; convertir turns each
+    row into the dict returned (e.g. services.dinero.a_pesos).
+    Returns {"filas", "siguiente" (cursor or None), "total"}.
+    """
+    filas = [convertir(r) for r in rows[:limite]]
+    siguiente = None
+    if len(rows) > limite and filas:
+        siguiente = codificar_cursor([filas[-1][c] for c in campos_clave], total)
+    return {"filas": filas, "siguiente": siguiente, "total": total}
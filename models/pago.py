@@ -1,100 +1,144 @@
+import json
+from datetime import date
 from typing import Optional, List
 from database.connection import get_connection
-from database.seed import get_config, set_config
-from datetime import date
+from models.secuencia import reservar, numero_recibo as _formato_recibo
+from models.paginacion import decodificar_cursor, armar_pagina
+from services.dinero import a_pesos
 
 
 def _numero_recibo() -> str:
-    num = int(get_config("proximo_num_recibo"))
-    set_config("proximo_num_recibo", str(num + 1))
-    return f"REC-{date.today().year}-{num:05d}"
-
-
-def registrar_pago(datos: dict) -> dict:
+    """Next receipt number; must run inside the posting transaction."""
+    return _formato_recibo(reservar("recibo"))
+
+
+def _sumar_a_caja(conn, caja_id: int, monto: int):
+    """Add a collection to its cash session. The session may have been closed
+    from another terminal since the cobro was prepared; abort then."""
+    cur = conn.execute(
+        """UPDATE cajas SET total_cobrado = total_cobrado + ?
+           WHERE id = ? AND estado = 'ABIERTA'""",
+        (monto, caja_id),
+    )
+    if cur.rowcount != 1:
+        raise ValueError("La sesión de caja no está abierta.")
+
+
+class CuotaModificada(ValueError):
+    """A cuota changed between allocation and posting (another cashier)."""
+
+
+def _cuota_pagada(cuota: dict, datos: dict) -> dict:
+    """Parameters of the guarded cuota UPDATE: the state after applying the
+    payment in datos to cuota as loaded, plus the amounts it was loaded with."""
+    capital_pagado = cuota["capital_pagado"] + datos["monto_capital"]
+    intereses_pagados = cuota["intereses_pagados"] + datos["monto_intereses"]
+    estado, fecha_pago = cuota["estado"], cuota["fecha_pago"]
+    if capital_pagado >= cuota["capital"] and intereses_pagados >= cuota["intereses"]:
+        if estado != "PAGADA":
+            fecha_pago = date.today().isoformat()
+        estado = "PAGADA"
+    elif capital_pagado > 0:
+        estado = "PARCIAL"
+    return {
+        "id": cuota["id"], "capital_pagado": capital_pagado,
+        "intereses_pagados": intereses_pagados,
+        "mora_pagada": cuota["mora_pagada"] + datos["monto_mora"],
+        "estado": estado, "fecha_pago": fecha_pago,
+        "previo_capital": cuota["capital_pagado"],
+        "previo_intereses": cuota["intereses_pagados"],
+        "previo_mora": cuota["mora_pagada"],
+    }
+
+
+_ACTUALIZAR_CUOTA = """
+    UPDATE cuotas SET
+       capital_pagado = :capital_pagado, intereses_pagados = :intereses_pagados,
+       mora_pagada = :mora_pagada, estado = :estado, fecha_pago = :fecha_pago
+    WHERE id = :id AND capital_pagado = :previo_capital
+      AND intereses_pagados = :previo_intereses AND mora_pagada = :previo_mora"""
+
+
+def registrar_pago(datos: dict, cuota: Optional[dict] = None) -> dict:
     """
     Atomically records a payment and updates cuota + prestamo + caja.
-    datos must include:
+    datos must include (amounts in centavos):
         caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,
         monto_capital, monto_intereses, monto_mora, monto_total,
         metodo_pago, referencia_pago (optional), notas (optional)
-    Returns the inserted payment dict with numero_recibo.
+    cuota is the cuota row the caller computed the payment from, in
+    centavos. With it nothing is re-read: the new cuota state is written
+    outright, guarded on the paid amounts it was loaded with, and
+    CuotaModificada is raised if another payment got there first. Without
+    it the amounts are added to whatever the row holds.
+    Returns the inserted payment dict with numero_recibo, fecha_pago and
+    hora_pago, amounts in pesos.
     """
     conn = get_connection()
     with conn:
-        numero_recibo = _numero_recibo()
-        datos["numero_recibo"] = numero_recibo
+        datos["numero_recibo"] = _numero_recibo()
+        datos.setdefault("referencia_pago", "")
+        datos.setdefault("notas", "")
 
-        # 1. Insert payment
-        cur = conn.execute(
+        pago = conn.execute(
             """INSERT INTO pagos
                (caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,
                 monto_capital, monto_intereses, monto_mora, monto_total,
                 numero_recibo, metodo_pago, referencia_pago, notas)
                VALUES (:caja_id, :cuota_id, :prestamo_id, :cliente_id, :tipo_pago,
                        :monto_capital, :monto_intereses, :monto_mora, :monto_total,
-                       :numero_recibo, :metodo_pago, :referencia_pago, :notas)""",
+                       :numero_recibo, :metodo_pago, :referencia_pago, :notas)
+               RETURNING id, fecha_pago, hora_pago""",
             datos,
-        )
-        pago_id = cur.lastrowid
-
-        # 2. Update cuota
-        conn.execute(
-            """UPDATE cuotas SET
-               capital_pagado    = capital_pagado    + :cap,
-               intereses_pagados = intereses_pagados + :int,
-               mora_pagada       = mora_pagada       + :mora,
-               estado = CASE
-                   WHEN (capital_pagado + :cap) >= capital
-                     AND (intereses_pagados + :int) >= intereses
-                   THEN 'PAGADA'
-                   WHEN (capital_pagado + :cap) > 0
-                   THEN 'PARCIAL'
-                   ELSE estado
-               END,
-               fecha_pago = CASE
-                   WHEN estado != 'PAGADA' AND (capital_pagado + :cap) >= capital
-                     AND (intereses_pagados + :int) >= intereses
-                   THEN date('now', 'localtime')
-                   ELSE fecha_pago
-               END
-               WHERE id = :cuota_id""",
-            {
-                "cap": datos["monto_capital"],
-                "int": datos["monto_intereses"],
-                "mora": datos["monto_mora"],
-                "cuota_id": datos["cuota_id"],
-            },
-        )
+        ).fetchone()
 
-        # 3. Update loan balance (CASE protects against negative saldo)
-        conn.execute(
-            """UPDATE prestamos
-               SET saldo_capital = CASE
-                   WHEN saldo_capital - ? < 0 THEN 0
-                   ELSE saldo_capital - ?
-               END
-               WHERE id = ?""",
-            (datos["monto_capital"], datos["monto_capital"], datos["prestamo_id"]),
-        )
+        if cuota is not None:
+            cur = conn.execute(_ACTUALIZAR_CUOTA, _cuota_pagada(cuota, datos))
+            if cur.rowcount != 1:
+                raise CuotaModificada("La cuota fue modificada por otro cobro. Vuelva a calcular.")
+        else:
+            conn.execute(
+                """UPDATE cuotas SET
+                   capital_pagado    = capital_pagado    + :cap,
+                   intereses_pagados = intereses_pagados + :int,
+                   mora_pagada       = mora_pagada       + :mora,
+                   estado = CASE
+                       WHEN (capital_pagado + :cap) >= capital
+                         AND (intereses_pagados + :int) >= intereses
+                       THEN 'PAGADA'
+                       WHEN (capital_pagado + :cap) > 0
+                       THEN 'PARCIAL'
+                       ELSE estado
+                   END,
+                   fecha_pago = CASE
+                       WHEN estado != 'PAGADA' AND (capital_pagado + :cap) >= capital
+                         AND (intereses_pagados + :int) >= intereses
+                       THEN date('now', 'localtime')
+                       ELSE fecha_pago
+                   END
+                   WHERE id = :cuota_id""",
+                {
+                    "cap": datos["monto_capital"],
+                    "int": datos["monto_intereses"],
+                    "mora": datos["monto_mora"],
+                    "cuota_id": datos["cuota_id"],
+                },
+            )
 
-        # 4. Check if loan is fully paid
-        saldo = conn.execute(
-            "SELECT saldo_capital FROM prestamos WHERE id = ?",
-            (datos["prestamo_id"],),
-        ).fetchone()[0]
-        if saldo <= 0.01:
+        # Loan balance and cancellation in one statement (SET sees the old
+        # saldo); interest/mora-only payments leave the loan row alone.
+        if datos["monto_capital"]:
             conn.execute(
-                "UPDATE prestamos SET estado = 'CANCELADO' WHERE id = ?",
-                (datos["prestamo_id"],),
+                """UPDATE prestamos SET
+                   saldo_capital = MAX(0, saldo_capital - :capital),
+                   estado = CASE WHEN saldo_capital - :capital <= 0 THEN 'CANCELADO' ELSE estado END
+                   WHERE id = :id""",
+                {"capital": datos["monto_capital"], "id": datos["prestamo_id"]},
             )
 
-        # 5. Update caja
-        conn.execute(
-            "UPDATE cajas SET total_cobrado = total_cobrado + ? WHERE id = ?",
-            (datos["monto_total"], datos["caja_id"]),
-        )
+        _sumar_a_caja(conn, datos["caja_id"], datos["monto_total"])
 
-    return {**datos, "id": pago_id}
+    return a_pesos({**datos, **dict(pago)})
 
 
 def anular_pago(pago_id: int, motivo: str):
@@ -161,7 +205,7 @@ def anular_pago(pago_id: int, motivo: str):
             "SELECT saldo_capital, estado FROM prestamos WHERE id = ?",
             (pago["prestamo_id"],),
         ).fetchone()
-        if saldo and saldo["estado"] == "CANCELADO" and saldo["saldo_capital"] > 0.01:
+        if saldo and saldo["estado"] == "CANCELADO" and saldo["saldo_capital"] > 0:
             conn.execute(
                 "UPDATE prestamos SET estado = 'ACTIVO' WHERE id = ?",
                 (pago["prestamo_id"],),
@@ -176,68 +220,165 @@ def anular_pago(pago_id: int, motivo: str):
 
 def registrar_pagos_cancelacion(lista_pagos: List[dict]) -> List[dict]:
     """
-    Registers multiple payments in a SINGLE atomic transaction.
-    Used for full loan cancellation: all cuotas paid or none.
+    Registers a full loan cancellation in a SINGLE atomic transaction:
+    all cuotas paid or none. Set-based — one receipt block, one
+    executemany INSERT, one UPDATE closing every open cuota of the loan
+    (including any with nothing left to pay), one caja update.
+    Amounts in centavos, as for registrar_pago. Each payment also carries
+    the cuota's paid amounts it was computed from (previo_capital,
+    previo_intereses, previo_mora, see models.mora.desglose_cancelacion);
+    if any cuota changed since, CuotaModificada and nothing is posted.
+    Returns the payments with their ids, in pesos.
     """
-    from database.seed import get_config, set_config
-    from datetime import date as _date
-
+    if not lista_pagos:
+        return []
     conn = get_connection()
-    resultados = []
-
     with conn:
+        primero = reservar("recibo", len(lista_pagos))
+        cuotas = []
+        for k, datos in enumerate(lista_pagos):
+            datos["numero_recibo"] = _formato_recibo(primero + k)
+            cuotas.append((datos["cuota_id"], datos["monto_capital"], datos["monto_intereses"],
+                           datos["monto_mora"], datos.pop("previo_capital"),
+                           datos.pop("previo_intereses"), datos.pop("previo_mora")))
+
+        conn.executemany(
+            """INSERT INTO pagos
+               (caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,
+                monto_capital, monto_intereses, monto_mora, monto_total,
+                numero_recibo, metodo_pago, referencia_pago, notas)
+               VALUES (:caja_id, :cuota_id, :prestamo_id, :cliente_id, :tipo_pago,
+                       :monto_capital, :monto_intereses, :monto_mora, :monto_total,
+                       :numero_recibo, :metodo_pago, :referencia_pago, :notas)""",
+            lista_pagos,
+        )
+        # executemany gives no lastrowid: read the ids back by receipt number
+        ids = dict(conn.execute(
+            """SELECT numero_recibo, id FROM pagos
+               WHERE numero_recibo IN (SELECT value FROM json_each(?))""",
+            (json.dumps([d["numero_recibo"] for d in lista_pagos]),),
+        ).fetchall())
         for datos in lista_pagos:
-            # Generate receipt number inside the transaction
-            num = int(get_config("proximo_num_recibo"))
-            set_config("proximo_num_recibo", str(num + 1))
-            datos["numero_recibo"] = f"REC-{_date.today().year}-{num:05d}"
-
-            cur = conn.execute(
-                """INSERT INTO pagos
-                   (caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,
-                    monto_capital, monto_intereses, monto_mora, monto_total,
-                    numero_recibo, metodo_pago, referencia_pago, notas)
-                   VALUES (:caja_id, :cuota_id, :prestamo_id, :cliente_id, :tipo_pago,
-                           :monto_capital, :monto_intereses, :monto_mora, :monto_total,
-                           :numero_recibo, :metodo_pago, :referencia_pago, :notas)""",
-                datos,
-            )
-            pago_id = cur.lastrowid
+            datos["id"] = ids[datos["numero_recibo"]]
+
+        # One UPDATE closes every open cuota of the loan: the paid ones,
+        # guarded on the amounts they were computed from, and those with
+        # nothing left to pay, which have no payment. Any other open cuota
+        # means the loan changed meanwhile.
+        prestamo_id = lista_pagos[0]["prestamo_id"]
+        cerradas = {r[0] for r in conn.execute(
+            """WITH pagos AS MATERIALIZED (
+                   SELECT json_extract(value, '$[0]') AS cuota_id,
+                          json_extract(value, '$[1]') AS capital,
+                          json_extract(value, '$[2]') AS intereses,
+                          json_extract(value, '$[3]') AS mora,
+                          json_extract(value, '$[4]') AS previo_capital,
+                          json_extract(value, '$[5]') AS previo_intereses,
+                          json_extract(value, '$[6]') AS previo_mora
+                   FROM json_each(:pagos))
+               UPDATE cuotas SET
+               capital_pagado    = capital_pagado    + COALESCE(x.capital, 0),
+               intereses_pagados = intereses_pagados + COALESCE(x.intereses, 0),
+               mora_pagada       = mora_pagada       + COALESCE(x.mora, 0),
+               estado = 'PAGADA',
+               fecha_pago = date('now', 'localtime')
+               FROM (SELECT cu.id, pg.* FROM cuotas cu
+                     LEFT JOIN pagos pg ON pg.cuota_id = cu.id
+                     WHERE cu.prestamo_id = :prestamo_id
+                       AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')) AS x
+               WHERE cuotas.id = x.id
+                 AND CASE WHEN x.cuota_id IS NULL
+                          THEN cuotas.cuota_total <= cuotas.capital_pagado + cuotas.intereses_pagados
+                          ELSE cuotas.capital_pagado    = x.previo_capital
+                           AND cuotas.intereses_pagados = x.previo_intereses
+                           AND cuotas.mora_pagada       = x.previo_mora END
+               RETURNING id""",
+            {"pagos": json.dumps(cuotas), "prestamo_id": prestamo_id},
+        ).fetchall()}
+        abiertas = conn.execute(
+            """SELECT COUNT(*) FROM cuotas
+               WHERE prestamo_id = ? AND estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')""",
+            (prestamo_id,),
+        ).fetchone()[0]
+        if abiertas or not cerradas.issuperset(c[0] for c in cuotas):
+            raise CuotaModificada("El préstamo fue modificado por otro cobro. Vuelva a calcular.")
 
-            # Update cuota
-            conn.execute(
-                """UPDATE cuotas SET
-                   capital_pagado    = capital_pagado    + :cap,
-                   intereses_pagados = intereses_pagados + :int,
-                   mora_pagada       = mora_pagada       + :mora,
-                   estado = 'PAGADA',
-                   fecha_pago = date('now', 'localtime')
-                   WHERE id = :cuota_id""",
-                {
-                    "cap":      datos["monto_capital"],
-                    "int":      datos["monto_intereses"],
-                    "mora":     datos["monto_mora"],
-                    "cuota_id": datos["cuota_id"],
-                },
-            )
+        _sumar_a_caja(conn, lista_pagos[0]["caja_id"], sum(d["monto_total"] for d in lista_pagos))
+        conn.execute(
+            "UPDATE prestamos SET saldo_capital = 0, estado = 'CANCELADO' WHERE id = ?",
+            (prestamo_id,),
+        )
 
-            # Update caja
-            conn.execute(
-                "UPDATE cajas SET total_cobrado = total_cobrado + ? WHERE id = ?",
-                (datos["monto_total"], datos["caja_id"]),
-            )
+    return [a_pesos(d) for d in lista_pagos]
 
-            resultados.append({**datos, "id": pago_id})
 
-        # After all cuotas: set loan saldo = 0 and estado = CANCELADO
-        if lista_pagos:
-            prestamo_id = lista_pagos[0]["prestamo_id"]
-            conn.execute(
-                "UPDATE prestamos SET saldo_capital = 0, estado = 'CANCELADO' WHERE id = ?",
-                (prestamo_id,),
-            )
+def registrar_pagos_lote(pagos: List[dict], cuotas: List[dict], caja_id: int) -> List[dict]:
+    """
+    Posts a batch of payments allocated in memory, in ONE transaction:
+    one receipt reservation, one executemany per table, one caja update.
+
+    pagos:  payment dicts as for registrar_pago, in centavos (caja_id and
+            numero_recibo are filled in).
+    cuotas: final state per cuota (id, capital_pagado, intereses_pagados,
+            mora_pagada, estado, fecha_pago) plus the paid amounts it was
+            computed from (previo_capital, previo_intereses, previo_mora).
+            If any cuota no longer has those amounts the whole batch rolls
+            back with CuotaModificada.
+    Returns the payments in pesos.
+    """
+    conn = get_connection()
+    if not pagos:
+        return []
+    with conn:
+        primero = reservar("recibo", len(pagos))
+        for k, datos in enumerate(pagos):
+            datos["caja_id"] = caja_id
+            datos["numero_recibo"] = _formato_recibo(primero + k)
+            datos.setdefault("referencia_pago", "")
+            datos.setdefault("notas", "")
+
+        cur = conn.executemany(_ACTUALIZAR_CUOTA, cuotas)
+        if cur.rowcount != len(cuotas):
+            raise CuotaModificada("Cuotas modificadas durante la importación.")
+
+        conn.executemany(
+            """INSERT INTO pagos
+               (caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,
+                monto_capital, monto_intereses, monto_mora, monto_total,
+                numero_recibo, metodo_pago, referencia_pago, notas)
+               VALUES (:caja_id, :cuota_id, :prestamo_id, :cliente_id, :tipo_pago,
+                       :monto_capital, :monto_intereses, :monto_mora, :monto_total,
+                       :numero_recibo, :metodo_pago, :referencia_pago, :notas)""",
+            pagos,
+        )
+
+        capital: dict = {}
+        for datos in pagos:
+            capital[datos["prestamo_id"]] = capital.get(datos["prestamo_id"], 0) + datos["monto_capital"]
+        conn.executemany(
+            """UPDATE prestamos SET
+               saldo_capital = MAX(0, saldo_capital - :capital),
+               estado = CASE WHEN saldo_capital - :capital <= 0 THEN 'CANCELADO' ELSE estado END
+               WHERE id = :id""",
+            [{"id": pid, "capital": c} for pid, c in capital.items()],
+        )
+
+        _sumar_a_caja(conn, caja_id, sum(d["monto_total"] for d in pagos))
+    return [a_pesos(d) for d in pagos]
 
-    return resultados
+
+def referencias_registradas(referencias: List[str]) -> set:
+    """(referencia_pago, prestamo_id) pairs already posted and not voided."""
+    if not referencias:
+        return set()
+    conn = get_connection()
+    rows = conn.execute(
+        f"""SELECT referencia_pago, prestamo_id FROM pagos
+            WHERE referencia_pago IN ({",".join("?" * len(referencias))})
+              AND referencia_pago <> '' AND anulado = 0""",
+        tuple(referencias),
+    ).fetchall()
+    return {(r[0], r[1]) for r in rows}
 
 
 def listar_pagos_prestamo(prestamo_id: int) -> List[dict]:
@@ -250,7 +391,30 @@ def listar_pagos_prestamo(prestamo_id: int) -> List[dict]:
            ORDER BY p.fecha_pago DESC, p.hora_pago DESC""",
         (prestamo_id,),
     ).fetchall()
-    return [dict(r) for r in rows]
+    return [a_pesos(r) for r in rows]
+
+
+def listar_pagos_prestamo_pagina(prestamo_id: int, cursor: Optional[str] = None,
+                                 limite: int = 50) -> dict:
+    """Payments of a loan, newest first, one keyset page at a time."""
+    conn = get_connection()
+    clave, total = decodificar_cursor(cursor)
+    if total is None:
+        total = conn.execute(
+            "SELECT COUNT(*) FROM pagos WHERE prestamo_id = ? AND anulado = 0",
+            (prestamo_id,),
+        ).fetchone()[0]
+    desde = "AND (p.fecha_pago, p.hora_pago, p.id) < (?, ?, ?)" if clave else ""
+    rows = conn.execute(
+        f"""SELECT p.*, c.numero_cuota
+            FROM pagos p
+            JOIN cuotas c ON c.id = p.cuota_id
+            WHERE p.prestamo_id = ? AND p.anulado = 0 {desde}
+            ORDER BY p.fecha_pago DESC, p.hora_pago DESC, p.id DESC
+            LIMIT ?""",
+        [prestamo_id] + (clave or []) + [limite + 1],
+    ).fetchall()
+    return armar_pagina(rows, limite, ["fecha_pago", "hora_pago", "id"], total, a_pesos)
 
 
 def listar_pagos_caja(caja_id: int) -> List[dict]:
@@ -266,10 +430,44 @@ def listar_pagos_caja(caja_id: int) -> List[dict]:
            ORDER BY p.hora_pago DESC""",
         (caja_id,),
     ).fetchall()
-    return [dict(r) for r in rows]
+    return [a_pesos(r) for r in rows]
+
+
+# Everything a printed receipt shows, in one query
+_SQL_RECIBO = """
+    SELECT p.*, c.nombres, c.apellidos, c.cedula,
+           pr.numero_prestamo, pr.saldo_capital, cu.numero_cuota
+    FROM pagos p
+    JOIN clientes c   ON c.id  = p.cliente_id
+    JOIN prestamos pr ON pr.id = p.prestamo_id
+    JOIN cuotas cu    ON cu.id = p.cuota_id
+"""
+
+
+def datos_recibos(pago_ids: List[int]) -> List[dict]:
+    if not pago_ids:
+        return []
+    conn = get_connection()
+    rows = conn.execute(
+        _SQL_RECIBO + f"WHERE p.id IN ({','.join('?' * len(pago_ids))}) ORDER BY p.id",
+        tuple(pago_ids),
+    ).fetchall()
+    return [a_pesos(r) for r in rows]
+
+
+def datos_recibos_caja(fecha: str, caja_id: Optional[int] = None) -> List[dict]:
+    """Receipts of a caja day (every session, or one), in issue order."""
+    conn = get_connection()
+    rows = conn.execute(
+        _SQL_RECIBO + """JOIN cajas ca ON ca.id = p.caja_id
+        WHERE ca.fecha = ? AND (? IS NULL OR ca.id = ?) AND p.anulado = 0
+        ORDER BY p.id""",
+        (fecha, caja_id, caja_id),
+    ).fetchall()
+    return [a_pesos(r) for r in rows]
 
 
 def obtener_pago(pago_id: int) -> Optional[dict]:
     conn = get_connection()
     row = conn.execute("SELECT * FROM pagos WHERE id = ?", (pago_id,)).fetchone()
-    return dict(row) if row else None
+    return a_pesos(row) if row else None
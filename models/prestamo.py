@@ -1,29 +1,34 @@
 from typing import Optional, List
-from datetime import date
 from database.connection import get_connection
-from database.seed import get_config, set_config
+from database.busqueda import expresion_fts, fts_disponible
+from models.secuencia import reservar, numero_prestamo
+from models.paginacion import decodificar_cursor, armar_pagina
+from services.dinero import a_pesos
 
 
-def _siguiente_numero(clave: str, prefijo: str) -> str:
-    conn = get_connection()
-    with conn:
-        num = int(get_config(clave))
-        set_config(clave, str(num + 1))
-    return f"{prefijo}-{date.today().year}-{num:05d}"
+def _fila(row, en_centavos: bool) -> dict:
+    return dict(row) if en_centavos else a_pesos(row)
 
 
 def numero_prestamo_nuevo() -> str:
-    return _siguiente_numero("proximo_num_prestamo", "PREST")
+    """Reserve a loan number on its own. crear_prestamo assigns one itself."""
+    conn = get_connection()
+    with conn:
+        return numero_prestamo(reservar("prestamo"))
 
 
 def crear_prestamo(datos: dict, tabla_cuotas: list) -> int:
     """
     Inserts loan and its full amortization schedule atomically.
-    datos: dict with all prestamo fields (except id, fecha_creacion).
-    tabla_cuotas: list of FilaCuota from services/amortizacion.py
+    datos: dict with all prestamo fields (except id, fecha_creacion),
+           amounts in centavos. When numero_prestamo is missing it is
+           reserved in the same transaction and written back into datos.
+    tabla_cuotas: list of FilaCuota from services/amortizacion.py (centavos)
     """
     conn = get_connection()
     with conn:
+        if not datos.get("numero_prestamo"):
+            datos["numero_prestamo"] = numero_prestamo(reservar("prestamo"))
         cur = conn.execute(
             """INSERT INTO prestamos
                (cliente_id, numero_prestamo, monto_principal, tasa_interes, tipo_tasa,
@@ -59,7 +64,8 @@ def crear_prestamo(datos: dict, tabla_cuotas: list) -> int:
     return prestamo_id
 
 
-def obtener_prestamo(prestamo_id: int) -> Optional[dict]:
+def obtener_prestamo(prestamo_id: int, en_centavos: bool = False) -> Optional[dict]:
+    """Amounts in pesos, or as stored (centavos) for calculations."""
     conn = get_connection()
     row = conn.execute(
         """SELECT p.*, c.nombres, c.apellidos, c.cedula
@@ -68,7 +74,7 @@ def obtener_prestamo(prestamo_id: int) -> Optional[dict]:
            WHERE p.id = ?""",
         (prestamo_id,),
     ).fetchone()
-    return dict(row) if row else None
+    return _fila(row, en_centavos) if row else None
 
 
 def listar_prestamos(
@@ -95,12 +101,76 @@ def listar_prestamos(
             LIMIT ?""",
         params + [limite],
     ).fetchall()
-    return [dict(r) for r in rows]
+    return [a_pesos(r) for r in rows]
+
+
+def listar_prestamos_pagina(
+    estado: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limite: int = 50,
+) -> dict:
+    """
+    Loans newest first, ordered by (fecha_creacion, id) DESC, one keyset
+    page at a time. The total is counted once, on the first page, and
+    travels inside the cursor.
+    """
+    conn = get_connection()
+    clave, total = decodificar_cursor(cursor)
+    filtros = []
+    params = []
+    if estado:
+        filtros.append("p.estado = ?")
+        params.append(estado)
+    if cliente_id:
+        filtros.append("p.cliente_id = ?")
+        params.append(cliente_id)
+    if total is None:
+        where = ("WHERE " + " AND ".join(filtros)) if filtros else ""
+        total = conn.execute(f"SELECT COUNT(*) FROM prestamos p {where}", params).fetchone()[0]
+    if clave:
+        filtros.append("(p.fecha_creacion, p.id) < (?, ?)")
+        params += clave
+    where = ("WHERE " + " AND ".join(filtros)) if filtros else ""
+    rows = conn.execute(
+        f"""SELECT p.*, c.nombres, c.apellidos, c.cedula
+            FROM prestamos p
+            JOIN clientes c ON c.id = p.cliente_id
+            {where}
+            ORDER BY p.fecha_creacion DESC, p.id DESC
+            LIMIT ?""",
+        params + [limite + 1],
+    ).fetchall()
+    return armar_pagina(rows, limite, ["fecha_creacion", "id"], total, a_pesos)
 
 
 def buscar_prestamos(termino: str) -> List[dict]:
-    """Search by loan number, client name or cedula."""
+    """Ranked prefix search by loan number or the client's name, cédula or phone."""
     conn = get_connection()
+    expresion = expresion_fts(termino)
+    if not expresion or not fts_disponible(conn):
+        return _buscar_prestamos_like(conn, termino)
+    rows = conn.execute(
+        """WITH hits AS (
+               SELECT rowid AS prestamo_id, rank FROM prestamos_fts
+               WHERE prestamos_fts MATCH :q
+               UNION ALL
+               SELECT p.id, f.rank FROM clientes_fts f
+               JOIN prestamos p ON p.cliente_id = f.rowid
+               WHERE clientes_fts MATCH :q
+           )
+           SELECT p.*, c.nombres, c.apellidos, c.cedula
+           FROM (SELECT prestamo_id, MIN(rank) AS rank FROM hits GROUP BY prestamo_id) h
+           JOIN prestamos p ON p.id = h.prestamo_id
+           JOIN clientes c ON c.id = p.cliente_id
+           ORDER BY h.rank, p.fecha_creacion DESC
+           LIMIT 50""",
+        {"q": expresion},
+    ).fetchall()
+    return [a_pesos(r) for r in rows]
+
+
+def _buscar_prestamos_like(conn, termino: str) -> List[dict]:
     t = f"%{termino}%"
     rows = conn.execute(
         """SELECT p.*, c.nombres, c.apellidos, c.cedula
@@ -112,10 +182,11 @@ def buscar_prestamos(termino: str) -> List[dict]:
            LIMIT 50""",
         (t, t, t, t),
     ).fetchall()
-    return [dict(r) for r in rows]
+    return [a_pesos(r) for r in rows]
 
 
-def obtener_cuotas(prestamo_id: int, solo_pendientes: bool = False) -> List[dict]:
+def obtener_cuotas(prestamo_id: int, solo_pendientes: bool = False,
+                   en_centavos: bool = False) -> List[dict]:
     conn = get_connection()
     where = "AND estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')" if solo_pendientes else ""
     rows = conn.execute(
@@ -124,10 +195,50 @@ def obtener_cuotas(prestamo_id: int, solo_pendientes: bool = False) -> List[dict
             ORDER BY numero_cuota""",
         (prestamo_id,),
     ).fetchall()
+    return [_fila(r, en_centavos) for r in rows]
+
+
+def prestamos_por_referencia(numeros: List[str], cedulas: List[str]) -> List[dict]:
+    """
+    Loans named by numero_prestamo (any estado) plus the active loans of
+    the clients with those cédulas, for matching imported payments.
+    """
+    if not numeros and not cedulas:
+        return []
+    conn = get_connection()
+    marcas_n = ",".join("?" * len(numeros)) or "NULL"
+    marcas_c = ",".join("?" * len(cedulas)) or "NULL"
+    rows = conn.execute(
+        f"""SELECT p.id, p.numero_prestamo, p.cliente_id, p.estado, c.cedula
+            FROM prestamos p JOIN clientes c ON c.id = p.cliente_id
+            WHERE p.numero_prestamo IN ({marcas_n})
+            UNION
+            SELECT p.id, p.numero_prestamo, p.cliente_id, p.estado, c.cedula
+            FROM clientes c JOIN prestamos p ON p.cliente_id = c.id
+            WHERE c.cedula IN ({marcas_c})
+              AND p.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')""",
+        (*numeros, *cedulas),
+    ).fetchall()
     return [dict(r) for r in rows]
 
 
-def obtener_proxima_cuota(prestamo_id: int) -> Optional[dict]:
+def cuotas_pendientes_de(prestamo_ids: List[int]) -> List[dict]:
+    """Pending cuotas of several loans in one query, by loan and number.
+    Amounts in centavos: the rows feed payment allocation."""
+    if not prestamo_ids:
+        return []
+    conn = get_connection()
+    rows = conn.execute(
+        f"""SELECT * FROM cuotas
+            WHERE prestamo_id IN ({",".join("?" * len(prestamo_ids))})
+              AND estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
+            ORDER BY prestamo_id, numero_cuota""",
+        tuple(prestamo_ids),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def obtener_proxima_cuota(prestamo_id: int, en_centavos: bool = False) -> Optional[dict]:
     conn = get_connection()
     row = conn.execute(
         """SELECT * FROM cuotas
@@ -135,6 +246,24 @@ def obtener_proxima_cuota(prestamo_id: int) -> Optional[dict]:
            ORDER BY numero_cuota LIMIT 1""",
         (prestamo_id,),
     ).fetchone()
+    return _fila(row, en_centavos) if row else None
+
+
+def cuota_para_cobro(prestamo_id: int, cuota_id: Optional[int] = None) -> Optional[dict]:
+    """
+    The cuota to post a payment against, with the loan's cliente_id, in
+    centavos: cuota_id of prestamo_id, or its next pending cuota when None.
+    """
+    conn = get_connection()
+    filtro = ("cu.id = :cuota_id" if cuota_id is not None
+              else "cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')")
+    row = conn.execute(
+        f"""SELECT cu.*, p.cliente_id
+            FROM cuotas cu JOIN prestamos p ON p.id = cu.prestamo_id
+            WHERE cu.prestamo_id = :prestamo_id AND {filtro}
+            ORDER BY cu.numero_cuota LIMIT 1""",
+        {"prestamo_id": prestamo_id, "cuota_id": cuota_id},
+    ).fetchone()
     return dict(row) if row else None
 
 
@@ -147,10 +276,11 @@ def actualizar_estado_prestamo(prestamo_id: int, estado: str):
     conn.commit()
 
 
-def actualizar_saldo_capital(prestamo_id: int, nuevo_saldo: float):
+def actualizar_saldo_capital(prestamo_id: int, nuevo_saldo: int):
+    """nuevo_saldo in centavos."""
     conn = get_connection()
     conn.execute(
         "UPDATE prestamos SET saldo_capital = ? WHERE id = ?",
-        (round(nuevo_saldo, 2), prestamo_id),
+        (nuevo_saldo, prestamo_id),
     )
     conn.commit()
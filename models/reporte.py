@@ -1,57 +1,105 @@
+import sqlite3
 from typing import Optional, List
 from datetime import date, timedelta
 from database.connection import get_connection
-
-
-def reporte_caja_dia(fecha: str) -> dict:
-    """Full daily cash report for a given date (YYYY-MM-DD)."""
+from models.mora import MORA_CUOTA, mora_por_cobrar, parametros_mora
+from models.resumen import leer_resumen
+from services.dinero import a_pesos, fila_en_pesos, pesos
+
+
+_SQL_PAGOS_CAJA = """
+    SELECT p.*,
+           c.nombres || ' ' || c.apellidos AS cliente_nombre,
+           pr.numero_prestamo,
+           ca.cajero
+    FROM cajas ca
+    JOIN pagos p      ON p.caja_id = ca.id
+    JOIN clientes c   ON c.id  = p.cliente_id
+    JOIN prestamos pr ON pr.id = p.prestamo_id
+    WHERE ca.fecha = ? AND (? IS NULL OR ca.id = ?) AND p.anulado = 0
+    ORDER BY p.hora_pago"""
+
+
+def reporte_caja_dia(fecha: str, caja_id: Optional[int] = None) -> dict:
+    """
+    Daily cash report for a given date (YYYY-MM-DD).
+    Without caja_id it consolidates every cashier session of the day:
+    "caja" holds the roll-up from the cajas_dia view and "sesiones" the
+    per-session figures. With caja_id it covers that session only.
+    """
     conn = get_connection()
-    caja = conn.execute(
-        "SELECT * FROM cajas WHERE fecha = ?", (fecha,)
-    ).fetchone()
-
-    if not caja:
-        return {"fecha": fecha, "caja": None, "pagos": [], "totales": {
+    sesiones = [a_pesos(r) for r in conn.execute(
+        "SELECT * FROM cajas WHERE fecha = ? ORDER BY hora_apertura, id", (fecha,)
+    )]
+    if caja_id is not None:
+        sesiones = [s for s in sesiones if s["id"] == caja_id]
+
+    if not sesiones:
+        return {"fecha": fecha, "caja": None, "sesiones": [], "pagos": [], "totales": {
             "total_capital": 0, "total_intereses": 0,
             "total_mora": 0, "total_cobrado": 0, "num_pagos": 0,
         }}
 
-    pagos = conn.execute(
-        """SELECT p.*,
-                  c.nombres || ' ' || c.apellidos AS cliente_nombre,
-                  pr.numero_prestamo
-           FROM pagos p
-           JOIN clientes c   ON c.id  = p.cliente_id
-           JOIN prestamos pr ON pr.id = p.prestamo_id
-           WHERE p.caja_id = ? AND p.anulado = 0
-           ORDER BY p.hora_pago""",
-        (caja["id"],),
-    ).fetchall()
-
-    totales = {
-        "total_capital":   sum(r["monto_capital"]   for r in pagos),
-        "total_intereses": sum(r["monto_intereses"] for r in pagos),
-        "total_mora":      sum(r["monto_mora"]      for r in pagos),
-        "total_cobrado":   sum(r["monto_total"]     for r in pagos),
+    if caja_id is None:
+        caja = a_pesos(conn.execute(
+            "SELECT * FROM cajas_dia WHERE fecha = ?", (fecha,)
+        ).fetchone())
+    else:
+        caja = sesiones[0]
+
+    pagos = conn.execute(_SQL_PAGOS_CAJA, (fecha, caja_id, caja_id)).fetchall()
+
+    totales = {                           # exact sums of centavos, then pesos
+        "total_capital":   pesos(sum(r["monto_capital"]   for r in pagos)),
+        "total_intereses": pesos(sum(r["monto_intereses"] for r in pagos)),
+        "total_mora":      pesos(sum(r["monto_mora"]      for r in pagos)),
+        "total_cobrado":   pesos(sum(r["monto_total"]     for r in pagos)),
         "num_pagos":       len(pagos),
     }
+    por_sesion = {s["id"]: s for s in sesiones}
+    for s in sesiones:
+        s["num_pagos"] = 0
+    for r in pagos:
+        por_sesion[r["caja_id"]]["num_pagos"] += 1
 
     return {
-        "fecha": fecha,
-        "caja":  dict(caja),
-        "pagos": [dict(r) for r in pagos],
-        "totales": totales,
+        "fecha":    fecha,
+        "caja":     caja,
+        "sesiones": sesiones,
+        "pagos":    [a_pesos(r) for r in pagos],
+        "totales":  totales,
     }
 
 
+def cursor_pagos_caja(fecha: str, caja_id: Optional[int] = None) -> sqlite3.Cursor:
+    """Non-voided payments of a day (or one session), as an open cursor
+    yielding dicts in pesos."""
+    return _en_pesos(get_connection().execute(_SQL_PAGOS_CAJA, (fecha, caja_id, caja_id)))
+
+
+def _en_pesos(cur: sqlite3.Cursor) -> sqlite3.Cursor:
+    cur.row_factory = fila_en_pesos
+    return cur
+
+
 def reporte_mora(fecha_base: Optional[str] = None) -> List[dict]:
-    """Returns all overdue loans with days in arrears."""
+    """
+    Returns all overdue loans with days in arrears.
+    mora_total is the live mora as of fecha_base; mora_acumulada is the
+    figure precomputed by the nightly accrual (services/mora_acumulacion.py),
+    as of its last run.
+    """
+    return list(cursor_mora(fecha_base))
+
+
+def cursor_mora(fecha_base: Optional[str] = None) -> sqlite3.Cursor:
+    """reporte_mora() rows as an open cursor, for streaming exports."""
     if not fecha_base:
         fecha_base = date.today().isoformat()
 
     conn = get_connection()
-    rows = conn.execute(
-        """SELECT
+    return _en_pesos(conn.execute(
+        f"""SELECT
                p.id AS prestamo_id,
                p.numero_prestamo,
                p.saldo_capital,
@@ -60,26 +108,32 @@ def reporte_mora(fecha_base: Optional[str] = None) -> List[dict]:
                c.telefono_principal,
                MIN(cu.fecha_vencimiento) AS primera_cuota_vencida,
                COUNT(cu.id)             AS cuotas_vencidas,
-               SUM(cu.cuota_total - cu.capital_pagado - cu.intereses_pagados) AS monto_pendiente
+               SUM(cu.cuota_total - cu.capital_pagado - cu.intereses_pagados) AS monto_pendiente,
+               SUM(cu.mora_acumulada)   AS mora_acumulada,
+               SUM({MORA_CUOTA})        AS mora_total
            FROM prestamos p
            JOIN clientes c ON c.id = p.cliente_id
            JOIN cuotas cu ON cu.prestamo_id = p.id
            WHERE p.estado IN ('ACTIVO', 'VENCIDO')
              AND cu.estado IN ('PENDIENTE', 'PARCIAL', 'VENCIDA')
-             AND cu.fecha_vencimiento < ?
+             AND cu.fecha_vencimiento < :fecha
            GROUP BY p.id
            ORDER BY primera_cuota_vencida""",
-        (fecha_base,),
-    ).fetchall()
-    return [dict(r) for r in rows]
+        parametros_mora(fecha_base),
+    ))
 
 
 def reporte_proyeccion(dias: int = 30) -> List[dict]:
     """Returns expected collections for the next `dias` days."""
+    return list(cursor_proyeccion(dias))
+
+
+def cursor_proyeccion(dias: int = 30) -> sqlite3.Cursor:
+    """reporte_proyeccion() rows as an open cursor, for streaming exports."""
     hoy = date.today()
     fin  = hoy + timedelta(days=dias)
     conn = get_connection()
-    rows = conn.execute(
+    return _en_pesos(conn.execute(
         """SELECT
                cu.fecha_vencimiento,
                COUNT(cu.id)            AS num_cuotas,
@@ -90,48 +144,29 @@ def reporte_proyeccion(dias: int = 30) -> List[dict]:
            JOIN prestamos p ON p.id = cu.prestamo_id
            WHERE cu.fecha_vencimiento BETWEEN ? AND ?
              AND cu.estado IN ('PENDIENTE', 'PARCIAL')
-             AND p.estado IN ('ACTIVO', 'AL_DIA')
+             AND p.estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO')
            GROUP BY cu.fecha_vencimiento
            ORDER BY cu.fecha_vencimiento""",
         (hoy.isoformat(), fin.isoformat()),
-    ).fetchall()
-    return [dict(r) for r in rows]
+    ))
 
 
 def resumen_dashboard() -> dict:
-    """Quick numbers for the main dashboard."""
-    conn = get_connection()
+    """
+    Quick numbers for the main dashboard.
+    Reads the trigger-maintained counters (models/resumen.py) in one
+    query, no scans. prestamos_activos counts every loan with a balance
+    (VENCIDO included); prestamos_vencidos is live, loans with an unpaid
+    cuota past due today, whether or not the nightly accrual has run;
+    mora_por_cobrar is live, summed in SQL over the cuotas past grace.
+    """
     hoy = date.today().isoformat()
-
-    activos = conn.execute(
-        "SELECT COUNT(*) FROM prestamos WHERE estado IN ('ACTIVO', 'AL_DIA')"
-    ).fetchone()[0]
-
-    vencidos = conn.execute(
-        """SELECT COUNT(DISTINCT prestamo_id) FROM cuotas
-           WHERE fecha_vencimiento < ? AND estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')""",
-        (hoy,),
-    ).fetchone()[0]
-
-    cobrado_hoy = conn.execute(
-        """SELECT COALESCE(SUM(p.monto_total), 0)
-           FROM pagos p JOIN cajas ca ON ca.id = p.caja_id
-           WHERE ca.fecha = ? AND p.anulado = 0""",
-        (hoy,),
-    ).fetchone()[0]
-
-    clientes_total = conn.execute(
-        "SELECT COUNT(*) FROM clientes WHERE activo = 1"
-    ).fetchone()[0]
-
-    cartera_total = conn.execute(
-        "SELECT COALESCE(SUM(saldo_capital), 0) FROM prestamos WHERE estado IN ('ACTIVO', 'AL_DIA')"
-    ).fetchone()[0]
-
+    r = leer_resumen(hoy)
     return {
-        "prestamos_activos": activos,
-        "prestamos_vencidos": vencidos,
-        "cobrado_hoy": round(cobrado_hoy, 2),
-        "clientes_total": clientes_total,
-        "cartera_total": round(cartera_total, 2),
+        "prestamos_activos": r["prestamos_activos"],
+        "prestamos_vencidos": r["prestamos_vencidos"],
+        "cobrado_hoy": r["cobrado"],
+        "clientes_total": r["clientes_total"],
+        "cartera_total": r["cartera_total"],
+        "mora_por_cobrar": pesos(mora_por_cobrar(hoy)),
     }
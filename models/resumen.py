@@ -0,0 +1,115 @@
+from datetime import date
+from typing import List, Optional
+from database.connection import get_connection
+from services.dinero import a_pesos
+
+_CARTERA_DESDE_CERO = """
+    SELECT (SELECT COUNT(*) FROM prestamos
+            WHERE estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO'))                     AS prestamos_activos,
+           (SELECT COUNT(*) FROM clientes WHERE activo = 1)                      AS clientes_total,
+           (SELECT COALESCE(SUM(saldo_capital), 0) FROM prestamos
+            WHERE estado IN ('ACTIVO', 'AL_DIA', 'VENCIDO'))                     AS cartera_total
+"""
+
+# Each loan's earliest unpaid cuota (resumen_vencimientos, kept by the cuota
+# triggers). A loan is "en mora" on fecha when that cuota is past due.
+_VENCIMIENTOS_DESDE_CERO = """
+    SELECT prestamo_id, MIN(fecha_vencimiento) AS primer_pendiente
+    FROM cuotas
+    WHERE estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')
+    GROUP BY prestamo_id
+"""
+
+_VENCIDOS = "(SELECT COUNT(*) FROM resumen_vencimientos WHERE primer_pendiente < :fecha)"
+
+_DIARIO_DESDE_CERO = """
+    SELECT ca.fecha, SUM(p.monto_total) AS cobrado, COUNT(*) AS num_pagos
+    FROM pagos p JOIN cajas ca ON ca.id = p.caja_id
+    WHERE p.anulado = 0
+    GROUP BY ca.fecha
+"""
+
+
+def leer_resumen(fecha: str) -> dict:
+    """Counters row, the loans en mora on fecha and the collections of that
+    caja date — one query. Amounts in pesos; the calcular_*/leer_* pairs
+    below stay in centavos so services/resumen.py can compare them exactly."""
+    conn = get_connection()
+    row = conn.execute(
+        f"""SELECT r.prestamos_activos, {_VENCIDOS} AS prestamos_vencidos,
+                   r.clientes_total, r.cartera_total,
+                   COALESCE(d.cobrado, 0) AS cobrado
+            FROM resumen_cartera r
+            LEFT JOIN resumen_diario d ON d.fecha = :fecha
+            WHERE r.id = 1""",
+        {"fecha": fecha},
+    ).fetchone()
+    return a_pesos(row)
+
+
+def calcular_cartera(fecha: Optional[str] = None) -> dict:
+    """The counters recomputed from the base tables (full scans)."""
+    conn = get_connection()
+    cartera = dict(conn.execute(_CARTERA_DESDE_CERO).fetchone())
+    cartera["prestamos_vencidos"] = conn.execute(
+        """SELECT COUNT(DISTINCT prestamo_id) FROM cuotas
+           WHERE fecha_vencimiento < ? AND estado IN ('PENDIENTE', 'VENCIDA', 'PARCIAL')""",
+        (fecha or date.today().isoformat(),),
+    ).fetchone()[0]
+    return cartera
+
+
+def calcular_diario() -> List[dict]:
+    conn = get_connection()
+    return [dict(r) for r in conn.execute(_DIARIO_DESDE_CERO + " ORDER BY ca.fecha")]
+
+
+def leer_cartera(fecha: Optional[str] = None) -> dict:
+    conn = get_connection()
+    row = conn.execute(
+        f"""SELECT prestamos_activos, {_VENCIDOS} AS prestamos_vencidos,
+                   clientes_total, cartera_total
+            FROM resumen_cartera WHERE id = 1""",
+        {"fecha": fecha or date.today().isoformat()},
+    ).fetchone()
+    return dict(row)
+
+
+def calcular_vencimientos() -> List[dict]:
+    conn = get_connection()
+    return [dict(r) for r in conn.execute(_VENCIMIENTOS_DESDE_CERO + " ORDER BY prestamo_id")]
+
+
+def leer_vencimientos() -> List[dict]:
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT prestamo_id, primer_pendiente FROM resumen_vencimientos ORDER BY prestamo_id"
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def leer_diario() -> List[dict]:
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT fecha, cobrado, num_pagos FROM resumen_diario WHERE num_pagos != 0 ORDER BY fecha"
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def reconstruir_resumen():
+    """Rebuild the summary tables from scratch in one transaction."""
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM resumen_diario")
+        conn.execute(
+            f"INSERT INTO resumen_diario (fecha, cobrado, num_pagos) {_DIARIO_DESDE_CERO}"
+        )
+        conn.execute(
+            f"""INSERT OR REPLACE INTO resumen_cartera
+                (id, prestamos_activos, clientes_total, cartera_total)
+                SELECT 1, * FROM ({_CARTERA_DESDE_CERO})"""
+        )
+        conn.execute("DELETE FROM resumen_vencimientos")
+        conn.execute(
+            f"INSERT INTO resumen_vencimientos (prestamo_id, primer_pendiente) {_VENCIMIENTOS_DESDE_CERO}"
+        )
@@ -0,0 +1,32 @@
+from datetime import date
+from database.connection import get_connection
+
+
+def reservar(nombre: str, cantidad: int = 1) -> int:
+    """
+    Reserve `cantidad` consecutive numbers from a sequence with a single
+    UPDATE ... RETURNING and return the first one.
+
+    Runs on the thread's connection without committing, so call it inside
+    the caller's `with conn:` block: the write lock serializes concurrent
+    cashiers, and a rolled-back transaction gives its numbers back
+    (no gaps, no reuse).
+    """
+    conn = get_connection()
+    row = conn.execute(
+        """UPDATE secuencias SET siguiente = siguiente + :n
+           WHERE nombre = :nombre
+           RETURNING siguiente - :n""",
+        {"nombre": nombre, "n": cantidad},
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Secuencia no encontrada: {nombre}")
+    return row[0]
+
+
+def numero_recibo(num: int) -> str:
+    return f"REC-{date.today().year}-{num:05d}"
+
+
+def numero_prestamo(num: int) -> str:
+    return f"PREST-{date.today().year}-{num:05d}"
@@ -1,27 +1,41 @@
 """
 Amortization calculation service.
 Pure math — no database access. Fully unit-testable.
+
+Amounts are integer centavos (services/dinero.py): each interest charge is
+rounded once to the centavo and capital is what is left of the cuota, so
+the schedule's capital adds up to the principal exactly.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import List
 
+from services.dinero import pesos, redondear
+
+# numpy is optional — only the columnar engine (formato="columnas") needs it
+try:
+    import numpy  # noqa: F401
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 
 @dataclass
 class FilaCuota:
     numero_cuota:     int
     fecha_vencimiento: date
-    cuota_total:      float
-    capital:          float
-    intereses:        float
-    saldo_restante:   float
+    cuota_total:      int       # centavos (pesos after en_pesos())
+    capital:          int
+    intereses:        int
+    saldo_restante:   int
 
 
 # Days per period type (for rate conversion)
 _DIAS_PERIODO = {
     "DIARIA":    1,
+    "DIARIO":    1,     # payment frequency spelling (FRECUENCIAS)
     "SEMANAL":   7,
     "QUINCENAL": 15,
     "MENSUAL":   30,
@@ -56,27 +70,31 @@ def convertir_tasa(tasa_decimal: float, tipo_tasa: str, frecuencia_pago: str) ->
     return (1 + tasa_decimal) ** (dias_dest / dias_orig) - 1
 
 
-def _tabla_frances(monto: float, i: float, n: int,
+def cuota_frances(monto: int, i: float, n: int) -> int:
+    """Constant payment, in centavos, for monto centavos at rate i over n periods."""
+    if i == 0:
+        return redondear(monto / n)
+    return redondear(monto * (i * (1 + i) ** n) / ((1 + i) ** n - 1))
+
+
+def _tabla_frances(monto: int, i: float, n: int,
                    fecha_inicio: date, frecuencia: str) -> List[FilaCuota]:
     """French (constant payment) amortization."""
-    if i == 0:
-        cuota = round(monto / n, 2)
-    else:
-        cuota = round(monto * (i * (1 + i) ** n) / ((1 + i) ** n - 1), 2)
+    cuota = cuota_frances(monto, i, n)
 
     tabla = []
     saldo = monto
 
     for k in range(1, n + 1):
-        interes  = round(saldo * i, 2)
-        capital  = round(cuota - interes, 2)
+        interes  = redondear(saldo * i)
+        capital  = cuota - interes
         cuota_k  = cuota
 
-        if k == n:                          # last: fix rounding drift
-            capital = round(saldo, 2)
-            cuota_k = round(capital + interes, 2)
+        if k == n:                          # last: the balance left, exactly
+            capital = saldo
+            cuota_k = capital + interes
 
-        saldo = round(saldo - capital, 2)
+        saldo -= capital
         fecha = calcular_siguiente_fecha(fecha_inicio, frecuencia, k)
 
         tabla.append(FilaCuota(
@@ -85,27 +103,27 @@ def _tabla_frances(monto: float, i: float, n: int,
             cuota_total=cuota_k,
             capital=capital,
             intereses=interes,
-            saldo_restante=max(saldo, 0.0),
+            saldo_restante=max(saldo, 0),
         ))
 
     return tabla
 
 
-def _tabla_solo_interes(monto: float, i: float, n: int,
+def _tabla_solo_interes(monto: int, i: float, n: int,
                         fecha_inicio: date, frecuencia: str) -> List[FilaCuota]:
     """Interest-only loan: borrower pays interest each period, principal on last."""
     tabla = []
+    interes = redondear(monto * i)
 
     for k in range(1, n + 1):
-        interes = round(monto * i, 2)
         if k < n:
-            capital = 0.0
+            capital = 0
             cuota_k = interes
             saldo   = monto
         else:
             capital = monto
-            cuota_k = round(monto + interes, 2)
-            saldo   = 0.0
+            cuota_k = monto + interes
+            saldo   = 0
 
         fecha = calcular_siguiente_fecha(fecha_inicio, frecuencia, k)
 
@@ -122,27 +140,35 @@ def _tabla_solo_interes(monto: float, i: float, n: int,
 
 
 def calcular_prestamo(
-    monto: float,
+    monto: int,             # centavos
     tasa: float,            # percentage, e.g. 5.0 means 5%
     tipo_tasa: str,         # DIARIA|SEMANAL|QUINCENAL|MENSUAL|ANUAL
     plazo: int,             # number of payment periods
     frecuencia_pago: str,   # DIARIO|SEMANAL|QUINCENAL|MENSUAL
     tipo_amortizacion: str, # FRANCES|SOLO_INTERES
     fecha_inicio: date,
+    formato: str = "filas", # filas|columnas
 ) -> dict:
     """
     Top-level entry point.
-    Returns:
+    Returns (amounts in centavos; en_pesos() converts for display):
         cuota_base      – payment amount for period 1 (fixed for FRANCES)
         total_intereses – sum of all interest charges
         total_a_pagar   – monto + total_intereses
         fecha_vencimiento – last payment date
         tasa_periodo    – effective rate per payment period (decimal)
-        tabla           – list[FilaCuota]
+        tabla           – list[FilaCuota], or TablaColumnas when
+                          formato="columnas" (requires numpy)
     """
     tasa_decimal = tasa / 100.0
     tasa_periodo = convertir_tasa(tasa_decimal, tipo_tasa, frecuencia_pago)
 
+    if formato == "columnas":
+        return _calcular_columnas(monto, tasa_periodo, plazo, fecha_inicio,
+                                  frecuencia_pago, tipo_amortizacion)
+    if formato != "filas":
+        raise ValueError(f"Formato de tabla no soportado: {formato}")
+
     if tipo_amortizacion == "FRANCES":
         tabla = _tabla_frances(monto, tasa_periodo, plazo, fecha_inicio, frecuencia_pago)
     elif tipo_amortizacion == "SOLO_INTERES":
@@ -150,8 +176,8 @@ def calcular_prestamo(
     else:
         raise ValueError(f"Tipo de amortización no soportado: {tipo_amortizacion}")
 
-    total_intereses = round(sum(f.intereses for f in tabla), 2)
-    total_a_pagar   = round(monto + total_intereses, 2)
+    total_intereses = sum(f.intereses for f in tabla)
+    total_a_pagar   = monto + total_intereses
 
     return {
         "cuota_base":       tabla[0].cuota_total,
@@ -161,3 +187,46 @@ def calcular_prestamo(
         "tasa_periodo":     tasa_periodo,
         "tabla":            tabla,
     }
+
+
+def _calcular_columnas(monto: int, tasa_periodo: float, plazo: int,
+                       fecha_inicio: date, frecuencia_pago: str,
+                       tipo_amortizacion: str) -> dict:
+    """calcular_prestamo() backed by services/amortizacion_vectorial.py."""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("El formato 'columnas' requiere numpy instalado.")
+    from services import amortizacion_vectorial as vec
+
+    if tipo_amortizacion == "FRANCES":
+        tabla = vec.tabla_frances(monto, tasa_periodo, plazo, fecha_inicio, frecuencia_pago)
+    elif tipo_amortizacion == "SOLO_INTERES":
+        tabla = vec.tabla_solo_interes(monto, tasa_periodo, plazo, fecha_inicio, frecuencia_pago)
+    else:
+        raise ValueError(f"Tipo de amortización no soportado: {tipo_amortizacion}")
+
+    total_intereses = tabla.total_intereses()
+    total_a_pagar   = monto + total_intereses
+
+    return {
+        "cuota_base":       int(tabla.cuota_total[0]),
+        "total_intereses":  total_intereses,
+        "total_a_pagar":    total_a_pagar,
+        "fecha_vencimiento": tabla.fecha_vencimiento[-1].astype(object),
+        "tasa_periodo":     tasa_periodo,
+        "tabla":            tabla,
+    }
+
+
+def en_pesos(resultado: dict) -> dict:
+    """A calcular_prestamo() result with its amounts in pesos, for display."""
+    return {
+        **resultado,
+        "cuota_base":      pesos(resultado["cuota_base"]),
+        "total_intereses": pesos(resultado["total_intereses"]),
+        "total_a_pagar":   pesos(resultado["total_a_pagar"]),
+        "tabla": [
+            replace(f, cuota_total=pesos(f.cuota_total), capital=pesos(f.capital),
+                    intereses=pesos(f.intereses), saldo_restante=pesos(f.saldo_restante))
+            for f in resultado["tabla"]
+        ],
+    }
@@ -0,0 +1,340 @@
+"""
+Array-backed amortization engine.
+Same math as services/amortizacion.py, but the schedule is stored as NumPy
+columns instead of one FilaCuota per period. No database access.
+
+Amounts are integer centavos (int64 columns). The French balance
+recurrence rounds each period's interest, so it cannot be expressed in
+closed form without changing the centavos; it runs as a tight scalar loop
+over plain ints and only the finished columns become arrays. Due dates and
+interest-only schedules are fully vectorized.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator
+
+import numpy as np
+
+from services.amortizacion import FilaCuota, convertir_tasa, cuota_frances
+from services.dinero import redondear
+
+# Fixed-length payment frequencies, in days (MENSUAL is calendar-based)
+_DIAS_FRECUENCIA = {
+    "DIARIO":    1,
+    "SEMANAL":   7,
+    "QUINCENAL": 15,
+}
+
+
+@dataclass
+class TablaColumnas:
+    """
+    Amortization schedule as parallel columns.
+    Behaves like a read-only list of FilaCuota (len, indexing, iteration),
+    so code written for calcular_prestamo()["tabla"] keeps working.
+    """
+    numero_cuota:      np.ndarray   # int64
+    fecha_vencimiento: np.ndarray   # datetime64[D]
+    cuota_total:       np.ndarray   # int64 centavos
+    capital:           np.ndarray   # int64 centavos
+    intereses:         np.ndarray   # int64 centavos
+    saldo_restante:    np.ndarray   # int64 centavos
+
+    def __len__(self) -> int:
+        return len(self.numero_cuota)
+
+    def fila(self, k: int) -> FilaCuota:
+        return FilaCuota(
+            numero_cuota=int(self.numero_cuota[k]),
+            fecha_vencimiento=self.fecha_vencimiento[k].astype(object),
+            cuota_total=int(self.cuota_total[k]),
+            capital=int(self.capital[k]),
+            intereses=int(self.intereses[k]),
+            saldo_restante=int(self.saldo_restante[k]),
+        )
+
+    def __getitem__(self, k: int) -> FilaCuota:
+        if isinstance(k, slice):
+            return [self.fila(j) for j in range(len(self))[k]]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        return self.fila(k)
+
+    def __iter__(self) -> Iterator[FilaCuota]:
+        for row in zip(
+            self.numero_cuota.tolist(),
+            self.fecha_vencimiento.astype(object),
+            self.cuota_total.tolist(),
+            self.capital.tolist(),
+            self.intereses.tolist(),
+            self.saldo_restante.tolist(),
+        ):
+            yield FilaCuota(*row)
+
+    def filas(self) -> list:
+        """Convert to the classic list[FilaCuota] representation."""
+        return list(self)
+
+    def total_intereses(self) -> int:
+        return int(self.intereses.sum())
+
+
+def _sumar_meses(inicio: np.ndarray, meses) -> np.ndarray:
+    """
+    inicio + meses for datetime64[D] values, elementwise.
+    Clamps to the last day of short months, like relativedelta.
+    """
+    mes_inicio = inicio.astype("datetime64[M]")
+    dia = (inicio - mes_inicio.astype("datetime64[D]")).astype(np.int64) + 1
+    destino = mes_inicio + meses
+    primer_dia = destino.astype("datetime64[D]")
+    dias_mes = ((destino + 1).astype("datetime64[D]") - primer_dia).astype(np.int64)
+    return primer_dia + (np.minimum(dia, dias_mes) - 1)
+
+
+def fechas_vencimiento(base: date, frecuencia: str, n: int) -> np.ndarray:
+    """
+    Due dates for periods 1..n as datetime64[D].
+    MENSUAL clamps to the last day of short months, like relativedelta.
+    """
+    k = np.arange(1, n + 1)
+    inicio = np.datetime64(base, "D")
+    if frecuencia in _DIAS_FRECUENCIA:
+        return inicio + k * _DIAS_FRECUENCIA[frecuencia]
+    elif frecuencia == "MENSUAL":
+        return _sumar_meses(inicio, k)
+    raise ValueError(f"Frecuencia no reconocida: {frecuencia}")
+
+
+def tabla_frances(monto: int, i: float, n: int,
+                  fecha_inicio: date, frecuencia: str) -> TablaColumnas:
+    """French (constant payment) amortization, columnar."""
+    cuota = cuota_frances(monto, i, n)
+
+    intereses = [0] * n
+    capitales = [0] * n
+    saldos    = [0] * n
+    saldo = monto
+    for k in range(n - 1):
+        interes = redondear(saldo * i)
+        capital = cuota - interes
+        saldo  -= capital
+        intereses[k] = interes
+        capitales[k] = capital
+        saldos[k]    = max(saldo, 0)
+
+    # last: the balance left, exactly
+    intereses[-1] = interes = redondear(saldo * i)
+    capitales[-1] = saldo
+
+    cuotas = np.full(n, cuota, dtype=np.int64)
+    cuotas[-1] = saldo + interes
+
+    return TablaColumnas(
+        numero_cuota=np.arange(1, n + 1),
+        fecha_vencimiento=fechas_vencimiento(fecha_inicio, frecuencia, n),
+        cuota_total=cuotas,
+        capital=np.array(capitales, dtype=np.int64),
+        intereses=np.array(intereses, dtype=np.int64),
+        saldo_restante=np.array(saldos, dtype=np.int64),
+    )
+
+
+def tabla_solo_interes(monto: int, i: float, n: int,
+                       fecha_inicio: date, frecuencia: str) -> TablaColumnas:
+    """Interest-only loan, columnar: interest each period, principal on last."""
+    interes = redondear(monto * i)
+
+    cuotas = np.full(n, interes, dtype=np.int64)
+    cuotas[-1] = monto + interes
+    capital = np.zeros(n, dtype=np.int64)
+    capital[-1] = monto
+    saldos = np.full(n, monto, dtype=np.int64)
+    saldos[-1] = 0
+
+    return TablaColumnas(
+        numero_cuota=np.arange(1, n + 1),
+        fecha_vencimiento=fechas_vencimiento(fecha_inicio, frecuencia, n),
+        cuota_total=cuotas,
+        capital=capital,
+        intereses=np.full(n, interes, dtype=np.int64),
+        saldo_restante=saldos,
+    )
+
+
+# ─────────────────────────────────────────────────────────────────
+# Batch pricing
+# ─────────────────────────────────────────────────────────────────
+
+def _redondear(x: np.ndarray) -> np.ndarray:
+    """Elementwise services.dinero.redondear(): nearest centavo as int64.
+    Same float operations as the scalar version, so the results match."""
+    return (np.sign(x) * np.floor(np.abs(x) + 0.5)).astype(np.int64)
+
+
+def _fecha_final(inicio: np.ndarray, frecuencia: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Due date of period n for every loan (datetime64[D])."""
+    dias = np.zeros(len(n), dtype=np.int64)
+    for frec, d in _DIAS_FRECUENCIA.items():
+        dias[frecuencia == frec] = d
+    mensual = frecuencia == "MENSUAL"
+    desconocidas = set(np.unique(frecuencia[(dias == 0) & ~mensual]).tolist())
+    if desconocidas:
+        raise ValueError(f"Frecuencia no reconocida: {sorted(desconocidas)[0]}")
+
+    fechas = inicio + n * dias
+    if mensual.any():
+        fechas[mensual] = _sumar_meses(inicio[mensual], n[mensual])
+    return fechas
+
+
+def _totales_frances(monto: np.ndarray, i: np.ndarray, n: np.ndarray,
+                     cuota: np.ndarray):
+    """
+    Run the French balance recurrence for all loans at once, one period per
+    step. Loans are sorted by plazo so each step only touches those still
+    running. Returns (total_intereses, cuota_ultima).
+    """
+    orden = np.argsort(-n, kind="stable")
+    n_ord = n[orden]
+    saldo = monto[orden].copy()
+    tasa  = i[orden]
+    cuota_o = cuota[orden]
+    intereses = np.zeros(len(n), dtype=np.int64)
+    cuota_ultima = np.zeros(len(n), dtype=np.int64)
+
+    for k in range(1, int(n_ord[0]) + 1 if len(n_ord) else 1):
+        m = int(np.searchsorted(-n_ord, -k, side="right"))   # loans with n >= k
+        s = saldo[:m]
+        interes = _redondear(s * tasa[:m])
+        ultimo = n_ord[:m] == k
+        capital = np.where(ultimo, s, cuota_o[:m] - interes)
+        saldo[:m] = s - capital
+        intereses[:m] += interes
+        if ultimo.any():
+            cuota_ultima[:m][ultimo] = capital[ultimo] + interes[ultimo]
+
+    total_intereses = np.empty(len(n), dtype=np.int64)
+    total_intereses[orden] = intereses
+    ultima = np.empty(len(n), dtype=np.int64)
+    ultima[orden] = cuota_ultima
+    return total_intereses, ultima
+
+
+def _calcular_bloque(columnas: tuple) -> dict:
+    """Price one chunk of loans. Top-level so a process pool can pickle it."""
+    monto, tasa, tipo_tasa, plazo, frecuencia, tipo_amort, inicio, incluir_tabla = columnas
+
+    total = len(monto)
+    # Rates and payments stay scalar: pow() must match calcular_prestamo bit for bit
+    i = np.array([
+        convertir_tasa(t / 100.0, tt, f)
+        for t, tt, f in zip(tasa.tolist(), tipo_tasa.tolist(), frecuencia.tolist())
+    ]) if total else np.zeros(0)
+
+    frances = tipo_amort == "FRANCES"
+    solo    = tipo_amort == "SOLO_INTERES"
+    if not (frances | solo).all():
+        otro = tipo_amort[~(frances | solo)][0]
+        raise ValueError(f"Tipo de amortización no soportado: {otro}")
+
+    cuota_base      = np.empty(total, dtype=np.int64)
+    total_intereses = np.empty(total, dtype=np.int64)
+
+    if frances.any():
+        cuota = np.array([
+            cuota_frances(m, r, n)
+            for m, r, n in zip(monto[frances].tolist(), i[frances].tolist(),
+                               plazo[frances].tolist())
+        ], dtype=np.int64)
+        ti, ultima = _totales_frances(monto[frances], i[frances], plazo[frances], cuota)
+        total_intereses[frances] = ti
+        cuota_base[frances] = np.where(plazo[frances] == 1, ultima, cuota)
+
+    if solo.any():
+        interes = _redondear(monto[solo] * i[solo])
+        total_intereses[solo] = interes * plazo[solo]
+        cuota_base[solo] = np.where(plazo[solo] == 1, monto[solo] + interes, interes)
+
+    resultado = {
+        "cuota_base":        cuota_base,
+        "total_intereses":   total_intereses,
+        "total_a_pagar":     monto + total_intereses,
+        "fecha_vencimiento": _fecha_final(inicio, frecuencia, plazo),
+        "tasa_periodo":      i,
+    }
+    if incluir_tabla:
+        resultado["tabla"] = [
+            (tabla_frances if ta == "FRANCES" else tabla_solo_interes)(
+                m, r, n, f.astype(object), fr)
+            for m, r, n, f, fr, ta in zip(monto.tolist(), i.tolist(), plazo.tolist(),
+                                          inicio, frecuencia.tolist(), tipo_amort.tolist())
+        ]
+    return resultado
+
+
+def calcular_prestamos_lote(
+    monto,
+    tasa,
+    tipo_tasa,
+    plazo,
+    frecuencia_pago,
+    tipo_amortizacion,
+    fecha_inicio,
+    incluir_tabla: bool = False,
+    procesos: int = 1,
+    tam_bloque: int = 20_000,
+) -> dict:
+    """
+    Price many loans at once from columnar inputs (sequences of equal length;
+    fecha_inicio accepts date objects or YYYY-MM-DD strings).
+
+    monto is in centavos. Returns a dict of per-loan columns with the same
+    keys and values as calcular_prestamo():
+        cuota_base, total_intereses, total_a_pagar – int64 arrays (centavos)
+        fecha_vencimiento                          – datetime64[D] array
+        tasa_periodo                               – float64 array
+        tabla – list[TablaColumnas], only when incluir_tabla=True
+
+    procesos > 1 splits the batch into chunks of tam_bloque loans and prices
+    them in a process pool. Frozen builds must call
+    multiprocessing.freeze_support() in their entry point to use it.
+    """
+    cols = (
+        np.asarray(monto, dtype=np.int64),
+        np.asarray(tasa, dtype=np.float64),
+        np.asarray(tipo_tasa, dtype=object),
+        np.asarray(plazo, dtype=np.int64),
+        np.asarray(frecuencia_pago, dtype=object),
+        np.asarray(tipo_amortizacion, dtype=object),
+        np.asarray(fecha_inicio, dtype="datetime64[D]"),
+    )
+    total = len(cols[0])
+    if any(len(c) != total for c in cols):
+        raise ValueError("Todas las columnas del lote deben tener la misma longitud.")
+    if total and cols[3].min() <= 0:
+        raise ValueError("El plazo debe ser mayor a cero.")
+
+    bloques = [
+        tuple(c[a:a + tam_bloque] for c in cols) + (incluir_tabla,)
+        for a in range(0, total, tam_bloque)
+    ] or [tuple(cols) + (incluir_tabla,)]
+
+    if procesos > 1 and len(bloques) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            partes = list(pool.map(_calcular_bloque, bloques))
+    else:
+        partes = [_calcular_bloque(b) for b in bloques]
+
+    resultado = {
+        clave: np.concatenate([p[clave] for p in partes])
+        for clave in ("cuota_base", "total_intereses", "total_a_pagar",
+                      "fecha_vencimiento", "tasa_periodo")
+    }
+    if incluir_tabla:
+        resultado["tabla"] = [t for p in partes for t in p["tabla"]]
+    return resultado
@@ -0,0 +1,227 @@
+"""
+Scale benchmark suite.
+Generates a synthetic portfolio (services/generador_cartera.py) in a
+throwaway database and times the hot paths against it: loan creation,
+payment posting, cancellation, every models.reporte function, searches
+and the main Flask routes. Results are written as JSON so two commits
+can be compared.
+
+Usage from a shell:
+    python -m services.benchmark [--cuotas N] [--repeticiones R] [--salida bench.json]
+                                 [--comparar anterior.json]
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+# Benchmarks slower than this ratio (p50 new / p50 old) are flagged by comparar()
+UMBRAL_REGRESION = 1.20
+
+
+def medir(fn: Callable, repeticiones: int, preparar: Optional[Callable] = None) -> dict:
+    """
+    Time fn() `repeticiones` times. preparar(), if given, runs untimed
+    before each call and its return value is passed to fn.
+    """
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        arg = preparar() if preparar else None
+        t0 = time.perf_counter()
+        if preparar:
+            fn(arg)
+        else:
+            fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    p95 = tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))]
+    return {
+        "n":        len(tiempos),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "p50_ms":   round(statistics.median(tiempos), 3),
+        "p95_ms":   round(p95, 3),
+        "min_ms":   round(tiempos[0], 3),
+        "max_ms":   round(tiempos[-1], 3),
+    }
+
+
+def ejecutar_benchmarks(cuotas: int = 10_000, repeticiones: int = 20,
+                        semilla: int = 2024, directorio: Optional[str] = None) -> dict:
+    """Build a portfolio of `cuotas` installments and run every benchmark on it."""
+    import database.connection as connection
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+    from services.generador_cartera import generar_cartera
+
+    directorio = directorio or tempfile.mkdtemp(prefix="agp-bench-")
+    ruta_anterior = connection.DB_PATH
+    connection.close_connection()
+    connection.DB_PATH = os.path.join(directorio, "bench.db")
+    try:
+        crear_tablas()
+        insertar_defaults()
+        hoy = date.today()
+        cartera = generar_cartera(cuotas, semilla, hoy=hoy)
+        resultados = _casos(repeticiones, hoy)
+    finally:
+        connection.close_connection()
+        connection.DB_PATH = ruta_anterior
+
+    return {
+        "fecha":        datetime.now().isoformat(timespec="seconds"),
+        "commit":       _commit(),
+        "python":       platform.python_version(),
+        "sqlite":       sqlite3.sqlite_version,
+        "cuotas":       cuotas,
+        "semilla":      semilla,
+        "repeticiones": repeticiones,
+        "cartera":      cartera,
+        "resultados":   resultados,
+    }
+
+
+def _casos(rep: int, hoy: date) -> Dict[str, dict]:
+    from database.connection import get_connection
+    from controllers.caja_controller import abrir
+    from controllers.pago_controller import (
+        calcular_pago_cuota_normal, calcular_cancelacion,
+        cobrar_cuota_normal, cobrar_cancelacion_total,
+    )
+    from controllers.prestamo_controller import crear
+    from models import reporte
+    from models.cliente import buscar_clientes
+    from models.prestamo import buscar_prestamos, obtener_proxima_cuota
+
+    conn = get_connection()
+    abrir(5_000)
+    r: Dict[str, dict] = {}
+
+    activos = [row[0] for row in conn.execute(
+        """SELECT id FROM prestamos WHERE estado IN ('ACTIVO', 'VENCIDO')
+           ORDER BY id LIMIT ?""", (rep * 2 + 2,))]
+    # each payment/cancellation run consumes a loan of its own
+    rep_pago = max(1, min(rep, (len(activos) - 1) // 2))
+    cliente = conn.execute("SELECT id, cedula, apellidos FROM clientes ORDER BY id LIMIT 1").fetchone()
+    numero = conn.execute("SELECT numero_prestamo FROM prestamos ORDER BY id LIMIT 1").fetchone()[0]
+    dia_cargado = conn.execute(
+        "SELECT fecha FROM cajas ORDER BY total_cobrado DESC LIMIT 1"
+    ).fetchone()
+    dia_cargado = dia_cargado[0] if dia_cargado else hoy.isoformat()
+
+    # ── Writes ────────────────────────────────────────────────────────
+    r["crear_prestamo"] = medir(lambda: crear(cliente["id"], {
+        "monto": 25_000, "tasa": 5.0, "tipo_tasa": "MENSUAL", "plazo": 12,
+        "frecuencia_pago": "SEMANAL", "tipo_amortizacion": "FRANCES",
+        "fecha_inicio": hoy.isoformat(),
+    }), rep)
+
+    pendientes = iter(activos[:rep_pago])
+    def _siguiente_cuota():
+        pid = next(pendientes)
+        return pid, obtener_proxima_cuota(pid)["id"]
+    r["calcular_pago_cuota_normal"] = medir(
+        lambda: calcular_pago_cuota_normal(activos[0]), rep)
+    r["cobrar_cuota_normal"] = medir(
+        lambda a: cobrar_cuota_normal(prestamo_id=a[0], cuota_id=a[1]), rep_pago,
+        _siguiente_cuota)
+
+    a_cancelar = iter(activos[rep_pago:rep_pago * 2])
+    r["calcular_cancelacion"] = medir(lambda: calcular_cancelacion(activos[-1]), rep)
+    r["cobrar_cancelacion_total"] = medir(
+        lambda pid: cobrar_cancelacion_total(pid), rep_pago, lambda: next(a_cancelar))
+
+    # ── Reports ───────────────────────────────────────────────────────
+    r["reporte_caja_dia"] = medir(lambda: reporte.reporte_caja_dia(dia_cargado), rep)
+    r["reporte_mora"] = medir(reporte.reporte_mora, rep)
+    r["reporte_proyeccion"] = medir(lambda: reporte.reporte_proyeccion(30), rep)
+    r["resumen_dashboard"] = medir(reporte.resumen_dashboard, rep)
+
+    # ── Searches ──────────────────────────────────────────────────────
+    r["buscar_clientes_nombre"] = medir(lambda: buscar_clientes(cliente["apellidos"][:4]), rep)
+    r["buscar_clientes_cedula"] = medir(lambda: buscar_clientes(cliente["cedula"][:7]), rep)
+    r["buscar_prestamos_numero"] = medir(lambda: buscar_prestamos(numero), rep)
+
+    # ── Flask routes ──────────────────────────────────────────────────
+    from app_web import app
+    cliente_web = app.test_client()
+    rutas = {
+        "web_dashboard":        "/",
+        "web_clientes":         "/clientes",
+        "web_prestamos":        "/prestamos",
+        "web_prestamo_detalle": f"/prestamos/{activos[0]}",
+        "web_cliente_perfil":   f"/clientes/{cliente['id']}",
+        "web_caja_buscar":      f"/caja/buscar?q={cliente['apellidos'][:4]}",
+        "web_reportes":         "/reportes",
+    }
+    for nombre, url in rutas.items():
+        r[nombre] = medir(lambda url=url: _get(cliente_web, url), rep)
+    return r
+
+
+def _get(cliente_web, url: str):
+    respuesta = cliente_web.get(url)
+    if respuesta.status_code >= 400:
+        raise RuntimeError(f"GET {url} -> {respuesta.status_code}")
+    return respuesta
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def comparar(actual: dict, anterior: dict) -> List[dict]:
+    """Per-benchmark p50 ratio (actual / anterior); regresion=True above UMBRAL_REGRESION."""
+    filas = []
+    for nombre, nuevo in actual["resultados"].items():
+        viejo = anterior.get("resultados", {}).get(nombre)
+        if not viejo or not viejo["p50_ms"]:
+            continue
+        ratio = nuevo["p50_ms"] / viejo["p50_ms"]
+        filas.append({"nombre": nombre, "anterior_ms": viejo["p50_ms"],
+                      "actual_ms": nuevo["p50_ms"], "ratio": round(ratio, 3),
+                      "regresion": ratio > UMBRAL_REGRESION})
+    return filas
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    ap = argparse.ArgumentParser(description="Benchmarks de AGP sobre una cartera sintética.")
+    ap.add_argument("--cuotas", type=int, default=10_000)
+    ap.add_argument("--repeticiones", type=int, default=20)
+    ap.add_argument("--semilla", type=int, default=2024)
+    ap.add_argument("--salida", default="benchmark.json")
+    ap.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = ap.parse_args()
+
+    informe = ejecutar_benchmarks(args.cuotas, args.repeticiones, args.semilla)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    for nombre, m in informe["resultados"].items():
+        print(f"{nombre:28s} p50={m['p50_ms']:9.3f} ms  p95={m['p95_ms']:9.3f} ms")
+    print(f"→ {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            filas = comparar(informe, json.load(f))
+        for fila in filas:
+            marca = "  REGRESIÓN" if fila["regresion"] else ""
+            print(f"{fila['nombre']:28s} {fila['anterior_ms']:9.3f} → {fila['actual_ms']:9.3f} ms"
+                  f"  x{fila['ratio']:.2f}{marca}")
+        sys.exit(1 if any(f["regresion"] for f in filas) else 0)
@@ -0,0 +1,135 @@
+"""
+Background receipt rendering.
+
+Posting a payment only enqueues its receipt: pago_controller hands the
+new payments to encolar_pagos() and returns to the cashier at once. A
+small thread pool renders them with services.pdf_generator, loading the
+data of each group of payments with a single query.
+
+Receipts are deduplicated by numero_recibo: one already on disk (they
+are written atomically) or already queued is not rendered again, so
+asking for a receipt twice, or reprinting after a restart, is cheap.
+
+The queue is started by the application entry points (main.py,
+main_web.py). When it is not running, encolar_pagos() is a no-op and
+recibo() renders synchronously.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from models.pago import datos_recibos
+from services import pdf_generator
+
+log = logging.getLogger("agp.recibos")
+
+
+class ColaRecibos:
+
+    def __init__(self, hilos: int = 2):
+        self._pool = ThreadPoolExecutor(hilos, thread_name_prefix="recibos")
+        self._lock = threading.Lock()
+        self._pendientes: Dict[str, Future] = {}
+        self.generados = 0
+        self.omitidos = 0
+
+    def encolar(self, pagos: Iterable[dict]) -> List[Future]:
+        """
+        Queue the receipts of pagos (dicts with id and numero_recibo).
+        Returns one Future per payment resolving to the PDF path.
+        """
+        # Read every key first: a malformed payment must not leave futures
+        # registered in _pendientes that nothing will ever resolve.
+        recibos = [(pago["id"], pago["numero_recibo"]) for pago in pagos]
+        futuros, nuevos = [], []
+        with self._lock:
+            for pago_id, numero in recibos:
+                futuro = self._pendientes.get(numero)
+                if futuro is None:
+                    futuro = Future()
+                    ruta = pdf_generator.ruta_recibo(numero)
+                    if os.path.exists(ruta):
+                        futuro.set_result(ruta)
+                        self.omitidos += 1
+                    else:
+                        self._pendientes[numero] = futuro
+                        nuevos.append((pago_id, numero, futuro))
+                futuros.append(futuro)
+        if nuevos:
+            try:
+                self._pool.submit(self._renderizar, nuevos)
+            except RuntimeError as exc:         # pool already shut down
+                for _, numero, futuro in nuevos:
+                    self._terminar(numero, futuro, error=exc)
+        return futuros
+
+    def _renderizar(self, lote: list):
+        try:
+            datos = {d["id"]: d for d in datos_recibos([pid for pid, _, _ in lote])}
+        except Exception as exc:
+            log.exception("No se pudieron leer los datos de %d recibos", len(lote))
+            for _, numero, futuro in lote:
+                self._terminar(numero, futuro, error=exc)
+            return
+        for pago_id, numero, futuro in lote:
+            try:
+                if pago_id not in datos:
+                    raise ValueError(f"Pago {pago_id} no encontrado.")
+                ruta = pdf_generator.escribir_recibo(datos[pago_id])
+            except Exception as exc:
+                log.warning("Recibo %s: %s", numero, exc)
+                self._terminar(numero, futuro, error=exc)
+            else:
+                self.generados += 1
+                self._terminar(numero, futuro, ruta)
+
+    def _terminar(self, numero: str, futuro: Future, ruta: str = None, error: Exception = None):
+        with self._lock:
+            self._pendientes.pop(numero, None)
+        if error is not None:
+            futuro.set_exception(error)
+        else:
+            futuro.set_result(ruta)
+
+    def esperar(self):
+        """Block until everything queued so far is rendered."""
+        with self._lock:
+            futuros = list(self._pendientes.values())
+        for futuro in futuros:
+            futuro.exception()
+
+    def detener(self):
+        self._pool.shutdown(wait=True)
+
+
+_cola: Optional[ColaRecibos] = None
+
+
+def iniciar(hilos: int = 2) -> ColaRecibos:
+    global _cola
+    if _cola is None:
+        _cola = ColaRecibos(hilos)
+    return _cola
+
+
+def detener():
+    global _cola
+    if _cola is not None:
+        _cola.detener()
+        _cola = None
+
+
+def encolar_pagos(pagos: Iterable[dict]) -> List[Future]:
+    """Payment event hook: queue receipts if the queue is running."""
+    return _cola.encolar(pagos) if _cola is not None else []
+
+
+def recibo(pago: dict, timeout: float = 30) -> str:
+    """Path of a payment's receipt, waiting for the queue (or rendering now)."""
+    if _cola is not None:
+        return _cola.encolar([pago])[0].result(timeout)
+    ruta = pdf_generator.ruta_recibo(pago["numero_recibo"])
+    return ruta if os.path.exists(ruta) else pdf_generator.generar_recibo(pago["id"])
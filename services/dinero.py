@@ -0,0 +1,75 @@
+"""
+Money representation.
+
+Amounts are stored and computed as integer centavos: every money column is
+INTEGER (schema step 5), the calculators (services/amortizacion.py,
+services/mora_calculator.py) take and return centavos, and the posting path
+(models/pago.py, models/prestamo.crear_prestamo) writes them unchanged. Sums
+are exact integer sums and there is no per-operation re-rounding: an amount
+is rounded once, where a rate multiplies it, with redondear().
+
+Pesos (float) only exist at the edges: what the user types is converted
+with centavos(), and model read functions hand their rows to the UI,
+reports and API through a_pesos().
+"""
+
+import math
+import sqlite3
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional
+
+CENTAVOS = 100
+
+# Row keys holding an amount, converted by a_pesos(). Table columns plus the
+# aliases of computed amounts (reports, mora, cancellation quotes).
+MONEDA = frozenset({
+    # prestamos
+    "monto_principal", "cuota_base", "total_intereses", "total_a_pagar", "saldo_capital",
+    # cuotas
+    "cuota_total", "capital", "intereses", "saldo_restante",
+    "capital_pagado", "intereses_pagados", "mora_acumulada", "mora_pagada",
+    # cajas / cajas_dia
+    "monto_apertura", "monto_cierre", "total_cobrado", "total_desembolsado",
+    # pagos
+    "monto_capital", "monto_intereses", "monto_mora", "monto_total",
+    # resumen_cartera / resumen_diario / antiguedad_cartera
+    "cartera_total", "cobrado", "monto_vencido",
+    # computed
+    "pendiente", "total_a_cobrar", "intereses_pendientes", "mora_total", "total",
+    "monto_pendiente", "monto_esperado", "capital_esperado", "intereses_esperados",
+    "total_capital", "total_mora", "monto_mora_calculado",
+})
+
+
+def redondear(x: float) -> int:
+    """Nearest centavo, halves away from zero — the same as SQLite's ROUND(x)."""
+    return int(math.floor(x + 0.5)) if x >= 0 else -int(math.floor(-x + 0.5))
+
+
+def centavos(monto) -> int:
+    """Pesos as typed or stored by older code (float, int, str, Decimal) → centavos.
+    Rounds half up on the decimal value, so 0.285 is 29 centavos, not 28."""
+    try:
+        valor = Decimal(str(monto).strip() or "0")
+    except InvalidOperation:
+        raise ValueError(f"Monto inválido: {monto!r}")
+    return int((valor * CENTAVOS).to_integral_value(ROUND_HALF_UP))
+
+
+def pesos(monto: Optional[int]) -> Optional[float]:
+    """Centavos → pesos for display; None stays None."""
+    return None if monto is None else monto / CENTAVOS
+
+
+def a_pesos(fila) -> dict:
+    """dict(fila) with every amount (see MONEDA) in pesos."""
+    fila = dict(fila)
+    for clave in MONEDA.intersection(fila):
+        if fila[clave] is not None:
+            fila[clave] = fila[clave] / CENTAVOS
+    return fila
+
+
+def fila_en_pesos(cursor: sqlite3.Cursor, fila: tuple) -> dict:
+    """Cursor row_factory for streamed reads: rows as a_pesos() dicts."""
+    return a_pesos(sqlite3.Row(cursor, fila))
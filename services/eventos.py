@@ -0,0 +1,166 @@
+"""
+In-process event dispatcher over the outbox table.
+
+Every payment, void, loan and client change writes a row to `eventos` in
+its own transaction (triggers, database/schema.py step 6), so nothing on
+the posting path does extra work. This module tails that table with a
+cursor and hands each event, in commit order, to the subscribers:
+
+    from services import eventos
+    eventos.suscribir(mi_cache.invalidar, tipos={"PAGO_REGISTRADO", "PAGO_ANULADO"})
+
+A subscriber is fn(evento) with evento = {id, tipo, entidad_id, datos,
+fecha}, datos in pesos. Events from other processes on the same database
+(desktop and web) arrive too. Delivery is at most once per process:
+the cursor lives in memory and starts at the newest event, and a
+subscriber that raises is logged and skipped, not retried.
+
+The background thread only reads the table when database.connection's
+data version moved (an os.stat and a PRAGMA data_version), so an idle
+system never reads the outbox. It is started by the application entry
+points (main.py, main_web.py); despachar() runs one pass synchronously
+(tests, scripts).
+
+Usage from a shell, to watch events as JSON lines:
+    python -m services.eventos [--desde ID]
+"""
+
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from database.connection import close_connection, version_datos
+from models.evento import eventos_desde, purgar_eventos, ultimo_evento
+
+log = logging.getLogger("agp.eventos")
+
+INTERVALO = 1.0         # seconds between data-version checks
+RETENCION_DIAS = 30     # older events are purged when the dispatcher starts
+
+
+class Despachador:
+
+    def __init__(self, desde: Optional[int] = None, intervalo: float = INTERVALO):
+        self.cursor = ultimo_evento() if desde is None else desde
+        self.intervalo = intervalo
+        self.entregados = 0
+        self.fallidos = 0
+        self._suscriptores: List[Tuple[Callable[[dict], None], Optional[frozenset]]] = []
+        self._lock = threading.RLock()      # one pass at a time; guards the cursor
+        self._parar = threading.Event()
+        self._version = None
+        self._hilo: Optional[threading.Thread] = None
+
+    def suscribir(self, fn: Callable[[dict], None], tipos: Optional[Iterable[str]] = None):
+        """Call fn for every new event, or only for the given tipos."""
+        with self._lock:
+            self._suscriptores.append((fn, frozenset(tipos) if tipos else None))
+
+    def despachar(self) -> int:
+        """Deliver every event after the cursor. Returns how many were read."""
+        with self._lock:
+            leidos = 0
+            while True:
+                lote = eventos_desde(self.cursor)
+                for evento in lote:
+                    self._entregar(evento)
+                    self.cursor = evento["id"]
+                leidos += len(lote)
+                if not lote:
+                    return leidos
+
+    def _entregar(self, evento: dict):
+        for fn, tipos in self._suscriptores:
+            if tipos is not None and evento["tipo"] not in tipos:
+                continue
+            try:
+                fn(evento)
+            except Exception:
+                self.fallidos += 1
+                log.exception("Suscriptor %r falló con el evento %s", fn, evento["id"])
+            else:
+                self.entregados += 1
+
+    def iniciar(self) -> threading.Thread:
+        self._hilo = threading.Thread(target=self._bucle, name="eventos", daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def _bucle(self):
+        try:
+            while not self._parar.wait(self.intervalo):
+                version = version_datos()[0]
+                if version == self._version or not self._suscriptores:
+                    continue
+                self._version = version
+                try:
+                    self.despachar()
+                except Exception:
+                    log.exception("No se pudieron leer los eventos")
+        finally:
+            close_connection()
+
+    def detener(self):
+        """Stop the thread after delivering what is already committed."""
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        if self._suscriptores:
+            self.despachar()
+
+
+_despachador: Optional[Despachador] = None
+
+
+def iniciar(intervalo: float = INTERVALO) -> Despachador:
+    global _despachador
+    if _despachador is None:
+        try:
+            purgar_eventos(RETENCION_DIAS)
+        except Exception:
+            log.exception("No se pudieron purgar los eventos antiguos")
+        _despachador = Despachador(intervalo=intervalo)
+        _despachador.iniciar()
+    return _despachador
+
+
+def detener():
+    global _despachador
+    if _despachador is not None:
+        _despachador.detener()
+        _despachador = None
+
+
+def suscribir(fn: Callable[[dict], None], tipos: Optional[Iterable[str]] = None):
+    """Subscribe fn to the running dispatcher (no-op when it is not running)."""
+    if _despachador is not None:
+        _despachador.suscribir(fn, tipos)
+
+
+def despachar() -> int:
+    """One synchronous pass of the running dispatcher."""
+    return _despachador.despachar() if _despachador is not None else 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import sys
+    import time
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.schema import crear_tablas
+
+    ap = argparse.ArgumentParser(description="Muestra los eventos a medida que ocurren.")
+    ap.add_argument("--desde", type=int, help="id de evento (por defecto, solo los nuevos)")
+    args = ap.parse_args()
+
+    crear_tablas()
+    despachador = Despachador(desde=args.desde)
+    despachador.suscribir(lambda e: print(json.dumps(e, ensure_ascii=False), flush=True))
+    try:
+        while True:
+            despachador.despachar()
+            time.sleep(INTERVALO)
+    except KeyboardInterrupt:
+        pass
@@ -1,52 +1,154 @@
-from typing import List
-"""Excel export service using openpyxl."""
+"""
+Excel export service using openpyxl in write-only (streaming) mode.
+
+Rows are written as they are read, so an export takes rows straight from
+a SQLite cursor (sqlite3.Row) as well as from lists of dicts, and memory
+stays flat however long the report is. Cell formatting uses named styles
+registered once per workbook; each cell only carries a reference to one.
+
+Write-only sheets emit their column definitions before the first row, so
+widths are measured in the same pass over the header and the first
+_MUESTRA rows, which are held back until the widths are fixed. Totals are
+accumulated in that same pass.
+"""
 
 import os
-from datetime import datetime
+from copy import copy
+from datetime import date, datetime
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
 from config import REPORTS_DIR
 from database.seed import get_config
 
 
 _AZUL   = "1A5276"
 _AZUL_L = "D6EAF8"
-_BOLD   = Font(bold=True)
-_HEADER_FONT   = Font(bold=True, color="FFFFFF", size=11)
-_HEADER_FILL   = PatternFill("solid", fgColor=_AZUL)
-_ALT_FILL      = PatternFill("solid", fgColor=_AZUL_L)
-_CENTER        = Alignment(horizontal="center", vertical="center")
-_THIN          = Side(style="thin")
-_BORDER        = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
-
-
-def _encabezado(ws, titulo: str, columnas: List[str]):
-    moneda = get_config("moneda_simbolo") or "RD$"
-    agencia = get_config("nombre_agencia")
-
-    ws.append([agencia])
-    ws.append([titulo])
-    ws.append([f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}  |  Moneda: {moneda}"])
-    ws.append([])
-
-    ws["A1"].font = Font(bold=True, size=13)
-    ws["A2"].font = Font(bold=True, size=11)
-    ws["A3"].font = Font(italic=True, size=9)
-
-    ws.append(columnas)
-    header_row = ws.max_row
-    for cell in ws[header_row]:
-        cell.font      = _HEADER_FONT
-        cell.fill      = _HEADER_FILL
-        cell.alignment = _CENTER
-        cell.border    = _BORDER
-    return header_row + 1  # next data row
-
-
-def _auto_width(ws):
-    for col in ws.columns:
-        max_len = max((len(str(cell.value or "")) for cell in col), default=10)
-        ws.column_dimensions[col[0].column_letter].width = min(max_len + 4, 40)
+_THIN   = Side(style="thin")
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+
+_MUESTRA = 500      # rows measured for column widths
+_ANCHO_MAX = 40
+
+# (title, key in the row, summed into the totals row)
+Columna = Tuple[str, Optional[str], bool]
+
+
+def _estilos() -> List[NamedStyle]:
+    """Named styles shared by every sheet (new objects per workbook)."""
+    return [
+        NamedStyle("agp_titulo", font=Font(bold=True, size=13)),
+        NamedStyle("agp_subtitulo", font=Font(bold=True, size=11)),
+        NamedStyle("agp_nota", font=Font(italic=True, size=9)),
+        NamedStyle("agp_encabezado", font=Font(bold=True, color="FFFFFF", size=11),
+                   fill=PatternFill("solid", fgColor=_AZUL),
+                   alignment=Alignment(horizontal="center", vertical="center"),
+                   border=_BORDER),
+        NamedStyle("agp_celda", border=_BORDER),
+        NamedStyle("agp_celda_alt", border=_BORDER,
+                   fill=PatternFill("solid", fgColor=_AZUL_L)),
+        NamedStyle("agp_total", font=Font(bold=True), border=_BORDER),
+    ]
+
+
+def _libro() -> Workbook:
+    wb = Workbook(write_only=True)
+    for estilo in _estilos():
+        wb.add_named_style(estilo)
+    return wb
+
+
+class _Hoja:
+    """
+    A write-only sheet: title block, header, zebra-striped rows and an
+    optional totals row. Rows are mappings; the columns pick their values.
+    """
+
+    def __init__(self, wb: Workbook, nombre: str, titulo: str, columnas: Sequence[Columna]):
+        self.ws = wb.create_sheet(nombre)
+        self.titulo = titulo
+        self.columnas = columnas
+        self.anchos = [len(t) for t, _, _ in columnas]
+        self.sumas = [0.0] * len(columnas)
+        self.filas = 0
+        self._retenidas: Optional[list] = []
+        self._plantillas = {}
+
+    def _estilo(self, nombre: str):
+        # Style the first cell by name, then copy its style array: same
+        # result as assigning the name per cell, without the lookup.
+        if nombre not in self._plantillas:
+            celda = WriteOnlyCell(self.ws)
+            celda.style = nombre
+            self._plantillas[nombre] = celda._style
+        return self._plantillas[nombre]
+
+    def _celdas(self, valores: Iterable, estilo: str) -> list:
+        plantilla = self._estilo(estilo)
+        celdas = []
+        for valor in valores:
+            celda = WriteOnlyCell(self.ws, valor)
+            celda._style = copy(plantilla)
+            celdas.append(celda)
+        return celdas
+
+    def _escribir(self, valores: list, estilo: str):
+        if self._retenidas is not None:
+            for i, v in enumerate(valores):
+                if v is not None and len(str(v)) > self.anchos[i]:
+                    self.anchos[i] = len(str(v))
+            self._retenidas.append((valores, estilo))
+            if len(self._retenidas) >= _MUESTRA:
+                self._volcar()
+        else:
+            self.ws.append(self._celdas(valores, estilo))
+
+    def _volcar(self):
+        """Fix the column widths, then write the title block and held rows."""
+        for i, ancho in enumerate(self.anchos, 1):
+            self.ws.column_dimensions[get_column_letter(i)].width = min(ancho + 4, _ANCHO_MAX)
+
+        moneda = get_config("moneda_simbolo") or "RD$"
+        self.ws.append(self._celdas([get_config("nombre_agencia")], "agp_titulo"))
+        self.ws.append(self._celdas([self.titulo], "agp_subtitulo"))
+        self.ws.append(self._celdas(
+            [f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}  |  Moneda: {moneda}"],
+            "agp_nota"))
+        self.ws.append([])
+        self.ws.append(self._celdas([t for t, _, _ in self.columnas], "agp_encabezado"))
+
+        retenidas, self._retenidas = self._retenidas, None
+        for valores, estilo in retenidas:
+            self.ws.append(self._celdas(valores, estilo))
+
+    def fila(self, fila: Mapping):
+        valores = []
+        for i, (_, clave, suma) in enumerate(self.columnas):
+            valor = fila[clave] if clave else None
+            if suma and valor:
+                self.sumas[i] += valor
+            valores.append(valor)
+        self._escribir(valores, "agp_celda_alt" if self.filas % 2 else "agp_celda")
+        self.filas += 1
+
+    def filas_de(self, filas: Iterable[Mapping]):
+        for fila in filas:
+            self.fila(fila)
+
+    def total(self, etiquetas: Optional[dict] = None):
+        """Totals row: "TOTAL" in the first column, sums under the summed ones."""
+        etiquetas = etiquetas or {}
+        valores = [round(s, 2) if suma else etiquetas.get(i, "")
+                   for i, (s, (_, _, suma)) in enumerate(zip(self.sumas, self.columnas))]
+        valores[0] = "TOTAL"
+        self._escribir(valores, "agp_total")
+
+    def cerrar(self):
+        if self._retenidas is not None:
+            self._volcar()
 
 
 def _guardar(wb: Workbook, nombre: str) -> str:
@@ -58,148 +160,106 @@ def _guardar(wb: Workbook, nombre: str) -> str:
 
 # ──────────────────────────────────────────────────────────────────
 # Export functions
+# Each takes an iterable of rows: a SQLite cursor or a list of dicts.
 # ──────────────────────────────────────────────────────────────────
 
-def exportar_caja(reporte: dict) -> str:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Caja Diaria"
-
-    fecha = reporte.get("fecha", "")
-    columnas = ["Recibo", "Hora", "Cliente", "Préstamo", "Cuota#",
-                "Capital", "Intereses", "Mora", "Total", "Método", "Referencia"]
-    start = _encabezado(ws, f"Reporte de Caja — {fecha}", columnas)
-
-    for i, pago in enumerate(reporte.get("pagos", [])):
-        fill = _ALT_FILL if i % 2 else None
-        row = [
-            pago.get("numero_recibo", ""),
-            pago.get("hora_pago", ""),
-            pago.get("cliente_nombre", ""),
-            pago.get("numero_prestamo", ""),
-            "",
-            pago.get("monto_capital",   0),
-            pago.get("monto_intereses", 0),
-            pago.get("monto_mora",      0),
-            pago.get("monto_total",     0),
-            pago.get("metodo_pago",     ""),
-            pago.get("referencia_pago", ""),
-        ]
-        ws.append(row)
-        if fill:
-            for cell in ws[ws.max_row]:
-                cell.fill = fill
-        for cell in ws[ws.max_row]:
-            cell.border = _BORDER
-
-    # Totals row
-    t = reporte.get("totales", {})
-    ws.append([
-        "TOTAL", "", "", "", str(t.get("num_pagos", 0)),
-        t.get("total_capital", 0), t.get("total_intereses", 0),
-        t.get("total_mora", 0), t.get("total_cobrado", 0), "", "",
+def exportar_caja(fecha: str, pagos: Iterable[Mapping]) -> str:
+    wb = _libro()
+    hoja = _Hoja(wb, "Caja Diaria", f"Reporte de Caja — {fecha}", [
+        ("Recibo", "numero_recibo", False),
+        ("Hora", "hora_pago", False),
+        ("Cliente", "cliente_nombre", False),
+        ("Préstamo", "numero_prestamo", False),
+        ("Cuota#", None, False),
+        ("Capital", "monto_capital", True),
+        ("Intereses", "monto_intereses", True),
+        ("Mora", "monto_mora", True),
+        ("Total", "monto_total", True),
+        ("Método", "metodo_pago", False),
+        ("Referencia", "referencia_pago", False),
     ])
-    for cell in ws[ws.max_row]:
-        cell.font   = _BOLD
-        cell.border = _BORDER
-
-    _auto_width(ws)
+    hoja.filas_de(pagos)
+    hoja.total({4: str(hoja.filas)})
+    hoja.cerrar()
     return _guardar(wb, f"caja_{fecha}.xlsx")
 
 
-def exportar_mora(datos: List[dict]) -> str:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte Mora"
-
-    columnas = ["Préstamo", "Cliente", "Cédula", "Teléfono",
-                "Primera Vencida", "Cuotas Vencidas", "Monto Pendiente", "Saldo Capital"]
-    start = _encabezado(ws, "Reporte de Mora", columnas)
-
-    for i, row in enumerate(datos):
-        fill = _ALT_FILL if i % 2 else None
-        ws.append([
-            row.get("numero_prestamo", ""),
-            row.get("cliente_nombre",  ""),
-            row.get("cedula",          ""),
-            row.get("telefono_principal", ""),
-            row.get("primera_cuota_vencida", ""),
-            row.get("cuotas_vencidas",  0),
-            row.get("monto_pendiente",  0),
-            row.get("saldo_capital",    0),
-        ])
-        if fill:
-            for cell in ws[ws.max_row]:
-                cell.fill = fill
-        for cell in ws[ws.max_row]:
-            cell.border = _BORDER
-
-    _auto_width(ws)
-    from datetime import date
+def exportar_mora(filas: Iterable[Mapping]) -> str:
+    wb = _libro()
+    hoja = _Hoja(wb, "Reporte Mora", "Reporte de Mora", [
+        ("Préstamo", "numero_prestamo", False),
+        ("Cliente", "cliente_nombre", False),
+        ("Cédula", "cedula", False),
+        ("Teléfono", "telefono_principal", False),
+        ("Primera Vencida", "primera_cuota_vencida", False),
+        ("Cuotas Vencidas", "cuotas_vencidas", False),
+        ("Monto Pendiente", "monto_pendiente", False),
+        ("Mora al Día", "mora_total", False),
+        ("Saldo Capital", "saldo_capital", False),
+    ])
+    hoja.filas_de(filas)
+    hoja.cerrar()
     return _guardar(wb, f"mora_{date.today().isoformat()}.xlsx")
 
 
-def exportar_proyeccion(datos: List[dict]) -> str:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Proyección"
-
-    columnas = ["Fecha", "# Cuotas", "Monto Esperado", "Capital Esperado", "Intereses Esperados"]
-    start = _encabezado(ws, "Proyección de Cobros", columnas)
-
-    total_monto = total_cap = total_int = 0.0
-    for i, row in enumerate(datos):
-        fill = _ALT_FILL if i % 2 else None
-        monto = row.get("monto_esperado",      0)
-        cap   = row.get("capital_esperado",    0)
-        inte  = row.get("intereses_esperados", 0)
-        ws.append([
-            row.get("fecha_vencimiento", ""),
-            row.get("num_cuotas", 0),
-            monto, cap, inte,
-        ])
-        total_monto += monto; total_cap += cap; total_int += inte
-        if fill:
-            for cell in ws[ws.max_row]:
-                cell.fill = fill
-        for cell in ws[ws.max_row]:
-            cell.border = _BORDER
-
-    ws.append(["TOTAL", "", total_monto, total_cap, total_int])
-    for cell in ws[ws.max_row]:
-        cell.font = _BOLD; cell.border = _BORDER
-
-    _auto_width(ws)
-    from datetime import date
+def exportar_proyeccion(filas: Iterable[Mapping]) -> str:
+    wb = _libro()
+    hoja = _Hoja(wb, "Proyección", "Proyección de Cobros", [
+        ("Fecha", "fecha_vencimiento", False),
+        ("# Cuotas", "num_cuotas", False),
+        ("Monto Esperado", "monto_esperado", True),
+        ("Capital Esperado", "capital_esperado", True),
+        ("Intereses Esperados", "intereses_esperados", True),
+    ])
+    hoja.filas_de(filas)
+    hoja.total()
+    hoja.cerrar()
     return _guardar(wb, f"proyeccion_{date.today().isoformat()}.xlsx")
 
 
-def exportar_amortizacion(prestamo: dict, cuotas: List[dict]) -> str:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Amortización"
-
-    columnas = ["#", "Fecha Vencimiento", "Cuota Total",
-                "Capital", "Intereses", "Saldo Restante", "Estado"]
-    start = _encabezado(ws, f"Tabla de Amortización — {prestamo.get('numero_prestamo', '')}", columnas)
-
-    for i, c in enumerate(cuotas):
-        fill = _ALT_FILL if i % 2 else None
-        ws.append([
-            c.get("numero_cuota",      ""),
-            c.get("fecha_vencimiento", ""),
-            c.get("cuota_total",       0),
-            c.get("capital",           0),
-            c.get("intereses",         0),
-            c.get("saldo_restante",    0),
-            c.get("estado",            ""),
-        ])
-        if fill:
-            for cell in ws[ws.max_row]:
-                cell.fill = fill
-        for cell in ws[ws.max_row]:
-            cell.border = _BORDER
-
-    _auto_width(ws)
-    num = prestamo.get("numero_prestamo", "prestamo").replace("/", "-")
+def exportar_amortizacion(prestamo: Mapping, cuotas: Iterable[Mapping]) -> str:
+    wb = _libro()
+    hoja = _Hoja(wb, "Amortización",
+                 f"Tabla de Amortización — {prestamo['numero_prestamo']}", [
+        ("#", "numero_cuota", False),
+        ("Fecha Vencimiento", "fecha_vencimiento", False),
+        ("Cuota Total", "cuota_total", False),
+        ("Capital", "capital", False),
+        ("Intereses", "intereses", False),
+        ("Saldo Restante", "saldo_restante", False),
+        ("Estado", "estado", False),
+    ])
+    hoja.filas_de(cuotas)
+    hoja.cerrar()
+    num = (prestamo["numero_prestamo"] or "prestamo").replace("/", "-")
     return _guardar(wb, f"amortizacion_{num}.xlsx")
+
+
+def exportar_antiguedad(informe: Mapping, tendencia: Iterable[Mapping] = ()) -> str:
+    """Aging buckets with PAR30/PAR90, plus the snapshot trend on a second sheet."""
+    wb = _libro()
+    hoja = _Hoja(wb, "Antigüedad", f"Antigüedad de Cartera — {informe['fecha']}", [
+        ("Tramo (días)", "tramo", False),
+        ("Préstamos", "prestamos", True),
+        ("Saldo Capital", "saldo_capital", True),
+        ("Monto Vencido", "monto_vencido", True),
+        ("% Cartera", "pct_cartera", False),
+    ])
+    hoja.filas_de(informe["tramos"])
+    hoja.total()
+    for clave, etiqueta in (("par30", "PAR30 %"), ("par90", "PAR90 %")):
+        hoja.fila({"tramo": etiqueta, "prestamos": None, "saldo_capital": None,
+                   "monto_vencido": None, "pct_cartera": informe[clave]})
+    hoja.cerrar()
+
+    hoja = _Hoja(wb, "Tendencia", "Tendencia (fotos diarias)", [
+        ("Fecha", "fecha", False),
+        ("Préstamos", "prestamos", False),
+        ("Cartera", "cartera_total", False),
+        ("Monto Vencido", "monto_vencido", False),
+        ("PAR30 %", "par30", False),
+        ("PAR90 %", "par90", False),
+    ])
+    hoja.filas_de(tendencia)
+    hoja.cerrar()
+    return _guardar(wb, f"antiguedad_{informe['fecha']}.xlsx")
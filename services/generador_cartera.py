@@ -0,0 +1,252 @@
+"""
+Deterministic synthetic portfolio generator.
+Builds a realistic database through the real write paths
+(models.prestamo.crear_prestamo, models.pago.registrar_pago): clients,
+loans with a configurable payment-frequency mix, historical cash sessions
+with the payments of every cuota due before today, and a share of
+delinquent loans that stop paying. Finishes with a mora accrual so
+VENCIDA/VENCIDO states are what the app would show.
+
+The same (cuotas, semilla, mezcla, tasa_morosidad, hoy) always produces
+the same database, so benchmark runs are comparable across commits.
+
+Usage from a shell:
+    python -m services.generador_cartera DB_PATH [--cuotas N] [--semilla S]
+        [--morosidad 0.15] [--mezcla DIARIO=0.15,SEMANAL=0.35,...] [--hoy YYYY-MM-DD]
+"""
+
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from database.connection import get_connection
+from models.cliente import crear_cliente
+from models.pago import registrar_pago
+from models.prestamo import crear_prestamo
+from services.amortizacion import calcular_prestamo
+from services.dinero import CENTAVOS
+
+MEZCLA_FRECUENCIAS = {"DIARIO": 0.15, "SEMANAL": 0.35, "QUINCENAL": 0.20, "MENSUAL": 0.30}
+
+# (min, max) number of cuotas and days per period for each frequency
+_PLAZOS = {"DIARIO": (20, 60), "SEMANAL": (8, 26), "QUINCENAL": (6, 24), "MENSUAL": (6, 24)}
+_DIAS   = {"DIARIO": 1, "SEMANAL": 7, "QUINCENAL": 15, "MENSUAL": 30}
+
+_NOMBRES = [
+    "Ana", "Juan", "María", "José", "Carmen", "Luis", "Rosa", "Pedro", "Altagracia",
+    "Francisco", "Juana", "Rafael", "Mercedes", "Ramón", "Josefina", "Manuel",
+    "Yolanda", "Miguel", "Margarita", "Carlos", "Teresa", "Julio", "Dulce", "Ángel",
+]
+_APELLIDOS = [
+    "Pérez", "Rodríguez", "Martínez", "García", "Fernández", "Gómez", "Díaz",
+    "Reyes", "Santana", "Núñez", "Castillo", "Jiménez", "Peña", "Rosario",
+    "Mejía", "Guzmán", "Ramírez", "Vásquez", "Batista", "De los Santos",
+]
+_CIUDADES = ["Santo Domingo", "Santiago", "La Vega", "San Cristóbal", "Puerto Plata", "Higüey"]
+
+
+def generar_cartera(
+    cuotas: int = 10_000,
+    semilla: int = 2024,
+    mezcla: Optional[Dict[str, float]] = None,
+    tasa_morosidad: float = 0.15,
+    hoy: Optional[date] = None,
+) -> dict:
+    """
+    Fill the current database (see database.connection.DB_PATH) until at
+    least `cuotas` installments exist. Returns a summary dict.
+    """
+    rng = random.Random(semilla)
+    hoy = hoy or date.today()
+    mezcla = mezcla or MEZCLA_FRECUENCIAS
+    frecuencias = list(mezcla)
+    pesos = [mezcla[f] for f in frecuencias]
+    conn = get_connection()
+    t0 = time.perf_counter()
+
+    primer_pago = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pagos").fetchone()[0]
+    cajas: Dict[str, int] = {}
+    clientes: list = []
+    resumen = {"clientes": 0, "prestamos": 0, "cuotas": 0, "pagos": 0, "morosos": 0}
+
+    while resumen["cuotas"] < cuotas:
+        if not clientes or rng.random() < 0.75:
+            clientes.append(_crear_cliente(rng, len(clientes) + 1))
+            resumen["clientes"] += 1
+        cliente_id = rng.choice(clientes)
+
+        frecuencia = rng.choices(frecuencias, pesos)[0]
+        plazo = rng.randint(*_PLAZOS[frecuencia])
+        plazo = min(plazo, cuotas - resumen["cuotas"]) or 1
+        duracion = plazo * _DIAS[frecuencia]
+        inicio = hoy - timedelta(days=rng.randint(0, int(duracion * 1.3)))
+        monto = rng.randrange(5_000, 150_001, 500) * CENTAVOS
+        tasa = rng.choice([3.0, 4.0, 5.0, 6.0, 8.0, 10.0])
+        amortizacion = "FRANCES" if rng.random() < 0.85 else "SOLO_INTERES"
+
+        resultado = calcular_prestamo(monto, tasa, "MENSUAL", plazo, frecuencia,
+                                      amortizacion, inicio)
+        prestamo_id = crear_prestamo({
+            "cliente_id":        cliente_id,
+            "numero_prestamo":   None,
+            "monto_principal":   monto,
+            "tasa_interes":      tasa,
+            "tipo_tasa":         "MENSUAL",
+            "plazo":             plazo,
+            "frecuencia_pago":   frecuencia,
+            "tipo_amortizacion": amortizacion,
+            "fecha_inicio":      inicio.isoformat(),
+            "fecha_vencimiento": resultado["fecha_vencimiento"].isoformat(),
+            "cuota_base":        resultado["cuota_base"],
+            "total_intereses":   resultado["total_intereses"],
+            "total_a_pagar":     resultado["total_a_pagar"],
+            "saldo_capital":     monto,
+            "fecha_desembolso":  inicio.isoformat(),
+            "notas":             "",
+        }, resultado["tabla"])
+        resumen["prestamos"] += 1
+        resumen["cuotas"] += plazo
+
+        vencidas = [c for c in resultado["tabla"] if c.fecha_vencimiento < hoy]
+        moroso = bool(vencidas) and rng.random() < tasa_morosidad
+        if moroso:
+            resumen["morosos"] += 1
+            vencidas = vencidas[:-rng.randint(1, min(len(vencidas), 6))]
+        if not vencidas:
+            continue
+
+        ids = [r[0] for r in conn.execute(
+            "SELECT id FROM cuotas WHERE prestamo_id = ? ORDER BY numero_cuota",
+            (prestamo_id,),
+        )]
+        for fila, cuota_id in zip(vencidas, ids):
+            atraso = rng.choice((0, 0, 0, 1, 2, 5))
+            fecha_pago = min(fila.fecha_vencimiento + timedelta(days=atraso),
+                             hoy - timedelta(days=1))
+            registrar_pago({
+                "caja_id":         _caja(conn, cajas, fecha_pago.isoformat()),
+                "cuota_id":        cuota_id,
+                "prestamo_id":     prestamo_id,
+                "cliente_id":      cliente_id,
+                "tipo_pago":       "CUOTA_NORMAL",
+                "monto_capital":   fila.capital,
+                "monto_intereses": fila.intereses,
+                "monto_mora":      0,
+                "monto_total":     fila.capital + fila.intereses,
+                "metodo_pago":     "EFECTIVO" if rng.random() < 0.8 else "TRANSFERENCIA",
+                "referencia_pago": "",
+                "notas":           "",
+            })
+            resumen["pagos"] += 1
+
+    _fechar_historia(conn, primer_pago, hoy)
+
+    from services.mora_acumulacion import ejecutar
+    ejecutar(hoy)
+
+    resumen["segundos"] = round(time.perf_counter() - t0, 3)
+    return resumen
+
+
+def _crear_cliente(rng: random.Random, n: int) -> int:
+    return crear_cliente({
+        "cedula":              f"{rng.randint(1, 402):03d}-{n:07d}-{rng.randint(0, 9)}",
+        "tipo_documento":      "Cédula",
+        "nombres":             rng.choice(_NOMBRES),
+        "apellidos":           f"{rng.choice(_APELLIDOS)} {rng.choice(_APELLIDOS)}",
+        "fecha_nacimiento":    None,
+        "telefono_principal":  f"{rng.choice(('809', '829', '849'))}-{rng.randint(200, 999)}-"
+                               f"{rng.randint(0, 9999):04d}",
+        "telefono_secundario": None,
+        "email":               None,
+        "direccion":           None,
+        "barrio":              None,
+        "ciudad":              rng.choice(_CIUDADES),
+        "calificacion":        rng.choice(("NUEVO", "BUENO", "BUENO", "REGULAR")),
+        "ocupacion":           None,
+        "empresa":             None,
+        "ingresos_mensuales":  float(rng.randrange(15_000, 120_001, 1_000)),
+        "tasa_sugerida":       None,
+        "tipo_tasa_sugerida":  None,
+        "notas":               None,
+    })
+
+
+def _caja(conn, cajas: Dict[str, int], fecha: str) -> int:
+    """Historical cash session for fecha, created (closed later) on first use.
+    A session closed by an earlier run is reopened until _fechar_historia."""
+    if fecha not in cajas:
+        row = conn.execute(
+            "SELECT id, estado FROM cajas WHERE fecha = ? AND cajero = 'PRINCIPAL'", (fecha,)
+        ).fetchone()
+        with conn:
+            if row:
+                cajas[fecha] = row[0]
+                if row[1] != "ABIERTA":
+                    conn.execute("UPDATE cajas SET estado = 'ABIERTA' WHERE id = ?", (row[0],))
+            else:
+                cajas[fecha] = conn.execute(
+                    """INSERT INTO cajas (fecha, monto_apertura, hora_apertura)
+                       VALUES (?, 500000, '08:00:00')""",
+                    (fecha,),
+                ).lastrowid
+    return cajas[fecha]
+
+
+def _fechar_historia(conn, primer_pago: int, hoy: date):
+    """
+    registrar_pago stamps payments with the wall clock; move the generated
+    ones to their cash-session date and close those sessions.
+    """
+    with conn:
+        conn.execute(
+            """UPDATE pagos SET fecha_pago = c.fecha,
+                      hora_pago = printf('%02d:%02d:00', 8 + pagos.id % 9, pagos.id % 60)
+               FROM cajas c
+               WHERE c.id = pagos.caja_id AND pagos.id >= ?""",
+            (primer_pago,),
+        )
+        conn.execute(
+            """UPDATE cuotas SET fecha_pago = p.ultima
+               FROM (SELECT cuota_id, MAX(fecha_pago) AS ultima
+                     FROM pagos WHERE id >= ? GROUP BY cuota_id) AS p
+               WHERE cuotas.id = p.cuota_id AND cuotas.estado = 'PAGADA'""",
+            (primer_pago,),
+        )
+        conn.execute(
+            """UPDATE cajas SET estado = 'CERRADA', hora_cierre = '18:00:00',
+                      monto_cierre = monto_apertura + total_cobrado
+               WHERE estado = 'ABIERTA' AND fecha < ?
+                 AND id IN (SELECT DISTINCT caja_id FROM pagos WHERE id >= ?)""",
+            (hoy.isoformat(), primer_pago),
+        )
+
+
+def _mezcla(texto: str) -> Dict[str, float]:
+    pares = (p.split("=") for p in texto.split(",") if p.strip())
+    return {f.strip().upper(): float(v) for f, v in pares}
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import database.connection as connection
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+
+    ap = argparse.ArgumentParser(description="Genera una cartera sintética determinista.")
+    ap.add_argument("db", help="ruta del archivo SQLite a crear o ampliar")
+    ap.add_argument("--cuotas", type=int, default=10_000)
+    ap.add_argument("--semilla", type=int, default=2024)
+    ap.add_argument("--morosidad", type=float, default=0.15)
+    ap.add_argument("--mezcla", type=_mezcla, default=None)
+    ap.add_argument("--hoy", type=date.fromisoformat, default=None)
+    args = ap.parse_args()
+
+    connection.DB_PATH = os.path.abspath(args.db)
+    crear_tablas()
+    insertar_defaults()
+    print(generar_cartera(args.cuotas, args.semilla, args.mezcla, args.morosidad, args.hoy))
@@ -0,0 +1,418 @@
+"""
+Bulk import of transfer payments from CSV / bank-statement files.
+
+The file is read as a stream, in lotes of `tam_lote` rows. For each lote:
+  1. rows are matched to loans with one query (numero_prestamo, or the
+     cédula of a client with a single active loan);
+  2. each amount is allocated in memory over the loan's pending cuotas in
+     order — mora, then intereses, then capital — the same split as
+     cobrar_cuota_normal, so a row may pay several cuotas;
+  3. the lote is posted with models.pago.registrar_pagos_lote: one
+     transaction, one receipt-number reservation, executemany writes.
+
+Rows that match nothing, name an inactive loan or an ambiguous cédula,
+repeat an already-posted reference or exceed what is owed are reported
+and skipped. With simular=True nothing is written: the report shows what
+would be posted.
+
+Recognised columns (header names are case/accent insensitive):
+    numero_prestamo | prestamo,  cedula | documento,  monto | importe | credito,
+    referencia | ref | transaccion,  fecha | fecha_valor
+
+Usage from a shell:
+    python -m services.importador_pagos ARCHIVO.csv [--simular] [--cajero C] [--lote 500]
+"""
+
+import codecs
+import csv
+import io
+import re
+import time
+import unicodedata
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database.seed import get_config
+from models.pago import CuotaModificada, referencias_registradas, registrar_pagos_lote
+from models.prestamo import cuotas_pendientes_de, prestamos_por_referencia
+from services.dinero import centavos, pesos
+from services.mora_calculator import calcular_mora_cuota
+
+_ALIAS = {
+    "numero_prestamo": ("numero_prestamo", "prestamo", "no_prestamo", "num_prestamo"),
+    "cedula":          ("cedula", "documento", "identificacion", "rnc"),
+    "monto":           ("monto", "importe", "credito", "valor", "monto_pago"),
+    "referencia":      ("referencia", "referencia_pago", "ref", "no_referencia", "transaccion"),
+    "fecha":           ("fecha", "fecha_valor", "fecha_pago"),
+}
+_ACTIVOS = ("ACTIVO", "AL_DIA", "VENCIDO")
+
+
+def importar_pagos(
+    archivo,
+    simular: bool = False,
+    caja_id: Optional[int] = None,
+    tam_lote: int = 500,
+    hoy: Optional[date] = None,
+) -> dict:
+    """
+    Import the payments in `archivo` (path or binary file object).
+    caja_id is the open session the payments are posted to; it is only
+    optional when simulating. Returns the import report.
+    """
+    if not simular and caja_id is None:
+        raise ValueError("No hay sesión de caja abierta.")
+    hoy = hoy or date.today()
+    t0 = time.perf_counter()
+    importacion = _Importacion(hoy, simular, caja_id)
+    nombre = archivo if isinstance(archivo, str) else getattr(archivo, "name", "")
+
+    texto = open(archivo, "rb", buffering=65536) if isinstance(archivo, str) else archivo
+    try:
+        for lote in _lotes(_filas(texto), tam_lote):
+            importacion.procesar(lote)
+    finally:
+        if isinstance(archivo, str):
+            texto.close()
+
+    informe = importacion.informe
+    informe["archivo"] = str(nombre)
+    informe["segundos"] = round(time.perf_counter() - t0, 3)
+    return informe
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+def _normalizar(nombre: str) -> str:
+    nombre = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", nombre.strip().lower()).strip("_")
+
+
+def _filas(binario) -> Iterator[Tuple[int, dict]]:
+    """(line number, row) for each data row, with canonical column names."""
+    if not hasattr(binario, "peek"):
+        binario = io.BufferedReader(binario, 65536)
+    muestra = binario.peek(65536)
+    try:
+        muestra.decode("utf-8")
+        codificacion = "utf-8-sig"
+    except UnicodeDecodeError:
+        codificacion = "latin-1"                 # common in bank exports
+    texto = io.TextIOWrapper(binario, encoding=codificacion, newline="")
+    try:
+        dialecto = csv.Sniffer().sniff(
+            codecs.decode(muestra, codificacion, "ignore")[:8192], delimiters=",;\t|")
+    except csv.Error:
+        dialecto = csv.excel
+
+    lector = csv.reader(texto, dialecto)
+    columnas: Dict[int, str] = {}
+    for fila in lector:
+        if any(c.strip() for c in fila):
+            for i, nombre in enumerate(fila):
+                clave = _normalizar(nombre)
+                for canonica, alias in _ALIAS.items():
+                    if clave in alias and canonica not in columnas.values():
+                        columnas[i] = canonica
+            break
+    if "monto" not in columnas.values():
+        raise ValueError("El archivo no tiene una columna de monto reconocible.")
+    if not {"numero_prestamo", "cedula"} & set(columnas.values()):
+        raise ValueError("El archivo necesita una columna de préstamo o de cédula.")
+
+    try:
+        for fila in lector:
+            if not any(c.strip() for c in fila):
+                continue
+            yield lector.line_num, {
+                canonica: fila[i].strip() if i < len(fila) else ""
+                for i, canonica in columnas.items()
+            }
+    finally:
+        texto.detach()
+
+
+def _lotes(filas: Iterator, tam: int) -> Iterator[list]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tam:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _monto(texto: str) -> Optional[int]:
+    """
+    '1,234.50', '1.234,50', '1.234', '12.50', 'RD$ 500' → centavos; None if
+    unreadable or ambiguous. With both separators the last one is the
+    decimal point; otherwise a separator followed by 3 digits groups
+    thousands. A lone comma followed by 1–2 digits ('1,5', '12,50') may be
+    a decimal comma or a mistyped thousands group, and a wrong guess posts
+    10 or 100 times the amount, so it is rejected and the row reported.
+    """
+    limpio = re.sub(r"[^0-9,.\-]", "", texto)
+    signo = -1 if limpio.startswith("-") else 1
+    limpio = limpio.lstrip("-")
+    separadores = set(re.findall(r"[,.]", limpio))
+    entero, fraccion = limpio, ""
+    if len(separadores) == 2:
+        decimal = limpio[max(limpio.rfind(","), limpio.rfind("."))]
+        entero, _, fraccion = limpio.rpartition(decimal)
+        if decimal in entero:
+            return None
+    elif separadores:
+        (separador,) = separadores
+        if limpio.count(separador) == 1 and len(limpio) - limpio.find(separador) - 1 <= 2:
+            if separador == ",":
+                return None
+            entero, _, fraccion = limpio.partition(".")
+    grupos = re.split(r"[,.]", entero)
+    if len(grupos) > 1 and (not 1 <= len(grupos[0]) <= 3 or any(len(g) != 3 for g in grupos[1:])):
+        return None
+    entero = "".join(grupos)
+    if not entero.isdigit() or not re.fullmatch(r"\d{0,2}", fraccion):
+        return None
+    return signo * centavos(f"{entero}.{fraccion or 0}")
+
+
+def _variantes_cedula(cedula: str) -> List[str]:
+    """As typed and in the 000-0000000-0 format the app stores."""
+    digitos = re.sub(r"\D", "", cedula)
+    variantes = [cedula]
+    if len(digitos) == 11:
+        formateada = f"{digitos[:3]}-{digitos[3:10]}-{digitos[10]}"
+        if formateada != cedula:
+            variantes.append(formateada)
+    return variantes
+
+
+# ── Matching, allocation and posting ─────────────────────────────────────────
+
+class _Importacion:
+
+    def __init__(self, hoy: date, simular: bool, caja_id: Optional[int]):
+        self.hoy = hoy
+        self.simular = simular
+        self.caja_id = caja_id
+        self.tasa = float(get_config("tasa_mora_diaria") or 0) / 100.0
+        self.gracia = int(get_config("dias_gracia") or 0)
+        # pending cuotas per loan as of the last lote; when simulating this
+        # also carries the allocations nothing was written for
+        self.cuotas: Dict[int, List[dict]] = {}
+        self.referencias: set = set()
+        self.aplicado = 0                   # centavos; reported in pesos
+        self.informe = {
+            "simulacion": simular, "filas": 0, "aplicadas": 0, "pagos": 0,
+            "monto_aplicado": 0.0, "lotes": 0, "recibos": None,
+            "sin_coincidencia": [], "conflictos": [],
+        }
+
+    def procesar(self, lote: List[Tuple[int, dict]]):
+        self.informe["filas"] += len(lote)
+        self.informe["lotes"] += 1
+        candidatas = self._emparejar(lote)
+        ids = {prestamo["id"] for _, _, prestamo, _ in candidatas}
+        for intento in range(2):
+            if not self.simular:
+                for pid in ids:                   # posting: allocate on fresh state
+                    self.cuotas.pop(pid, None)
+            self._cargar_cuotas(ids)
+            pagos, cuotas, aplicadas, rechazadas, estado = self._asignar(candidatas)
+            if self.simular or not pagos:
+                break
+            try:
+                registrar_pagos_lote(pagos, cuotas, self.caja_id)
+                break
+            except CuotaModificada:
+                if intento:                       # a cashier keeps touching these loans
+                    for linea, fila, _, _ in candidatas:
+                        self._reportar("conflictos", linea, fila,
+                                       "Préstamo modificado durante la importación")
+                    return
+        for linea, fila, motivo in rechazadas:
+            self._reportar("conflictos", linea, fila, motivo)
+        self.cuotas.update(estado)
+        self._contabilizar(pagos, aplicadas)
+
+    def _emparejar(self, lote) -> list:
+        numeros = {f["numero_prestamo"] for _, f in lote if f.get("numero_prestamo")}
+        cedulas = {v for _, f in lote if f.get("cedula") for v in _variantes_cedula(f["cedula"])}
+        encontrados = prestamos_por_referencia(sorted(numeros), sorted(cedulas))
+        por_numero = {p["numero_prestamo"]: p for p in encontrados}
+        por_cedula: Dict[str, List[dict]] = {}
+        for p in encontrados:
+            if p["estado"] in _ACTIVOS:
+                por_cedula.setdefault(p["cedula"], [])
+                if p not in por_cedula[p["cedula"]]:
+                    por_cedula[p["cedula"]].append(p)
+        ya_registradas = referencias_registradas(
+            sorted({f["referencia"] for _, f in lote if f.get("referencia")}))
+
+        candidatas = []
+        for linea, fila in lote:
+            monto = _monto(fila.get("monto", ""))
+            if monto is None or monto <= 0:
+                self._reportar("conflictos", linea, fila, "Monto inválido o débito")
+                continue
+            if fila.get("numero_prestamo"):
+                prestamo = por_numero.get(fila["numero_prestamo"])
+            elif fila.get("cedula"):
+                opciones = [p for v in _variantes_cedula(fila["cedula"])
+                            for p in por_cedula.get(v, [])]
+                if len(opciones) > 1:
+                    self._reportar("conflictos", linea, fila,
+                                   f"La cédula tiene {len(opciones)} préstamos activos")
+                    continue
+                prestamo = opciones[0] if opciones else None
+            else:
+                prestamo = None
+            if prestamo is None:
+                self._reportar("sin_coincidencia", linea, fila, "Préstamo o cédula no encontrado")
+                continue
+            if prestamo["estado"] not in _ACTIVOS:
+                self._reportar("conflictos", linea, fila, f"Préstamo {prestamo['estado']}")
+                continue
+            clave = (fila.get("referencia"), prestamo["id"])
+            if fila.get("referencia") and (clave in ya_registradas or clave in self.referencias):
+                self._reportar("conflictos", linea, fila, "Referencia ya registrada")
+                continue
+            if fila.get("referencia"):
+                self.referencias.add(clave)
+            candidatas.append((linea, fila, prestamo, monto))
+        return candidatas
+
+    def _cargar_cuotas(self, ids):
+        faltan = sorted(pid for pid in ids if pid not in self.cuotas)
+        for pid in faltan:
+            self.cuotas[pid] = []
+        for c in cuotas_pendientes_de(faltan):
+            pendiente = max(0, c["cuota_total"] - c["capital_pagado"] - c["intereses_pagados"])
+            c["mora_por_cobrar"] = calcular_mora_cuota(
+                pendiente, date.fromisoformat(str(c["fecha_vencimiento"])[:10]), self.hoy,
+                self.tasa, self.gracia)["monto_mora"]
+            self.cuotas[c["prestamo_id"]].append(c)
+
+    def _asignar(self, candidatas):
+        """
+        Allocate every candidate row over copies of the cuota state
+        (all amounts in centavos, so the split is exact).
+        Returns (pagos, final cuota rows, applied rows, rejected rows,
+        pending cuotas per loan afterwards).
+        """
+        copias: Dict[int, List[dict]] = {}
+        previo: Dict[int, tuple] = {}
+        pagos, aplicadas, rechazadas = [], [], []
+        for linea, fila, prestamo, monto in candidatas:
+            pid = prestamo["id"]
+            if pid not in copias:
+                copias[pid] = [dict(c) for c in self.cuotas.get(pid, [])]
+            partes, restante = [], monto
+            for c in copias[pid]:
+                if restante <= 0:
+                    break
+                if c["estado"] == "PAGADA":
+                    continue
+                mora = min(restante, c["mora_por_cobrar"])
+                restante -= mora
+                interes = min(restante, c["intereses"] - c["intereses_pagados"])
+                restante -= interes
+                capital = min(restante, c["capital"] - c["capital_pagado"])
+                restante -= capital
+                if mora or interes or capital:
+                    partes.append((c, capital, interes, mora))
+            if restante > 0:
+                rechazadas.append((linea, fila,
+                                   f"El monto excede lo pendiente en {pesos(restante):,.2f}"))
+                continue
+
+            for c, capital, interes, mora in partes:
+                previo.setdefault(c["id"], (c["capital_pagado"], c["intereses_pagados"],
+                                            c["mora_pagada"]))
+                c["capital_pagado"] += capital
+                c["intereses_pagados"] += interes
+                c["mora_pagada"] += mora
+                c["mora_por_cobrar"] -= mora
+                if c["capital_pagado"] >= c["capital"] and c["intereses_pagados"] >= c["intereses"]:
+                    c["estado"] = "PAGADA"
+                    c["fecha_pago"] = self.hoy.isoformat()
+                elif c["capital_pagado"] > 0:
+                    c["estado"] = "PARCIAL"
+                pagos.append({
+                    "cuota_id":        c["id"],
+                    "prestamo_id":     pid,
+                    "cliente_id":      prestamo["cliente_id"],
+                    "tipo_pago":       "CUOTA_NORMAL",
+                    "monto_capital":   capital,
+                    "monto_intereses": interes,
+                    "monto_mora":      mora,
+                    "monto_total":     capital + interes + mora,
+                    "metodo_pago":     "TRANSFERENCIA",
+                    "referencia_pago": fila.get("referencia", ""),
+                    "notas":           _nota(fila, linea),
+                })
+            aplicadas.append((linea, fila, prestamo, monto))
+
+        filas_cuotas = [
+            {"id": c["id"], "capital_pagado": c["capital_pagado"],
+             "intereses_pagados": c["intereses_pagados"], "mora_pagada": c["mora_pagada"],
+             "estado": c["estado"], "fecha_pago": c["fecha_pago"],
+             "previo_capital": previo[c["id"]][0], "previo_intereses": previo[c["id"]][1],
+             "previo_mora": previo[c["id"]][2]}
+            for cuotas in copias.values() for c in cuotas if c["id"] in previo
+        ]
+        pendientes = {pid: [c for c in cuotas if c["estado"] != "PAGADA"]
+                      for pid, cuotas in copias.items()}
+        return pagos, filas_cuotas, aplicadas, rechazadas, pendientes
+
+    def _contabilizar(self, pagos: List[dict], aplicadas: list):
+        i = self.informe
+        i["aplicadas"] += len(aplicadas)
+        i["pagos"] += len(pagos)
+        self.aplicado += sum(p["monto_total"] for p in pagos)
+        i["monto_aplicado"] = pesos(self.aplicado)
+        if pagos and not self.simular:
+            primero = i["recibos"][0] if i["recibos"] else pagos[0]["numero_recibo"]
+            i["recibos"] = [primero, pagos[-1]["numero_recibo"]]
+
+    def _reportar(self, lista: str, linea: int, fila: dict, motivo: str):
+        self.informe[lista].append({
+            "linea":           linea,
+            "numero_prestamo": fila.get("numero_prestamo", ""),
+            "cedula":          fila.get("cedula", ""),
+            "monto":           fila.get("monto", ""),
+            "referencia":      fila.get("referencia", ""),
+            "motivo":          motivo,
+        })
+
+
+def _nota(fila: dict, linea: int) -> str:
+    nota = f"Importado (línea {linea})"
+    if fila.get("fecha"):
+        nota += f", fecha banco {fila['fecha']}"
+    return nota
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from controllers.caja_controller import caja_activa
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+
+    ap = argparse.ArgumentParser(description="Importa pagos por transferencia desde CSV.")
+    ap.add_argument("archivo")
+    ap.add_argument("--simular", action="store_true", help="no registra nada")
+    ap.add_argument("--cajero", default=None, help="sesión de caja (por defecto la de esta terminal)")
+    ap.add_argument("--lote", type=int, default=500)
+    args = ap.parse_args()
+
+    crear_tablas()
+    insertar_defaults()
+    caja = caja_activa(args.cajero)
+    informe = importar_pagos(args.archivo, args.simular, caja["id"] if caja else None, args.lote)
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
@@ -0,0 +1,88 @@
+"""
+Nightly mora accrual.
+Writes cuotas.mora_acumulada and moves overdue cuotas/loans to
+VENCIDA/VENCIDO (see models/mora.acumular_mora). Each run recomputes
+absolute values for its date, so it is safe to re-run or to catch up
+after the app was closed for several days: only the latest date matters.
+Unless foto_antiguedad is 0, it also stores the day's aging snapshot
+(models/antiguedad.guardar_foto) used by the aging trend.
+
+Usage from a shell:  python -m services.mora_acumulacion [YYYY-MM-DD]
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+from database.seed import get_config
+from models.antiguedad import guardar_foto
+from models.mora import acumular_mora, ultima_acumulacion
+
+log = logging.getLogger("agp.mora")
+
+REINTENTO = 60          # seconds before the first retry of a failed run
+REINTENTO_MAX = 900     # the wait doubles up to this
+
+
+def ejecutar(fecha: Optional[date] = None) -> dict:
+    """Run the accrual for fecha (default: today) with the configured rates."""
+    fecha = fecha or date.today()
+    resumen = acumular_mora(
+        fecha.isoformat(),
+        tasa_mora_diaria=float(get_config("tasa_mora_diaria") or 0) / 100.0,
+        dias_gracia=int(get_config("dias_gracia") or 0),
+    )
+    if get_config("foto_antiguedad") != "0":
+        guardar_foto(fecha.isoformat())
+    return resumen
+
+
+def ponerse_al_dia(hoy: Optional[date] = None) -> Optional[dict]:
+    """Run for today unless today's accrual already exists. Returns the summary or None."""
+    hoy = hoy or date.today()
+    ultima = ultima_acumulacion()
+    if ultima and ultima["fecha"] >= hoy.isoformat():
+        return None
+    return ejecutar(hoy)
+
+
+def _segundos_hasta_medianoche() -> float:
+    ahora = datetime.now()
+    manana = datetime.combine(ahora.date() + timedelta(days=1), datetime.min.time())
+    return (manana - ahora).total_seconds() + 5
+
+
+def iniciar_acumulacion_diaria() -> threading.Thread:
+    """
+    Catch up now and then once per day after midnight, in a daemon thread
+    (with its own SQLite connection). A failed run is logged and retried
+    after REINTENTO seconds, doubling up to REINTENTO_MAX.
+    """
+    def _run():
+        espera = REINTENTO
+        while True:
+            try:
+                ponerse_al_dia()
+            except Exception:
+                log.exception("Falló la acumulación de mora; se reintenta en %d s", espera)
+                pausa, espera = espera, min(espera * 2, REINTENTO_MAX)
+            else:
+                pausa, espera = _segundos_hasta_medianoche(), REINTENTO
+            threading.Event().wait(pausa)
+
+    hilo = threading.Thread(target=_run, name="mora-acumulacion", daemon=True)
+    hilo.start()
+    return hilo
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+
+    crear_tablas()
+    insertar_defaults()
+    fecha = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(ejecutar(fecha))
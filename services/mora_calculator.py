@@ -1,14 +1,16 @@
 """
 Late fee (mora) calculation service.
-Pure math — no database access.
+Pure math — no database access. Amounts are integer centavos.
 """
 
 from datetime import date, timedelta
-from typing import List
+from typing import List, Optional
+
+from services.dinero import redondear
 
 
 def calcular_mora_cuota(
-    saldo_pendiente: float,
+    saldo_pendiente: int,      # centavos
     fecha_vencimiento: date,
     fecha_calculo: date,
     tasa_mora_diaria: float,   # decimal, e.g. 0.005 = 0.5%
@@ -19,20 +21,43 @@ def calcular_mora_cuota(
 
     Returns:
         dias_mora           – days past grace period
-        monto_mora          – amount owed in late fees
+        monto_mora          – late fee in centavos, rounded once
         fecha_limite        – last date without penalty
     """
     fecha_limite = fecha_vencimiento + timedelta(days=dias_gracia)
 
     if saldo_pendiente <= 0 or fecha_calculo <= fecha_limite:
-        return {"dias_mora": 0, "monto_mora": 0.0, "fecha_limite": fecha_limite}
+        return {"dias_mora": 0, "monto_mora": 0, "fecha_limite": fecha_limite}
 
     dias_mora  = (fecha_calculo - fecha_limite).days
-    monto_mora = round(saldo_pendiente * tasa_mora_diaria * dias_mora, 2)
+    monto_mora = redondear(saldo_pendiente * tasa_mora_diaria * dias_mora)
 
     return {"dias_mora": dias_mora, "monto_mora": monto_mora, "fecha_limite": fecha_limite}
 
 
+def mora_cuota_sql(
+    saldo_pendiente: Optional[int],
+    fecha_vencimiento: Optional[str],
+    fecha_calculo: Optional[str],
+    tasa_mora_diaria: float,
+    dias_gracia: int,
+) -> int:
+    """
+    calcular_mora_cuota() as the SQLite scalar function of the same name,
+    registered on every connection (database/connection.py): ISO date
+    text in, monto_mora in centavos out. Unreadable dates or NULLs → 0.
+    """
+    if not saldo_pendiente or not fecha_vencimiento or not fecha_calculo:
+        return 0
+    try:
+        vencimiento = date.fromisoformat(fecha_vencimiento[:10])
+        calculo = date.fromisoformat(fecha_calculo[:10])
+    except ValueError:
+        return 0
+    return calcular_mora_cuota(saldo_pendiente, vencimiento, calculo,
+                               tasa_mora_diaria, dias_gracia)["monto_mora"]
+
+
 def calcular_mora_prestamo(
     cuotas_pendientes: List[dict],
     fecha_calculo: date,
@@ -42,7 +67,7 @@ def calcular_mora_prestamo(
     """
     Apply mora calculation to all pending installments of a loan.
 
-    Each dict in cuotas_pendientes must have keys:
+    Each dict in cuotas_pendientes must have keys (amounts in centavos):
         id, numero_cuota, fecha_vencimiento (str YYYY-MM-DD),
         cuota_total, capital_pagado, intereses_pagados, mora_pagada
 
@@ -59,10 +84,7 @@ def calcular_mora_prestamo(
             fecha_vcto = date.fromisoformat(_fv[:10]) if len(_fv) >= 10 else date.today()
         except (ValueError, TypeError):
             fecha_vcto = date.today()
-        pendiente  = round(
-            c["cuota_total"] - c["capital_pagado"] - c["intereses_pagados"], 2
-        )
-        pendiente = max(0.0, pendiente)
+        pendiente = max(0, c["cuota_total"] - c["capital_pagado"] - c["intereses_pagados"])
 
         info = calcular_mora_cuota(
             saldo_pendiente=pendiente,
@@ -76,13 +98,13 @@ def calcular_mora_prestamo(
             "pendiente":             pendiente,
             "dias_mora":             info["dias_mora"],
             "monto_mora_calculado":  info["monto_mora"],
-            "total_a_cobrar":        round(pendiente + info["monto_mora"], 2),
+            "total_a_cobrar":        pendiente + info["monto_mora"],
         })
     return resultado
 
 
 def calcular_cancelacion_total(
-    saldo_capital: float,
+    saldo_capital: int,        # centavos
     cuotas_pendientes: List[dict],
     fecha_calculo: date,
     tasa_mora_diaria: float,
@@ -94,14 +116,12 @@ def calcular_cancelacion_total(
     cuotas = calcular_mora_prestamo(
         cuotas_pendientes, fecha_calculo, tasa_mora_diaria, dias_gracia
     )
-    intereses_pend = round(
-        sum(max(0, c["intereses"] - c["intereses_pagados"]) for c in cuotas), 2
-    )
-    mora_total = round(sum(c["monto_mora_calculado"] for c in cuotas), 2)
+    intereses_pend = sum(max(0, c["intereses"] - c["intereses_pagados"]) for c in cuotas)
+    mora_total = sum(c["monto_mora_calculado"] for c in cuotas)
 
     return {
-        "capital":             round(saldo_capital, 2),
+        "capital":             saldo_capital,
         "intereses_pendientes": intereses_pend,
         "mora_total":          mora_total,
-        "total":               round(saldo_capital + intereses_pend + mora_total, 2),
+        "total":               saldo_capital + intereses_pend + mora_total,
     }
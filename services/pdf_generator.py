@@ -2,16 +2,19 @@
 PDF generation service.
 Generates:
   - Thermal receipt (80mm width) for individual payments
+    (rendered in the background by services/cola_recibos.py)
+  - All receipts of a caja day as one multi-page PDF, for reprinting
   - Full daily cash report (A4)
 """
 
 import os
+import threading
 from datetime import datetime
+from typing import Optional
 from fpdf import FPDF
 from config import RECEIPTS_DIR, REPORTS_DIR, LOGO_PATH
 from database.seed import get_config
-from models.pago import obtener_pago
-from database.connection import get_connection
+from models.pago import datos_recibos, datos_recibos_caja
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -44,7 +47,6 @@ class _Recibo(FPDF):
         super().__init__(orientation="P", unit="mm", format=(self.W, 200))
         self.set_margins(self.MARGIN, self.MARGIN, self.MARGIN)
         self.set_auto_page_break(auto=True, margin=self.MARGIN)
-        self.add_page()
 
     def linea(self):
         self.set_draw_color(180, 180, 180)
@@ -63,79 +65,92 @@ class _Recibo(FPDF):
         self.cell(0, 5, texto, ln=1, align="C")
         self.ln(1)
 
+    def recibo(self, pago: dict, ag: dict):
+        """One receipt on a new page. pago is a row of models.pago.datos_recibos."""
+        moneda = ag["moneda"]
+        self.add_page()
 
-def generar_recibo(pago_id: int) -> str:
-    """Generate thermal receipt for a payment. Returns file path."""
+        # ── Header ──
+        self.set_font("Courier", "B", 10)
+        self.cell(0, 6, ag["nombre"], ln=1, align="C")
+        self.set_font("Courier", "", 8)
+        self.cell(0, 4, ag["nit"], ln=1, align="C")
+        self.cell(0, 4, ag["direccion"], ln=1, align="C")
+        self.cell(0, 4, f"Tel: {ag['telefono']}", ln=1, align="C")
+        self.ln(2)
+
+        self.linea()
+        self.titulo_seccion("COMPROBANTE DE PAGO")
+        self.linea()
+
+        # ── Loan / Client info ──
+        self.fila("Recibo #:", pago["numero_recibo"])
+        self.fila("Fecha:",    f"{pago['fecha_pago']}  {pago['hora_pago']}")
+        self.fila("Cliente:",  f"{pago['nombres']} {pago['apellidos']}")
+        self.fila("Cédula:",   pago["cedula"])
+        self.fila("Préstamo:", pago["numero_prestamo"])
+        self.fila("Cuota #:",  str(pago["numero_cuota"]))
+        self.fila("Tipo:",     pago["tipo_pago"].replace("_", " "))
+
+        self.linea()
+        self.titulo_seccion("DETALLE DEL PAGO")
+        self.linea()
+
+        self.fila("Capital:",   _fmt(pago["monto_capital"],   moneda))
+        self.fila("Intereses:", _fmt(pago["monto_intereses"], moneda))
+        self.fila("Mora:",      _fmt(pago["monto_mora"],      moneda))
+        self.linea()
+        self.fila("TOTAL:",     _fmt(pago["monto_total"],     moneda), bold_val=True)
+        self.fila("Método:",    pago["metodo_pago"])
+        if pago.get("referencia_pago"):
+            self.fila("Ref:",   pago["referencia_pago"])
+
+        self.linea()
+        self.fila("Saldo Capital:", _fmt(pago["saldo_capital"], moneda))
+        self.linea()
+
+        self.set_font("Courier", "I", 7)
+        self.cell(0, 4, "Gracias por su pago puntual.", ln=1, align="C")
+        self.cell(0, 4, datetime.now().strftime("%d/%m/%Y %H:%M"), ln=1, align="C")
+
+
+def ruta_recibo(numero_recibo: str) -> str:
+    return os.path.join(RECEIPTS_DIR, f"recibo_{numero_recibo}.pdf")
+
+
+def escribir_recibo(pago: dict, ag: Optional[dict] = None) -> str:
+    """Render one receipt to its file. Written to a temporary name and
+    renamed, so a receipt file on disk is always complete."""
     os.makedirs(RECEIPTS_DIR, exist_ok=True)
+    pdf = _Recibo()
+    pdf.recibo(pago, ag or _agencia_info())
+    path = ruta_recibo(pago["numero_recibo"])
+    temporal = f"{path}.{threading.get_ident()}.tmp"
+    pdf.output(temporal)
+    os.replace(temporal, path)
+    return path
 
-    pago = obtener_pago(pago_id)
-    if not pago:
+
+def generar_recibo(pago_id: int) -> str:
+    """Generate thermal receipt for a payment. Returns file path."""
+    datos = datos_recibos([pago_id])
+    if not datos:
         raise ValueError(f"Pago {pago_id} no encontrado.")
+    return escribir_recibo(datos[0])
 
-    # Fetch related data
-    conn = get_connection()
-    cliente = conn.execute(
-        "SELECT nombres, apellidos, cedula FROM clientes WHERE id = ?",
-        (pago["cliente_id"],)
-    ).fetchone()
-    prestamo = conn.execute(
-        "SELECT numero_prestamo, saldo_capital FROM prestamos WHERE id = ?",
-        (pago["prestamo_id"],)
-    ).fetchone()
-    cuota_num = conn.execute(
-        "SELECT numero_cuota FROM cuotas WHERE id = ?",
-        (pago["cuota_id"],)
-    ).fetchone()
 
+def generar_recibos_caja(fecha: str, caja_id: Optional[int] = None) -> str:
+    """Reprint every receipt of a caja day (or one session) as one multi-page PDF."""
+    pagos = datos_recibos_caja(fecha, caja_id)
+    if not pagos:
+        raise ValueError(f"No hay recibos para el {fecha}.")
+    os.makedirs(REPORTS_DIR, exist_ok=True)
     ag = _agencia_info()
-    moneda = ag["moneda"]
-
     pdf = _Recibo()
-
-    # ── Header ──
-    pdf.set_font("Courier", "B", 10)
-    pdf.cell(0, 6, ag["nombre"], ln=1, align="C")
-    pdf.set_font("Courier", "", 8)
-    pdf.cell(0, 4, ag["nit"], ln=1, align="C")
-    pdf.cell(0, 4, ag["direccion"], ln=1, align="C")
-    pdf.cell(0, 4, f"Tel: {ag['telefono']}", ln=1, align="C")
-    pdf.ln(2)
-
-    pdf.linea()
-    pdf.titulo_seccion("COMPROBANTE DE PAGO")
-    pdf.linea()
-
-    # ── Loan / Client info ──
-    pdf.fila("Recibo #:", pago["numero_recibo"])
-    pdf.fila("Fecha:",    f"{pago['fecha_pago']}  {pago['hora_pago']}")
-    pdf.fila("Cliente:",  f"{cliente['nombres']} {cliente['apellidos']}")
-    pdf.fila("Cédula:",   cliente["cedula"])
-    pdf.fila("Préstamo:", prestamo["numero_prestamo"])
-    pdf.fila("Cuota #:",  str(cuota_num["numero_cuota"]))
-    pdf.fila("Tipo:",     pago["tipo_pago"].replace("_", " "))
-
-    pdf.linea()
-    pdf.titulo_seccion("DETALLE DEL PAGO")
-    pdf.linea()
-
-    pdf.fila("Capital:",   _fmt(pago["monto_capital"],   moneda))
-    pdf.fila("Intereses:", _fmt(pago["monto_intereses"], moneda))
-    pdf.fila("Mora:",      _fmt(pago["monto_mora"],      moneda))
-    pdf.linea()
-    pdf.fila("TOTAL:",     _fmt(pago["monto_total"],     moneda), bold_val=True)
-    pdf.fila("Método:",    pago["metodo_pago"])
-    if pago.get("referencia_pago"):
-        pdf.fila("Ref:",   pago["referencia_pago"])
-
-    pdf.linea()
-    pdf.fila("Saldo Capital:", _fmt(prestamo["saldo_capital"], moneda))
-    pdf.linea()
-
-    pdf.set_font("Courier", "I", 7)
-    pdf.cell(0, 4, "Gracias por su pago puntual.", ln=1, align="C")
-    pdf.cell(0, 4, datetime.now().strftime("%d/%m/%Y %H:%M"), ln=1, align="C")
-
-    path = os.path.join(RECEIPTS_DIR, f"recibo_{pago['numero_recibo']}.pdf")
+    for pago in pagos:
+        pdf.recibo(pago, ag)
+    sufijo = f"_{caja_id}" if caja_id is not None else ""
+    path = os.path.join(REPORTS_DIR, f"recibos_{fecha}{sufijo}.pdf")
     pdf.output(path)
     return path
 
@@ -162,12 +177,12 @@ class _ReporteA4(FPDF):
                   align="C")
 
 
-def generar_reporte_caja(fecha: str) -> str:
-    """Generate A4 daily cash report. Returns file path."""
+def generar_reporte_caja(fecha: str, caja_id: int = None) -> str:
+    """Generate A4 daily cash report (all sessions, or one with caja_id). Returns file path."""
     os.makedirs(REPORTS_DIR, exist_ok=True)
 
     from controllers.reporte_controller import caja as get_caja
-    reporte = get_caja(fecha)
+    reporte = get_caja(fecha, caja_id)
     ag = _agencia_info()
     moneda = ag["moneda"]
 
@@ -176,7 +191,10 @@ def generar_reporte_caja(fecha: str) -> str:
 
     # Title
     pdf.set_font("Helvetica", "B", 14)
-    pdf.cell(0, 8, f"REPORTE DE CAJA DIARIA  —  {fecha}", ln=1, align="C")
+    titulo = f"REPORTE DE CAJA DIARIA  —  {fecha}"
+    if caja_id is not None and reporte.get("caja"):
+        titulo += f"  —  {reporte['caja']['cajero']}"
+    pdf.cell(0, 8, titulo, ln=1, align="C")
     pdf.ln(4)
 
     # Summary
@@ -204,6 +222,24 @@ def generar_reporte_caja(fecha: str) -> str:
         pdf.cell(w, 8, val, border=1, align="C", fill=True)
     pdf.ln(10)
 
+    # Per-session breakdown when several cashiers worked the day
+    sesiones = reporte.get("sesiones", [])
+    if caja_id is None and len(sesiones) > 1:
+        pdf.set_font("Helvetica", "B", 9)
+        ses_cols = [("Cajero", 50), ("Apertura", 30), ("Cierre", 30), ("Estado", 30),
+                    ("# Pagos", 25), ("Cobrado", 45)]
+        for label, w in ses_cols:
+            pdf.cell(w, 7, label, border=1, align="C")
+        pdf.ln()
+        pdf.set_font("Helvetica", "", 8)
+        for s in sesiones:
+            vals = [s["cajero"], s["hora_apertura"], s["hora_cierre"] or "-", s["estado"],
+                    str(s["num_pagos"]), _fmt(s["total_cobrado"], moneda)]
+            for val, (_, w) in zip(vals, ses_cols):
+                pdf.cell(w, 6, str(val), border=1)
+            pdf.ln()
+        pdf.ln(6)
+
     # Payment detail table
     pdf.set_font("Helvetica", "B", 9)
     pdf.set_fill_color(50, 80, 120)
@@ -239,6 +275,7 @@ def generar_reporte_caja(fecha: str) -> str:
             pdf.cell(w, 6, str(val), border=1, fill=True)
         pdf.ln()
 
-    path = os.path.join(REPORTS_DIR, f"reporte_caja_{fecha}.pdf")
+    sufijo = f"_{caja_id}" if caja_id is not None else ""
+    path = os.path.join(REPORTS_DIR, f"reporte_caja_{fecha}{sufijo}.pdf")
     pdf.output(path)
     return path
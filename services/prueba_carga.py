@@ -0,0 +1,225 @@
+"""
+Load test for the production web server: several cashiers posting cobros
+at the same time, plus readers polling the dashboard.
+
+Each simulated cashier opens its own caja session (cookie-based, as a
+browser would) and posts CUOTA_NORMAL cobros over HTTP on its own share
+of the active loans, so the contention is on what cashiers really share:
+the receipt sequence, the dashboard counters and the SQLite write lock.
+
+Without --url it builds a throwaway portfolio, starts services.servidor_web
+in-process on a free port, and afterwards checks that every caja total
+matches its payments and that the dashboard counters still verify. The
+client threads share the server's GIL there, so figures are a lower bound.
+
+Usage from a shell:
+    python -m services.prueba_carga [--cajeros 8] [--cobros 25] [--lectores 2]
+                                    [--hilos 8] [--cuotas 5000] [--url http://host:8080]
+"""
+
+import http.cookiejar
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter
+from typing import List, Optional
+
+
+class _Navegador:
+    """One browser: its own cookies (Flask session → cajero)."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self._abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def pedir(self, ruta: str, datos: Optional[dict] = None) -> str:
+        cuerpo = urllib.parse.urlencode(datos).encode() if datos is not None else None
+        with self._abridor.open(self.url + ruta, cuerpo, timeout=60) as r:
+            return r.read().decode("utf-8", "replace")
+
+
+def _percentiles(tiempos: List[float]) -> dict:
+    if not tiempos:
+        return {"n": 0}
+    tiempos = sorted(tiempos)
+    p95 = tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))]
+    return {
+        "n":      len(tiempos),
+        "p50_ms": round(statistics.median(tiempos), 1),
+        "p95_ms": round(p95, 1),
+        "max_ms": round(tiempos[-1], 1),
+    }
+
+
+def _prestamos_activos(url: str, cuantos: int) -> List[int]:
+    """Active loan ids, read through the JSON API page by page."""
+    nav, ids, cursor = _Navegador(url), [], None
+    while len(ids) < cuantos:
+        ruta = "/api/v1/prestamos?estado=ACTIVO&limite=200"
+        if cursor:
+            ruta += "&cursor=" + urllib.parse.quote(cursor)
+        pagina = json.loads(nav.pedir(ruta))
+        ids += [p["id"] for p in pagina["filas"]]
+        cursor = pagina["siguiente"]
+        if not cursor:
+            break
+    return ids[:cuantos]
+
+
+def ejecutar_carga(url: str, cajeros: int = 8, cobros: int = 25, lectores: int = 2) -> dict:
+    """Run the load against a server at url and return the measurements."""
+    prestamos = _prestamos_activos(url, cajeros * cobros)
+    if len(prestamos) < cajeros:
+        raise ValueError("La cartera no tiene préstamos activos suficientes.")
+
+    tiempos_cobro: List[float] = []
+    tiempos_lectura: List[float] = []
+    errores: Counter = Counter()        # server/transport failures
+    rechazos: Counter = Counter()       # business answers (e.g. loan fully paid)
+    lock = threading.Lock()
+    inicio = threading.Barrier(cajeros + lectores + 1)
+    fin = threading.Event()
+
+    def cajero(n: int):
+        nav = _Navegador(url)
+        nombre = f"CARGA{n:02d}"
+        nav.pedir("/caja/apertura", {"cajero": nombre, "monto_apertura": "0"})
+        nav.pedir("/caja/apertura", {"cajero": nombre, "continuar": "1"})
+        propios = prestamos[n::cajeros]
+        inicio.wait()
+        for k in range(cobros):
+            t0 = time.perf_counter()
+            rechazo = error = None
+            try:
+                html = nav.pedir("/caja/cobrar", {
+                    "prestamo_id": propios[k % len(propios)], "tipo": "CUOTA_NORMAL",
+                    "metodo_pago": "EFECTIVO",
+                })
+                if "❌" in html:
+                    rechazo = html.split("❌", 1)[1].split("<", 1)[0].strip()
+                    if "locked" in rechazo or "busy" in rechazo:
+                        rechazo, error = None, rechazo
+            except OSError as e:
+                error = type(e).__name__
+            ms = (time.perf_counter() - t0) * 1000
+            with lock:
+                if error:
+                    errores[error] += 1
+                elif rechazo:
+                    rechazos[rechazo] += 1
+                else:
+                    tiempos_cobro.append(ms)
+
+    def lector():
+        nav = _Navegador(url)
+        inicio.wait()
+        while not fin.is_set():
+            for ruta in ("/", "/api/v1/dashboard"):
+                t0 = time.perf_counter()
+                try:
+                    nav.pedir(ruta)
+                except OSError as e:
+                    with lock:
+                        errores[f"lectura {type(e).__name__}"] += 1
+                    continue
+                with lock:
+                    tiempos_lectura.append((time.perf_counter() - t0) * 1000)
+
+    hilos_cajeros = [threading.Thread(target=cajero, args=(n,)) for n in range(cajeros)]
+    hilos_lectores = [threading.Thread(target=lector) for _ in range(lectores)]
+    for h in hilos_cajeros + hilos_lectores:
+        h.start()
+    inicio.wait()
+    t0 = time.perf_counter()
+    for h in hilos_cajeros:
+        h.join()
+    segundos = time.perf_counter() - t0
+    fin.set()
+    for h in hilos_lectores:
+        h.join()
+
+    return {
+        "cajeros":        cajeros,
+        "cobros_ok":      len(tiempos_cobro),
+        "cobros_error":   sum(v for k, v in errores.items() if not k.startswith("lectura")),
+        "rechazos":       dict(rechazos),
+        "segundos":       round(segundos, 2),
+        "cobros_por_s":   round(len(tiempos_cobro) / segundos, 1) if segundos else 0,
+        "cobro":          _percentiles(tiempos_cobro),
+        "lectura":        _percentiles(tiempos_lectura),
+        "errores":        dict(errores),
+    }
+
+
+def verificar_cajas() -> List[dict]:
+    """Sessions whose total_cobrado differs from the sum of their payments."""
+    from database.connection import get_connection
+    return [dict(r) for r in get_connection().execute(
+        """SELECT ca.id, ca.cajero, ca.total_cobrado,
+                  COALESCE(SUM(p.monto_total), 0) AS pagos
+           FROM cajas ca LEFT JOIN pagos p ON p.caja_id = ca.id AND p.anulado = 0
+           GROUP BY ca.id
+           HAVING ca.total_cobrado != COALESCE(SUM(p.monto_total), 0)""")]
+
+
+def prueba_local(cajeros: int = 8, cobros: int = 25, lectores: int = 2,
+                 hilos: Optional[int] = None, cuotas: int = 5_000) -> dict:
+    """Portfolio in a temp database + in-process server, load, consistency checks."""
+    import database.connection as connection
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+    from services.generador_cartera import generar_cartera
+    from services.resumen import verificar
+    from services.servidor_web import HILOS, crear
+
+    ruta_anterior = connection.DB_PATH
+    connection.close_connection()
+    connection.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="agp-carga-"), "carga.db")
+    try:
+        crear_tablas()
+        insertar_defaults()
+        generar_cartera(cuotas)
+        from app_web import app
+        servidor = crear(app, "127.0.0.1", 0, hilos or HILOS)
+        servidor.iniciar()
+        try:
+            informe = ejecutar_carga(f"http://127.0.0.1:{servidor.puerto}",
+                                     cajeros, cobros, lectores)
+        finally:
+            servidor.detener()
+        informe["hilos_servidor"] = servidor.hilos
+        informe["cajas_descuadradas"] = verificar_cajas()
+        informe["resumen_descuadrado"] = verificar()
+    finally:
+        connection.close_connection()
+        connection.DB_PATH = ruta_anterior
+    return informe
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    ap = argparse.ArgumentParser(description="Prueba de carga: cobros concurrentes por HTTP.")
+    ap.add_argument("--url", help="servidor ya en marcha (por defecto, uno local temporal)")
+    ap.add_argument("--cajeros", type=int, default=8)
+    ap.add_argument("--cobros", type=int, default=25, help="cobros por cajero")
+    ap.add_argument("--lectores", type=int, default=2)
+    ap.add_argument("--hilos", type=int, help="hilos del servidor local")
+    ap.add_argument("--cuotas", type=int, default=5_000, help="tamaño de la cartera local")
+    args = ap.parse_args()
+
+    if args.url:
+        informe = ejecutar_carga(args.url, args.cajeros, args.cobros, args.lectores)
+    else:
+        informe = prueba_local(args.cajeros, args.cobros, args.lectores, args.hilos, args.cuotas)
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    if informe["errores"] or informe.get("cajas_descuadradas") or informe.get("resumen_descuadrado"):
+        sys.exit(1)
@@ -0,0 +1,66 @@
+"""
+Consistency check for the trigger-maintained dashboard counters
+(resumen_cartera / resumen_diario / resumen_vencimientos).
+
+Usage from a shell:  python -m services.resumen [--reparar]
+"""
+
+from typing import List
+from models.resumen import (
+    calcular_cartera, calcular_diario, calcular_vencimientos, leer_cartera, leer_diario,
+    leer_vencimientos, reconstruir_resumen,
+)
+
+def verificar(reparar: bool = False) -> List[dict]:
+    """
+    Compare the counters with a from-scratch recomputation.
+    Returns one dict per mismatch (tabla, clave, campo, guardado, real);
+    with reparar=True the tables are rebuilt when anything differs.
+    """
+    diferencias = []
+
+    guardado, real = leer_cartera(), calcular_cartera()
+    for campo in real:
+        if guardado[campo] != real[campo]:
+            diferencias.append({"tabla": "resumen_cartera", "clave": 1, "campo": campo,
+                                "guardado": guardado[campo], "real": real[campo]})
+
+    guardado_d = {r["fecha"]: r for r in leer_diario()}
+    real_d     = {r["fecha"]: r for r in calcular_diario()}
+    vacio = {"cobrado": 0, "num_pagos": 0}   # amounts in centavos: exact
+    for fecha in sorted(guardado_d.keys() | real_d.keys()):
+        g, r = guardado_d.get(fecha, vacio), real_d.get(fecha, vacio)
+        for campo in ("cobrado", "num_pagos"):
+            if g[campo] != r[campo]:
+                diferencias.append({"tabla": "resumen_diario", "clave": fecha, "campo": campo,
+                                    "guardado": g[campo], "real": r[campo]})
+
+    guardado_v = {r["prestamo_id"]: r["primer_pendiente"] for r in leer_vencimientos()}
+    real_v     = {r["prestamo_id"]: r["primer_pendiente"] for r in calcular_vencimientos()}
+    for prestamo_id in sorted(guardado_v.keys() | real_v.keys()):
+        if guardado_v.get(prestamo_id) != real_v.get(prestamo_id):
+            diferencias.append({"tabla": "resumen_vencimientos", "clave": prestamo_id,
+                                "campo": "primer_pendiente", "guardado": guardado_v.get(prestamo_id),
+                                "real": real_v.get(prestamo_id)})
+
+    if diferencias and reparar:
+        reconstruir_resumen()
+    return diferencias
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.schema import crear_tablas
+
+    crear_tablas()
+    reparar = "--reparar" in sys.argv
+    diferencias = verificar(reparar=reparar)
+    for d in diferencias:
+        print(f"{d['tabla']}[{d['clave']}].{d['campo']}: guardado={d['guardado']} real={d['real']}")
+    if not diferencias:
+        print("Resumen consistente.")
+    elif reparar:
+        print("Resumen reconstruido.")
+    sys.exit(1 if diferencias and not reparar else 0)
@@ -0,0 +1,164 @@
+"""
+Production serving mode for the web UI.
+
+Runs app_web under waitress, a pure-Python multi-threaded WSGI server, so
+several cashier PCs on the LAN can work against one AGP instance. Each
+waitress worker thread keeps its own SQLite connection for its whole life
+(database.connection is thread-local, with a busy timeout), so requests do
+not reconnect and concurrent writers wait for the lock instead of failing.
+
+HILOS is the worker count. Requests are short and mostly spend their time
+in Python under the GIL, and SQLite admits one writer at a time, so beyond
+a handful of threads extra workers only queue on the lock: 8 keeps the
+LAN clients served while one of them waits on a slow report (see
+services/prueba_carga.py to measure another value with AGP_WEB_HILOS).
+
+Shutdown is graceful: the listener stops accepting, requests already
+received are finished and flushed, then the al_detener() hooks run (the
+receipt queue drains, pending events are dispatched) and the WAL is
+checkpointed.
+
+Usage from a shell:  python main_web.py --servidor [--host 0.0.0.0] [--puerto 8080]
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Callable, List, Optional
+
+# waitress is optional — without it main_web falls back to Flask's server
+try:
+    from waitress import wasyncore
+    from waitress.server import create_server
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+HILOS = int(os.environ.get("AGP_WEB_HILOS", "8"))
+ESPERA_CIERRE = 15.0    # seconds granted to in-flight requests on shutdown
+
+log = logging.getLogger("agp.servidor")
+
+
+class ServidorWeb:
+
+    def __init__(self, app, host: str = "127.0.0.1", puerto: int = 8080,
+                 hilos: int = HILOS):
+        self._srv = create_server(
+            app, host=host, port=puerto, threads=hilos,
+            connection_limit=200,       # keep-alive sockets of every LAN browser
+            channel_timeout=60,
+            ident="AGP",
+        )
+        self.host = host
+        self.puerto = self._srv.effective_port
+        self.hilos = hilos
+        self._hooks: List[Callable[[], None]] = []
+        self._cerrando = threading.Event()      # stop accepting
+        self._parar = threading.Event()         # leave the event loop
+        self._cerrado = threading.Event()       # sockets closed
+        self._detenido = threading.Event()      # hooks done
+        self._hilo: Optional[threading.Thread] = None
+
+    def al_detener(self, fn: Callable[[], None]):
+        """Run fn once the last request has been answered."""
+        self._hooks.append(fn)
+
+    def iniciar(self) -> threading.Thread:
+        """Serve from a background thread (desktop wrapper)."""
+        self._hilo = threading.Thread(target=self._bucle, name="servidor-web", daemon=True)
+        self._hilo.start()
+        return self._hilo
+
+    def servir(self):
+        """Serve in this thread until SIGINT/SIGTERM, then shut down gracefully."""
+        def _senal(signum, _frame):
+            log.info("Señal %s: deteniendo el servidor", signum)
+            # The event loop must keep running to flush responses, so the
+            # shutdown runs beside it rather than inside the handler.
+            threading.Thread(target=self.detener, name="servidor-cierre").start()
+
+        for nombre in ("SIGINT", "SIGTERM", "SIGBREAK"):
+            if hasattr(signal, nombre):
+                signal.signal(getattr(signal, nombre), _senal)
+        log.info("AGP sirviendo en http://%s:%s con %d hilos", self.host, self.puerto, self.hilos)
+        self._bucle()
+        self._detenido.wait(ESPERA_CIERRE + 5)
+
+    def _bucle(self):
+        # waitress' own run() loop cannot be stopped from another thread
+        # without closing sockets under its select(); this one checks the
+        # flags between polls and does the closing itself.
+        srv = self._srv
+        aceptando = True
+        while not self._parar.is_set():
+            if aceptando and self._cerrando.is_set():
+                srv.del_channel()       # listener out; open connections still served
+                aceptando = False
+            wasyncore.loop(timeout=srv.adj.asyncore_loop_timeout, map=srv._map,
+                           use_poll=srv.adj.asyncore_use_poll, count=1)
+        srv.task_dispatcher.shutdown(cancel_pending=True, timeout=2)
+        if aceptando:
+            srv.del_channel()
+        srv.close()
+        wasyncore.close_all(srv._map)
+        self._cerrado.set()
+
+    def _ocupado(self) -> bool:
+        despachador = self._srv.task_dispatcher
+        return bool(despachador.queue or despachador.active_count or any(
+            canal.requests or canal.total_outbufs_len
+            for canal in list(self._srv.active_channels.values())
+        ))
+
+    def detener(self, espera: float = ESPERA_CIERRE):
+        """Stop accepting, let in-flight requests finish, then run the hooks."""
+        if self._cerrando.is_set():
+            self._detenido.wait(espera + 5)
+            return
+        self._cerrando.set()
+        self._srv.pull_trigger()
+        limite = time.monotonic() + espera
+        while self._ocupado() and time.monotonic() < limite:
+            time.sleep(0.05)
+        if self._ocupado():
+            log.warning("Cierre con peticiones aún en curso")
+
+        self._parar.set()
+        self._srv.pull_trigger()
+        self._cerrado.wait(5)
+
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception:
+                log.exception("Error en hook de cierre %r", hook)
+        self._detenido.set()
+
+
+def crear(app, host: str = "127.0.0.1", puerto: int = 8080,
+          hilos: int = HILOS) -> ServidorWeb:
+    """A ServidorWeb with the standard shutdown hooks registered."""
+    servidor = ServidorWeb(app, host, puerto, hilos)
+    servidor.al_detener(_detener_recibos)
+    servidor.al_detener(_detener_eventos)
+    servidor.al_detener(_checkpoint)
+    return servidor
+
+
+def _detener_recibos():
+    from services.cola_recibos import detener
+    detener()
+
+
+def _detener_eventos():
+    from services.eventos import detener
+    detener()
+
+
+def _checkpoint():
+    from database.connection import close_connection, get_connection
+    get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    close_connection()
@@ -0,0 +1,42 @@
+"""Shared fixtures: a throwaway SQLite database per test."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+
+@pytest.fixture
+def db_temporal(tmp_path, monkeypatch):
+    """Point the connection layer at a fresh database with schema + defaults."""
+    import database.connection as connection
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+
+    connection.close_connection()
+    monkeypatch.setattr(connection, "DB_PATH", str(tmp_path / "prestamos.db"))
+    crear_tablas()
+    insertar_defaults()
+    yield connection.get_connection()
+    connection.close_connection()
+
+
+@pytest.fixture
+def prestamo_vencido(db_temporal):
+    """A client with a monthly loan whose first three cuotas are past due."""
+    from datetime import date
+    from dateutil.relativedelta import relativedelta
+    from controllers.cliente_controller import guardar_cliente
+    from controllers.prestamo_controller import crear
+
+    cliente_id = guardar_cliente({
+        "cedula": "001-0000001-1", "nombres": "Ana", "apellidos": "Pérez",
+        "telefono_principal": "809-555-0001",
+    })
+    inicio = date.today() - relativedelta(months=3, days=10)
+    prestamo_id = crear(cliente_id, {
+        "monto": 12_000, "tasa": 5.0, "tipo_tasa": "MENSUAL", "plazo": 6,
+        "frecuencia_pago": "MENSUAL", "tipo_amortizacion": "FRANCES",
+        "fecha_inicio": inicio.isoformat(),
+    })
+    return prestamo_id
@@ -0,0 +1,62 @@
+"""The columnar engine must reproduce the row engine cent for cent."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from datetime import date
+from services.amortizacion import calcular_prestamo, calcular_siguiente_fecha
+from services.amortizacion_vectorial import fechas_vencimiento
+
+CASOS = [     # monto in centavos
+    (10_000_000, 5.0,  "MENSUAL",   12,  "MENSUAL",   "FRANCES"),
+    (5_000_000,  3.0,  "MENSUAL",   6,   "MENSUAL",   "FRANCES"),
+    (1_234_567,  18,   "ANUAL",     300, "DIARIO",    "FRANCES"),
+    (750_000,    0.0,  "MENSUAL",   7,   "SEMANAL",   "FRANCES"),
+    (2_500_000,  2.5,  "QUINCENAL", 24,  "QUINCENAL", "FRANCES"),
+    (100_000,    4.0,  "MENSUAL",   1,   "MENSUAL",   "FRANCES"),
+    (20_000_000, 1.5,  "MENSUAL",   6,   "MENSUAL",   "SOLO_INTERES"),
+    (999_999,    0.3,  "DIARIA",    90,  "DIARIO",    "SOLO_INTERES"),
+]
+
+
+@pytest.mark.parametrize("monto,tasa,tipo_tasa,plazo,frecuencia,tipo", CASOS)
+def test_columnas_igual_a_filas(monto, tasa, tipo_tasa, plazo, frecuencia, tipo):
+    args = dict(monto=monto, tasa=tasa, tipo_tasa=tipo_tasa, plazo=plazo,
+                frecuencia_pago=frecuencia, tipo_amortizacion=tipo,
+                fecha_inicio=date(2026, 1, 31))
+    filas = calcular_prestamo(**args)
+    cols  = calcular_prestamo(**args, formato="columnas")
+
+    assert cols["tabla"].filas() == filas["tabla"]
+    for clave in ("cuota_base", "total_intereses", "total_a_pagar",
+                  "fecha_vencimiento", "tasa_periodo"):
+        assert cols[clave] == filas[clave]
+    assert cols["tabla"][-1] == filas["tabla"][-1]
+
+
+def test_fechas_mensuales_fin_de_mes():
+    """Month-end start dates clamp exactly like relativedelta."""
+    for base in (date(2026, 1, 31), date(2024, 1, 29), date(2026, 3, 30)):
+        esperadas = [calcular_siguiente_fecha(base, "MENSUAL", k) for k in range(1, 25)]
+        assert list(fechas_vencimiento(base, "MENSUAL", 24).astype(object)) == esperadas
+
+
+def test_lote_igual_a_calcular_prestamo():
+    """Batch summaries match calcular_prestamo loan by loan."""
+    from services.amortizacion_vectorial import calcular_prestamos_lote
+
+    filas = [dict(zip(("monto", "tasa", "tipo_tasa", "plazo",
+                       "frecuencia_pago", "tipo_amortizacion"), c),
+                  fecha_inicio=date(2026, 1, 31))
+             for c in CASOS]
+    lote = calcular_prestamos_lote(
+        **{k: [f[k] for f in filas] for k in filas[0]},
+        incluir_tabla=True,
+    )
+    for k, f in enumerate(filas):
+        r = calcular_prestamo(**f)
+        assert lote["cuota_base"][k]      == r["cuota_base"]
+        assert lote["total_intereses"][k] == r["total_intereses"]
+        assert lote["total_a_pagar"][k]   == r["total_a_pagar"]
+        assert lote["fecha_vencimiento"][k].astype(object) == r["fecha_vencimiento"]
+        assert lote["tabla"][k].filas() == r["tabla"]
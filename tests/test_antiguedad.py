@@ -0,0 +1,40 @@
+"""Tests for the portfolio aging buckets and their daily snapshots."""
+from datetime import date, timedelta
+
+import pytest
+
+from controllers.reporte_controller import antiguedad, tendencia_antiguedad
+from models.prestamo import obtener_cuotas, obtener_prestamo
+from services.mora_acumulacion import ejecutar
+
+
+def _tramo(informe, etiqueta):
+    return next(t for t in informe["tramos"] if t["tramo"] == etiqueta)
+
+
+def test_tramos_por_cuota_mas_antigua(prestamo_vencido):
+    cuotas = obtener_cuotas(prestamo_vencido)
+    saldo = obtener_prestamo(prestamo_vencido)["saldo_capital"]
+    primera = date.fromisoformat(cuotas[0]["fecha_vencimiento"][:10])
+
+    informe = antiguedad((primera + timedelta(days=10)).isoformat())
+    assert _tramo(informe, "1-30")["prestamos"] == 1
+    assert _tramo(informe, "1-30")["monto_vencido"] == pytest.approx(cuotas[0]["cuota_total"])
+    assert informe["par30"] == 0
+
+    informe = antiguedad((primera + timedelta(days=95)).isoformat())
+    assert _tramo(informe, "90+")["saldo_capital"] == pytest.approx(saldo)
+    assert informe["par30"] == informe["par90"] == 100
+    assert informe["cartera_total"] == pytest.approx(saldo)
+
+    assert antiguedad((primera - timedelta(days=1)).isoformat())["par30"] == 0
+
+
+def test_foto_diaria_alimenta_la_tendencia(prestamo_vencido):
+    ejecutar(date.today())
+    ejecutar(date.today())                      # re-running replaces the snapshot
+    tendencia = tendencia_antiguedad()
+    assert len(tendencia) == 1
+    hoy = antiguedad()
+    assert tendencia[0]["par30"] == hoy["par30"]
+    assert tendencia[0]["tramos"] == hoy["tramos"]
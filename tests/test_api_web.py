@@ -0,0 +1,61 @@
+"""Tests for the JSON API: conditional GET against the data version, gzip."""
+import gzip
+import json
+import os
+
+import pytest
+
+from controllers.caja_controller import abrir
+from controllers.pago_controller import cobrar_cuota_normal
+from models.prestamo import obtener_proxima_cuota
+
+
+@pytest.fixture
+def cliente():
+    from app_web import app
+    return app.test_client()
+
+
+def test_304_sin_consultas(prestamo_vencido, db_temporal, cliente):
+    url = f"/api/v1/prestamos/{prestamo_vencido}"
+    r = cliente.get(url)
+    assert r.status_code == 200 and r.get_json()["id"] == prestamo_vencido
+    etag, modificado = r.headers["ETag"], r.headers["Last-Modified"]
+
+    sentencias = []
+    db_temporal.set_trace_callback(sentencias.append)
+    try:
+        assert cliente.get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert cliente.get(url, headers={"If-Modified-Since": modificado}).status_code == 304
+    finally:
+        db_temporal.set_trace_callback(None)
+    assert sentencias == []
+
+    abrir(0)
+    cobrar_cuota_normal(prestamo_vencido, obtener_proxima_cuota(prestamo_vencido)["id"])
+    r = cliente.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+
+
+def test_gzip_y_errores(prestamo_vencido, cliente):
+    r = cliente.get(f"/api/v1/prestamos/{prestamo_vencido}/cuotas",
+                    headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(r.data))) == 6
+
+    r = cliente.get("/api/v1/clientes/999")
+    assert r.status_code == 404 and r.get_json()["error"] == "Cliente no encontrado."
+    assert cliente.get("/api/v1/clientes?cursor=basura").status_code == 400
+
+
+def test_version_cambia_aunque_el_wal_no(prestamo_vencido, db_temporal, cliente):
+    """A commit that leaves the files' size and mtime as they were (WAL reset,
+    coarse timestamps) must still invalidate the ETag."""
+    import database.connection as connection
+    etag = cliente.get("/api/v1/dashboard").headers["ETag"]
+    abrir(0)
+    connection._version_firma = [                 # as if os.stat saw nothing new
+        (st.st_mtime_ns, st.st_size) for st in
+        (os.stat(connection.DB_PATH), os.stat(connection.DB_PATH + "-wal"))]
+    r = cliente.get("/api/v1/dashboard", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
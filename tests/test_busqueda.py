@@ -0,0 +1,31 @@
+"""Tests for the FTS5 client and loan search."""
+from controllers.cliente_controller import guardar_cliente
+from models.cliente import buscar_clientes
+from models.prestamo import buscar_prestamos, obtener_prestamo
+
+
+def test_busca_cliente_por_prefijo_sin_acentos(prestamo_vencido):
+    guardar_cliente({"cedula": "402-1234567-8", "nombres": "José",
+                     "apellidos": "Núñez", "telefono_principal": "(829) 555-0199"})
+    assert [c["apellidos"] for c in buscar_clientes("nun")] == ["NÚÑEZ"]
+    assert [c["nombres"] for c in buscar_clientes("ANA PER")] == ["ANA"]
+    assert len(buscar_clientes("40212345")) == 1
+    assert len(buscar_clientes("402-123")) == 1
+    assert len(buscar_clientes("8295550199")) == 1
+
+
+def test_indice_sigue_las_actualizaciones(prestamo_vencido):
+    cliente_id = obtener_prestamo(prestamo_vencido)["cliente_id"]
+    guardar_cliente({"cedula": "001-0000001-1", "nombres": "Ana",
+                     "apellidos": "Rosario", "telefono_principal": "809-555-0001"},
+                    cliente_id)
+    assert buscar_clientes("perez") == []
+    assert len(buscar_clientes("rosa")) == 1
+
+
+def test_busca_prestamo_por_numero_o_cliente(prestamo_vencido):
+    numero = obtener_prestamo(prestamo_vencido)["numero_prestamo"]
+    assert [p["id"] for p in buscar_prestamos(numero)] == [prestamo_vencido]
+    assert [p["id"] for p in buscar_prestamos(numero.replace("-", ""))] == [prestamo_vencido]
+    assert [p["id"] for p in buscar_prestamos("pérez")] == [prestamo_vencido]
+    assert buscar_prestamos("zzz") == []
@@ -0,0 +1,81 @@
+"""Tests for concurrent cash sessions (one per cashier and day)."""
+from datetime import date
+
+import pytest
+
+from controllers.caja_controller import abrir, caja_activa, cerrar
+from controllers.pago_controller import cobrar_cuota_normal
+from models.prestamo import obtener_proxima_cuota
+from models.reporte import reporte_caja_dia
+
+
+def _cobrar(prestamo_id, cajero):
+    return cobrar_cuota_normal(prestamo_id, obtener_proxima_cuota(prestamo_id)["id"],
+                               cajero=cajero)
+
+
+def test_dos_cajeros_consolidan_el_dia(prestamo_vencido):
+    a = abrir(1_000, cajero="ventanilla1")
+    b = abrir(500, cajero="VENTANILLA2")
+    with pytest.raises(ValueError):
+        abrir(0, cajero="Ventanilla1")
+
+    pago_a = _cobrar(prestamo_vencido, "VENTANILLA1")
+    pago_b = _cobrar(prestamo_vencido, "VENTANILLA2")
+    assert (pago_a["caja_id"], pago_b["caja_id"]) == (a, b)
+
+    hoy = date.today().isoformat()
+    dia = reporte_caja_dia(hoy)
+    assert dia["caja"]["sesiones"] == 2
+    assert dia["caja"]["monto_apertura"] == 1_500
+    assert dia["totales"]["num_pagos"] == 2
+    assert dia["caja"]["total_cobrado"] == pytest.approx(dia["totales"]["total_cobrado"])
+    assert [s["num_pagos"] for s in dia["sesiones"]] == [1, 1]
+
+    sesion = reporte_caja_dia(hoy, b)
+    assert [p["id"] for p in sesion["pagos"]] == [pago_b["id"]]
+    assert sesion["caja"]["cajero"] == "VENTANILLA2"
+
+
+def test_caja_cerrada_rechaza_cobros(prestamo_vencido, db_temporal):
+    caja_id = abrir(0, cajero="CAJA1")
+    caja = caja_activa("CAJA1")
+    cerrar(caja_id, 0)
+    assert caja_activa("CAJA1") is None
+    with pytest.raises(ValueError):
+        cerrar(caja_id, 0)
+
+    # a cobro prepared before the close-out must not land in the closed session
+    from models.pago import registrar_pago
+    cuota = obtener_proxima_cuota(prestamo_vencido)
+    with pytest.raises(ValueError):
+        registrar_pago({
+            "caja_id": caja["id"], "cuota_id": cuota["id"], "prestamo_id": prestamo_vencido,
+            "cliente_id": 1, "tipo_pago": "CUOTA_NORMAL", "monto_capital": 1.0,
+            "monto_intereses": 0.0, "monto_mora": 0.0, "monto_total": 1.0,
+            "metodo_pago": "EFECTIVO", "referencia_pago": "", "notas": "",
+        })
+    assert db_temporal.execute("SELECT COUNT(*) FROM pagos").fetchone()[0] == 0
+
+
+def test_dos_cajeros_misma_cuota(prestamo_vencido, db_temporal):
+    """A cobro computed from cuota state another cashier already paid is refused."""
+    from models.pago import CuotaModificada, registrar_pago
+    from models.prestamo import cuota_para_cobro
+
+    abrir(0, cajero="V1")
+    caja_v2 = abrir(0, cajero="V2")
+    cuota = cuota_para_cobro(prestamo_vencido)          # V2 loads the cuota...
+    pago = cobrar_cuota_normal(prestamo_vencido, None, cajero="V1")    # ...V1 pays it
+    assert pago["cuota_id"] == cuota["id"] and pago["hora_pago"]
+
+    with pytest.raises(CuotaModificada):
+        registrar_pago({
+            "caja_id": caja_v2, "cuota_id": cuota["id"], "prestamo_id": prestamo_vencido,
+            "cliente_id": cuota["cliente_id"], "tipo_pago": "CUOTA_NORMAL",
+            "monto_capital": cuota["capital"], "monto_intereses": cuota["intereses"],
+            "monto_mora": 0, "monto_total": cuota["cuota_total"], "metodo_pago": "EFECTIVO",
+        }, cuota)
+    assert db_temporal.execute("SELECT COUNT(*) FROM pagos").fetchone()[0] == 1
+    # the next cobro moves on to the following cuota
+    assert cobrar_cuota_normal(prestamo_vencido, None, cajero="V2")["cuota_id"] != cuota["id"]
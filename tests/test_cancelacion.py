@@ -0,0 +1,91 @@
+"""Tests for the set-based total cancellation."""
+from datetime import date, timedelta
+
+import pytest
+
+from controllers.caja_controller import abrir
+from controllers.cliente_controller import guardar_cliente
+from controllers.pago_controller import (
+    calcular_cancelacion, cobrar_cancelacion_total, cobrar_cuota_normal,
+)
+from controllers.prestamo_controller import crear
+from models.mora import desglose_cancelacion
+from models.pago import CuotaModificada, registrar_pagos_cancelacion
+from services.dinero import centavos
+from services.resumen import verificar
+
+
+@pytest.fixture
+def prestamo_diario(db_temporal):
+    """300 daily cuotas, the first 40 past due."""
+    cliente_id = guardar_cliente({
+        "cedula": "001-0000002-2", "nombres": "Luis", "apellidos": "Gómez",
+        "telefono_principal": "809-555-0002",
+    })
+    return crear(cliente_id, {
+        "monto": 30_000, "tasa": 0.2, "tipo_tasa": "DIARIA", "plazo": 300,
+        "frecuencia_pago": "DIARIO", "tipo_amortizacion": "FRANCES",
+        "fecha_inicio": (date.today() - timedelta(days=40)).isoformat(),
+    })
+
+
+def test_cancelacion_en_pocas_sentencias(prestamo_diario, db_temporal):
+    caja_id = abrir(0)
+    total = calcular_cancelacion(prestamo_diario)["cancelacion"]["total"]
+
+    sentencias = []
+    db_temporal.set_trace_callback(sentencias.append)
+    try:
+        pagos = cobrar_cancelacion_total(prestamo_diario)
+    finally:
+        db_temporal.set_trace_callback(None)
+
+    assert len(pagos) == 300
+    assert sum(centavos(p["monto_total"]) for p in pagos) == centavos(total)
+    assert len({p["numero_recibo"] for p in pagos}) == 300
+    # per cuota only the executemany INSERT (and its resumen trigger) runs,
+    # plus the overdue trigger on the one UPDATE, traced under its text: the
+    # guard and, each paid cuota being the loan's earliest, one index lookup
+    otras = [s for s in sentencias if not s.lstrip().startswith("INSERT INTO pagos")]
+    actualizaciones = [s for s in otras if "UPDATE cuotas SET" in s]
+    assert len(set(actualizaciones)) == 1 and len(actualizaciones) == 1 + 3 * len(pagos)
+    assert len(otras) - len(actualizaciones) < 15
+    fila = db_temporal.execute(
+        """SELECT (SELECT COUNT(*) FROM cuotas WHERE prestamo_id = :p AND estado = 'PAGADA'),
+                  (SELECT estado FROM prestamos WHERE id = :p),
+                  (SELECT total_cobrado FROM cajas WHERE id = :c)""",
+        {"p": prestamo_diario, "c": caja_id}).fetchone()
+    assert tuple(fila) == (300, "CANCELADO", centavos(total))
+
+
+def test_desglose_desactualizado_no_registra_nada(prestamo_vencido, db_temporal):
+    caja_id = abrir(0)
+    desglose = desglose_cancelacion(prestamo_vencido, date.today().isoformat())
+    cobrar_cuota_normal(prestamo_vencido, None)            # another cashier, meanwhile
+
+    pagos = [{**f, "caja_id": caja_id, "prestamo_id": prestamo_vencido,
+              "tipo_pago": "CANCELACION_TOTAL", "metodo_pago": "EFECTIVO",
+              "monto_total": f["monto_capital"] + f["monto_intereses"] + f["monto_mora"],
+              "referencia_pago": "", "notas": ""} for f in desglose]
+    with pytest.raises(CuotaModificada):
+        registrar_pagos_cancelacion(pagos)
+    assert db_temporal.execute("SELECT COUNT(*) FROM pagos").fetchone()[0] == 1
+
+
+def test_cierra_cuotas_sin_saldo(prestamo_vencido, db_temporal):
+    abrir(0)
+    saldada = db_temporal.execute(
+        "SELECT id FROM cuotas WHERE prestamo_id = ? ORDER BY numero_cuota LIMIT 1",
+        (prestamo_vencido,)).fetchone()[0]
+    with db_temporal:
+        db_temporal.execute(
+            """UPDATE cuotas SET capital_pagado = capital, intereses_pagados = intereses,
+               estado = 'PARCIAL' WHERE id = ?""", (saldada,))
+
+    pagos = cobrar_cancelacion_total(prestamo_vencido)
+    assert saldada not in {p["cuota_id"] for p in pagos}
+    assert db_temporal.execute(
+        "SELECT COUNT(*) FROM cuotas WHERE prestamo_id = ? AND estado != 'PAGADA'",
+        (prestamo_vencido,)).fetchone()[0] == 0
+    assert db_temporal.execute("SELECT COUNT(*) FROM resumen_vencimientos").fetchone()[0] == 0
+    assert verificar() == []
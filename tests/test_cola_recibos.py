@@ -0,0 +1,64 @@
+"""Tests for the background receipt queue and the batch reprint."""
+import re
+from datetime import date
+
+import pytest
+
+from controllers.caja_controller import abrir
+from controllers.pago_controller import cobrar_cancelacion_total, cobrar_cuota_normal
+from models.prestamo import obtener_proxima_cuota
+from services import cola_recibos, pdf_generator
+
+
+@pytest.fixture
+def cola(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_generator, "RECEIPTS_DIR", str(tmp_path / "recibos"))
+    monkeypatch.setattr(pdf_generator, "REPORTS_DIR", str(tmp_path / "reportes"))
+    yield cola_recibos.iniciar(hilos=2)
+    cola_recibos.detener()
+
+
+def _cobrar(prestamo_id):
+    return cobrar_cuota_normal(prestamo_id, obtener_proxima_cuota(prestamo_id)["id"])
+
+
+def _paginas(ruta) -> int:
+    with open(ruta, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b", f.read()))
+
+
+def test_cobro_encola_y_deduplica(prestamo_vencido, cola):
+    abrir(0)
+    pago = _cobrar(prestamo_vencido)
+    ruta = cola_recibos.recibo(pago)
+    assert ruta == pdf_generator.ruta_recibo(pago["numero_recibo"])
+
+    cola_recibos.encolar_pagos([pago])
+    cola.esperar()
+    assert cola.generados == 1
+    assert cola.omitidos >= 1
+    assert _paginas(ruta) == 1
+
+
+def test_reimpresion_del_dia(prestamo_vencido, cola):
+    abrir(0)
+    for _ in range(3):
+        _cobrar(prestamo_vencido)
+    ruta = pdf_generator.generar_recibos_caja(date.today().isoformat())
+    assert _paginas(ruta) == 3
+
+
+def test_cancelacion_total_resuelve_recibos(prestamo_vencido, cola):
+    abrir(0)
+    pagos = cobrar_cancelacion_total(prestamo_vencido)
+    assert len(pagos) == 6 and all(p["id"] for p in pagos)
+    rutas = [f.result(30) for f in cola_recibos.encolar_pagos(pagos)]
+    assert rutas == [pdf_generator.ruta_recibo(p["numero_recibo"]) for p in pagos]
+    assert cola.generados == 6
+
+
+def test_pago_incompleto_no_deja_pendientes(cola):
+    with pytest.raises(KeyError):
+        cola.encolar([{"id": 1, "numero_recibo": "REC-X-1"}, {"numero_recibo": "REC-X-2"}])
+    cola.esperar()                  # nothing registered, nothing to wait for
+    assert cola.generados == 0
@@ -0,0 +1,42 @@
+"""Tests for the configuration cache in database.seed."""
+from database.seed import get_config, set_config, get_all_config, config_version
+
+
+def _contar_consultas(conn):
+    consultas = []
+    conn.set_trace_callback(consultas.append)
+    return consultas
+
+
+def test_lecturas_repetidas_sin_consultas(db_temporal):
+    get_config("tasa_mora_diaria")          # warm the cache
+    consultas = _contar_consultas(db_temporal)
+    for _ in range(50):
+        assert get_config("tasa_mora_diaria") == "0.5"
+        assert get_config("dias_gracia") == "3"
+    db_temporal.set_trace_callback(None)
+    assert consultas == []
+
+
+def test_set_config_actualiza_cache(db_temporal):
+    get_config("dias_gracia")
+    version = config_version()
+    set_config("dias_gracia", "5")
+    assert get_config("dias_gracia") == "5"
+    assert get_all_config()["dias_gracia"] == "5"
+    assert config_version() > version
+
+
+
+def test_cambio_de_otro_proceso_se_ve(db_temporal):
+    import sqlite3
+    import database.connection as connection
+
+    assert get_config("dias_gracia") == "3"
+    version = config_version()
+    otro = sqlite3.connect(connection.DB_PATH)      # the web server, say
+    with otro:
+        otro.execute("UPDATE configuracion SET valor = '7' WHERE clave = 'dias_gracia'")
+    otro.close()
+    assert get_config("dias_gracia") == "7"
+    assert config_version() > version
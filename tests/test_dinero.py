@@ -0,0 +1,33 @@
+"""Tests for integer-centavo money: conversions and exact posting totals."""
+import pytest
+
+from controllers.caja_controller import abrir
+from controllers.pago_controller import calcular_cancelacion, cobrar_cancelacion_total
+from services.dinero import a_pesos, centavos, redondear
+
+
+def test_conversiones():
+    assert centavos("1234.5") == 123450
+    assert centavos(0.285) == 29          # half up on the decimal value
+    assert centavos(19.99) == 1999        # no binary-float truncation
+    assert a_pesos({"monto_total": 1999, "num_pagos": 3}) == {"monto_total": 19.99, "num_pagos": 3}
+    with pytest.raises(ValueError):
+        centavos("12,5")
+
+
+def test_redondear_igual_que_sqlite(db_temporal):
+    for x in (0.5, 1.5, 2.5, -2.5, 10.4999, 803.5):
+        assert redondear(x) == db_temporal.execute("SELECT CAST(ROUND(?) AS INTEGER)", (x,)).fetchone()[0]
+
+
+def test_cancelacion_cuadra_al_centavo(prestamo_vencido, db_temporal):
+    caja_id = abrir(0)
+    total = calcular_cancelacion(prestamo_vencido)["cancelacion"]["total"]
+    pagos = cobrar_cancelacion_total(prestamo_vencido)
+
+    assert sum(centavos(p["monto_total"]) for p in pagos) == centavos(total)
+    saldo, cobrado = db_temporal.execute(
+        """SELECT p.saldo_capital, c.total_cobrado FROM prestamos p, cajas c
+           WHERE p.id = ? AND c.id = ?""", (prestamo_vencido, caja_id)).fetchone()
+    assert saldo == 0
+    assert cobrado == centavos(total)
@@ -0,0 +1,82 @@
+"""Tests for the shared background-task executor."""
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from views.components.worker import Ejecutor
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    yield app
+
+
+def _drenar(app, ejecutor):
+    while ejecutor._en_curso:
+        ejecutor.esperar(1000)
+        app.processEvents()
+
+
+def test_coalesce_y_descarta_resultados_viejos(app):
+    ejecutor = Ejecutor(max_hilos=2)
+    dueno = QtCore.QObject()
+    liberar = threading.Event()
+    llamadas, recibidos = [], []
+
+    def consulta(termino):
+        llamadas.append(termino)
+        if termino == "a":
+            liberar.wait(5)
+        return termino.upper()
+
+    for termino in ["a", "ab", "abc", "abcd"]:
+        ejecutor.enviar(dueno, "busqueda", consulta, termino, on_result=recibidos.append)
+    liberar.set()
+    _drenar(app, ejecutor)
+
+    assert llamadas == ["a", "abcd"]
+    assert recibidos == ["ABCD"]
+    t = ejecutor.estadisticas()["QObject.busqueda"]
+    assert t.llamadas == 2 and t.descartadas == 3
+
+
+def test_tareas_anonimas_no_se_coalescen(app):
+    ejecutor = Ejecutor(max_hilos=2)
+    dueno = QtCore.QObject()
+    recibidos, errores = [], []
+    for i in range(3):
+        ejecutor.enviar(dueno, None, lambda i=i: i, on_result=recibidos.append)
+    ejecutor.enviar(dueno, None, lambda: 1 / 0, on_error=errores.append)
+    _drenar(app, ejecutor)
+    assert sorted(recibidos) == [0, 1, 2]
+    assert len(errores) == 1
+
+
+def test_tabla_pide_la_pagina_siguiente_una_sola_vez(app):
+    from views.components import worker
+    from views.components.tabla import ModeloTabla
+
+    llamadas, liberar = [], threading.Event()
+
+    def fuente(cursor):
+        llamadas.append(cursor)
+        liberar.wait(5)
+        return {"filas": [{"id": i} for i in range(3)], "siguiente": None}
+
+    modelo = ModeloTabla([("id", "Id", 50)])
+    modelo.reiniciar([], fuente, "c1")
+    assert modelo.canFetchMore()
+    modelo.fetchMore()
+    assert not modelo.canFetchMore()        # the page is on its way
+    modelo.fetchMore()
+    assert modelo.rowCount() == 0
+    liberar.set()
+    _drenar(app, worker.ejecutor())
+
+    assert llamadas == ["c1"]
+    assert modelo.rowCount() == 3 and not modelo.canFetchMore()
@@ -0,0 +1,76 @@
+"""Tests for the outbox table and the in-process event dispatcher."""
+import pytest
+
+from controllers.caja_controller import abrir
+from controllers.cliente_controller import guardar_cliente
+from controllers.pago_controller import cobrar_cancelacion_total, cobrar_cuota_normal
+from models.evento import eventos_desde
+from models.pago import CuotaModificada, anular_pago
+from models.prestamo import cuota_para_cobro
+from services.eventos import Despachador
+
+
+def _tipos(desde: int = 0):
+    return [(e["tipo"], e["entidad_id"]) for e in eventos_desde(desde)]
+
+
+def test_cada_cambio_deja_su_evento(prestamo_vencido, db_temporal):
+    alta = _tipos()
+    assert alta[0][0] == "CLIENTE_GUARDADO" and alta[1] == ("PRESTAMO_CREADO", prestamo_vencido)
+    cursor = eventos_desde(0)[-1]["id"]
+
+    abrir(0)
+    pago = cobrar_cuota_normal(prestamo_vencido, None)
+    anular_pago(pago["id"], "error de digitación")
+    nuevos = eventos_desde(cursor)
+    assert [(e["tipo"], e["entidad_id"]) for e in nuevos] == [
+        ("PAGO_REGISTRADO", pago["id"]), ("PAGO_ANULADO", pago["id"])]
+    assert nuevos[0]["datos"]["numero_recibo"] == pago["numero_recibo"]
+    assert nuevos[0]["datos"]["monto_total"] == pago["monto_total"]      # pesos
+    cursor = nuevos[-1]["id"]
+
+    pagos = cobrar_cancelacion_total(prestamo_vencido)
+    nuevos = eventos_desde(cursor)
+    assert [e["datos"]["numero_recibo"] for e in nuevos[:-1]] == [p["numero_recibo"] for p in pagos]
+    assert (nuevos[-1]["tipo"], nuevos[-1]["datos"]["estado"]) == ("PRESTAMO_ESTADO", "CANCELADO")
+
+
+def test_sin_commit_no_hay_evento(prestamo_vencido, db_temporal):
+    from models.pago import registrar_pago
+    abrir(0)
+    cuota = cuota_para_cobro(prestamo_vencido)
+    cobrar_cuota_normal(prestamo_vencido, None)         # another cashier, meanwhile
+    antes = _tipos()
+    with pytest.raises(CuotaModificada):
+        registrar_pago({
+            "caja_id": 1, "cuota_id": cuota["id"], "prestamo_id": prestamo_vencido,
+            "cliente_id": cuota["cliente_id"], "tipo_pago": "CUOTA_NORMAL",
+            "monto_capital": cuota["capital"], "monto_intereses": cuota["intereses"],
+            "monto_mora": 0, "monto_total": cuota["capital"] + cuota["intereses"],
+            "metodo_pago": "EFECTIVO",
+        }, cuota)
+    assert _tipos() == antes
+
+
+def test_despachador_entrega_en_orden(prestamo_vencido, db_temporal):
+    despachador = Despachador()
+    recibidos, pagos = [], []
+    despachador.suscribir(recibidos.append)
+    despachador.suscribir(lambda e: pagos.append(e["entidad_id"]), tipos={"PAGO_REGISTRADO"})
+    despachador.suscribir(lambda e: 1 / 0, tipos={"CLIENTE_GUARDADO"})
+    assert despachador.despachar() == 0
+
+    abrir(0)
+    p1 = cobrar_cuota_normal(prestamo_vencido, None)
+    cliente_id = guardar_cliente({
+        "cedula": "001-0000003-3", "nombres": "Eva", "apellidos": "Ruiz",
+        "telefono_principal": "809-555-0003",
+    })
+    p2 = cobrar_cuota_normal(prestamo_vencido, None)
+
+    assert despachador.despachar() == 3
+    assert [e["tipo"] for e in recibidos] == ["PAGO_REGISTRADO", "CLIENTE_GUARDADO", "PAGO_REGISTRADO"]
+    assert recibidos[1]["entidad_id"] == cliente_id
+    assert pagos == [p1["id"], p2["id"]]
+    assert despachador.fallidos == 1            # the failing subscriber did not stop the others
+    assert despachador.despachar() == 0 and len(recibidos) == 3
@@ -0,0 +1,38 @@
+"""Tests for the streaming Excel exporter."""
+from datetime import date
+
+import pytest
+from openpyxl import load_workbook
+
+from controllers.caja_controller import abrir
+from controllers.pago_controller import cobrar_cuota_normal
+from controllers.reporte_controller import excel_caja, excel_mora
+from models.prestamo import obtener_proxima_cuota
+from services import excel_exporter
+
+
+@pytest.fixture(autouse=True)
+def _reportes(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_exporter, "REPORTS_DIR", str(tmp_path))
+
+
+def test_mora_desde_cursor(prestamo_vencido):
+    ws = load_workbook(excel_mora()).active
+    assert ws["A5"].value == "Préstamo" and ws["A5"].style == "agp_encabezado"
+    assert ws["F6"].value == 3                       # cuotas vencidas
+    assert ws["A6"].style == "agp_celda"
+    assert ws.column_dimensions["B"].width == len("Ana Pérez") + 4
+
+
+def test_filas_mas_alla_de_la_muestra(prestamo_vencido, monkeypatch):
+    monkeypatch.setattr(excel_exporter, "_MUESTRA", 2)
+    abrir(0)
+    pagos = [cobrar_cuota_normal(prestamo_vencido, obtener_proxima_cuota(prestamo_vencido)["id"])
+             for _ in range(4)]
+
+    ws = load_workbook(excel_caja(date.today().isoformat())).active
+    filas = list(ws.iter_rows(min_row=6, values_only=True))
+    assert [f[0] for f in filas] == [p["numero_recibo"] for p in pagos] + ["TOTAL"]
+    assert filas[-1][4] == "4"
+    assert filas[-1][8] == pytest.approx(sum(p["monto_total"] for p in pagos))
+    assert ws["A7"].style == "agp_celda_alt" and ws["A10"].style == "agp_total"
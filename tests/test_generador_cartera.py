@@ -0,0 +1,47 @@
+"""Tests for the synthetic portfolio generator and the benchmark suite."""
+from datetime import date
+
+from services.generador_cartera import generar_cartera
+from services.resumen import verificar
+
+HOY = date(2026, 6, 15)
+
+
+def _huella(conn):
+    consultas = [
+        "SELECT COUNT(*), SUM(monto_principal) FROM prestamos",
+        "SELECT COUNT(*), ROUND(SUM(monto_total), 2) FROM pagos",
+        "SELECT estado, COUNT(*) FROM prestamos GROUP BY estado",
+    ]
+    return [[tuple(r) for r in conn.execute(q)] for q in consultas]
+
+
+def test_es_determinista_y_consistente(db_temporal, tmp_path, monkeypatch):
+    resumen = generar_cartera(cuotas=600, semilla=7, tasa_morosidad=0.3, hoy=HOY)
+    assert db_temporal.execute("SELECT COUNT(*) FROM cuotas").fetchone()[0] == 600
+    assert resumen["morosos"] > 0
+    assert db_temporal.execute(
+        "SELECT COUNT(*) FROM prestamos WHERE estado = 'VENCIDO'").fetchone()[0] > 0
+    assert db_temporal.execute(
+        "SELECT COUNT(*) FROM pagos WHERE fecha_pago >= ?", (HOY.isoformat(),)).fetchone()[0] == 0
+    assert verificar() == []
+    primera = _huella(db_temporal)
+
+    import database.connection as connection
+    from database.schema import crear_tablas
+    from database.seed import insertar_defaults
+    connection.close_connection()
+    monkeypatch.setattr(connection, "DB_PATH", str(tmp_path / "otra.db"))
+    crear_tablas()
+    insertar_defaults()
+    generar_cartera(cuotas=600, semilla=7, tasa_morosidad=0.3, hoy=HOY)
+    assert _huella(connection.get_connection()) == primera
+
+
+def test_benchmark_produce_resultados(tmp_path):
+    from services.benchmark import ejecutar_benchmarks, comparar
+    informe = ejecutar_benchmarks(cuotas=400, repeticiones=2, directorio=str(tmp_path))
+    assert {"crear_prestamo", "cobrar_cuota_normal", "cobrar_cancelacion_total",
+            "reporte_mora", "web_prestamos"} <= informe["resultados"].keys()
+    assert all(m["n"] >= 1 and m["p50_ms"] >= 0 for m in informe["resultados"].values())
+    assert all(not f["regresion"] for f in comparar(informe, informe))
@@ -0,0 +1,80 @@
+"""Tests for the bulk transfer-payment importer."""
+import io
+
+from controllers.caja_controller import abrir
+from services.importador_pagos import _monto, importar_pagos
+
+
+def _csv(texto: str) -> io.BytesIO:
+    return io.BytesIO(texto.encode("utf-8"))
+
+
+def _numero(conn, prestamo_id):
+    return conn.execute("SELECT numero_prestamo FROM prestamos WHERE id = ?",
+                        (prestamo_id,)).fetchone()[0]
+
+
+def test_monto_formatos():
+    assert _monto("1,234.50") == 123450
+    assert _monto("1.234,50") == 123450
+    assert _monto("RD$ 500") == 50000
+    assert _monto("abc") is None
+    assert _monto("1.234") == _monto("1,234") == 123400
+    assert _monto("1.234.567") == 123456700
+    assert _monto("12.50") == 1250
+
+
+def test_monto_ambiguo_se_rechaza():
+    for texto in ("1,5", "12,50", "1,23,456", "1,234.567", "1.234,56.78"):
+        assert _monto(texto) is None, texto
+
+
+def test_simulacion_no_escribe(prestamo_vencido, db_temporal):
+    numero = _numero(db_temporal, prestamo_vencido)
+    informe = importar_pagos(_csv(
+        f"Préstamo;Monto;Referencia\n{numero};1500;T-1\nPREST-X;100;T-2\n"), simular=True)
+    assert informe["aplicadas"] == 1 and informe["pagos"] >= 1
+    assert [f["linea"] for f in informe["sin_coincidencia"]] == [3]
+    assert db_temporal.execute("SELECT COUNT(*) FROM pagos").fetchone()[0] == 0
+
+
+def test_importa_por_lotes_y_reporta_conflictos(prestamo_vencido, db_temporal):
+    caja_id = abrir(0)
+    numero = _numero(db_temporal, prestamo_vencido)
+    filas = "\n".join([
+        "cedula,monto,referencia",
+        "00100000011,1000,T-1",        # cédula without dashes
+        "001-0000001-1,1000,T-2",
+        "001-0000001-1,1000,T-1",      # same reference again
+        "001-0000001-1,999999,T-3",    # more than what is owed
+        "001-0000001-1,-50,T-4",
+    ])
+    informe = importar_pagos(_csv(filas + "\n"), caja_id=caja_id, tam_lote=2)
+    assert informe["aplicadas"] == 2
+    assert sorted(c["linea"] for c in informe["conflictos"]) == [4, 5, 6]
+    assert informe["lotes"] == 3
+
+    pagos = db_temporal.execute(
+        "SELECT COUNT(*), SUM(monto_total), COUNT(DISTINCT numero_recibo) FROM pagos").fetchone()
+    assert pagos[1] == 200000            # centavos, exact
+    assert informe["monto_aplicado"] == 2000
+    assert pagos[0] == pagos[2] == informe["pagos"]
+    caja = db_temporal.execute("SELECT total_cobrado FROM cajas WHERE id = ?", (caja_id,)).fetchone()
+    assert caja[0] == 200000
+    pagado = db_temporal.execute(
+        """SELECT SUM(capital_pagado + intereses_pagados + mora_pagada) FROM cuotas
+           WHERE prestamo_id = ?""", (prestamo_vencido,)).fetchone()[0]
+    assert pagado == 200000
+
+    # importing the same file again posts nothing
+    otra = importar_pagos(_csv(f"prestamo,monto,ref\n{numero},1000,T-1\n"), caja_id=caja_id)
+    assert otra["aplicadas"] == 0 and otra["conflictos"][0]["motivo"] == "Referencia ya registrada"
+
+
+def test_monto_ambiguo_se_reporta(prestamo_vencido, db_temporal):
+    numero = _numero(db_temporal, prestamo_vencido)
+    informe = importar_pagos(_csv(
+        f'prestamo;monto;ref\n{numero};"1,5";T-1\n{numero};1.500;T-2\n'), simular=True)
+    assert [(c["linea"], c["motivo"]) for c in informe["conflictos"]] == [
+        (2, "Monto inválido o débito")]
+    assert informe["aplicadas"] == 1 and informe["monto_aplicado"] == 1500
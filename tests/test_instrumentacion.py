@@ -0,0 +1,61 @@
+"""Tests for the SQL instrumentation layer."""
+import pytest
+
+import database.connection as connection
+from database import instrumentacion
+
+
+@pytest.fixture
+def instrumentada(prestamo_vencido, monkeypatch):
+    connection.close_connection()
+    monkeypatch.setattr(instrumentacion, "_activa", True)
+    instrumentacion.reiniciar()
+    yield prestamo_vencido
+    connection.close_connection()
+    instrumentacion.reiniciar()
+
+
+def test_registra_sentencias_filas_y_origen(instrumentada):
+    from models.prestamo import obtener_cuotas
+    assert isinstance(connection.get_connection(), instrumentacion.ConexionInstrumentada)
+    with instrumentacion.alcance("prueba"):
+        cuotas = obtener_cuotas(instrumentada)
+    info = instrumentacion.informe()
+    alcance = next(a for a in info["alcances"] if a["nombre"] == "prueba")
+    assert alcance["ejecuciones"] == 1
+    assert alcance["ultima"][-1]["filas"] == len(cuotas) == 6
+    assert alcance["ultima"][-1]["sitio"].startswith("models/prestamo.py:")
+
+
+def test_consulta_lenta_guarda_plan(instrumentada, monkeypatch):
+    monkeypatch.setattr(instrumentacion, "UMBRAL_LENTA_MS", 0.0)
+    connection.get_connection().execute(
+        "SELECT * FROM cuotas WHERE prestamo_id = ?", (instrumentada,)).fetchall()
+    lenta = instrumentacion.informe()["lentas"][-1]
+    assert "cuotas" in lenta["sql"] and any("idx" in linea or "SEARCH" in linea
+                                           for linea in lenta["plan"])
+
+
+def test_presupuesto_por_peticion(instrumentada):
+    from app_web import app
+    instrumentacion.establecer_presupuesto("GET /prestamos/<int:pid>", 1)
+    cliente = app.test_client()
+    assert cliente.get(f"/prestamos/{instrumentada}").status_code == 200
+    info = cliente.get("/api/debug/sql").get_json()
+    detalle = next(a for a in info["alcances"] if a["nombre"] == "GET /prestamos/<int:pid>")
+    assert detalle["excedidos"] == 1 and detalle["consultas_max"] > 1
+    assert cliente.get("/debug/sql").status_code == 200
+
+
+def test_depuracion_solo_activa_y_local(db_temporal, monkeypatch):
+    from app_web import app
+    cliente = app.test_client()
+    monkeypatch.setattr(instrumentacion, "_activa", False)
+    assert cliente.get("/api/debug/sql").status_code == 404
+    assert cliente.post("/api/debug/sql/reiniciar").status_code == 404
+
+    monkeypatch.setattr(instrumentacion, "_activa", True)
+    remoto = {"REMOTE_ADDR": "192.168.1.20"}
+    assert cliente.get("/debug/sql", environ_base=remoto).status_code == 403
+    assert cliente.post("/api/debug/sql/reiniciar", environ_base=remoto).status_code == 403
+    assert cliente.get("/api/debug/sql").status_code == 200
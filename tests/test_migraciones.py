@@ -0,0 +1,91 @@
+"""Tests for the user_version migration runner."""
+import sqlite3
+
+import pytest
+
+from database.migraciones import Paso, migrar, por_lotes, version_actual
+from database.schema import PASOS, crear_tablas
+
+
+@pytest.fixture
+def conn(tmp_path):
+    c = sqlite3.connect(str(tmp_path / "m.db"))
+    yield c
+    c.close()
+
+
+def test_aplica_solo_pendientes(conn):
+    pasos = [Paso(1, "t", sql="CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER);")]
+    assert migrar(conn, pasos) == [1]
+    assert migrar(conn, pasos) == []
+    pasos.append(Paso(2, "índice", sql="CREATE INDEX idx_t_v ON t(v);"))
+    assert migrar(conn, pasos) == [2]
+    assert version_actual(conn) == 2
+
+
+def test_un_fallo_revierte_todo(conn):
+    pasos = [
+        Paso(1, "t", sql="CREATE TABLE t (id INTEGER PRIMARY KEY);"),
+        Paso(2, "roto", sql="INSERT INTO no_existe VALUES (1);"),
+    ]
+    with pytest.raises(sqlite3.OperationalError):
+        migrar(conn, pasos)
+    assert version_actual(conn) == 0
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 't'").fetchone() is None
+
+
+def test_migracion_de_datos_por_lotes(conn):
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)")
+    conn.executemany("INSERT INTO t (v) VALUES (?)", [(i,) for i in range(1, 1001)])
+    conn.commit()
+    pasos = [
+        Paso(1, "columna", sql="ALTER TABLE t ADD COLUMN doble INTEGER;"),
+        Paso(2, "backfill", fn=por_lotes(
+            "t", "UPDATE t SET doble = v * 2 WHERE rowid BETWEEN :desde AND :hasta", tam_lote=64)),
+    ]
+    assert migrar(conn, pasos) == [1, 2]
+    assert conn.execute("SELECT COUNT(*) FROM t WHERE doble = v * 2").fetchone()[0] == 1000
+
+
+def test_esquema_al_dia(db_temporal):
+    assert version_actual(db_temporal) == PASOS[-1].version
+    crear_tablas()
+    assert version_actual(db_temporal) == PASOS[-1].version
+
+
+def test_reconstruir_cajas_conserva_pagos(tmp_path, monkeypatch):
+    import database.connection as connection
+    connection.close_connection()
+    monkeypatch.setattr(connection, "DB_PATH", str(tmp_path / "v1.db"))
+    c = connection.get_connection()
+    migrar(c, PASOS[:1])
+    with c:
+        c.execute("INSERT INTO clientes (id, cedula, nombres, apellidos, telefono_principal)"
+                  " VALUES (1, '001', 'A', 'B', '809')")
+        c.execute("INSERT INTO prestamos (id, cliente_id, numero_prestamo, monto_principal,"
+                  " tasa_interes, tipo_tasa, plazo, frecuencia_pago, tipo_amortizacion,"
+                  " fecha_inicio, fecha_vencimiento, cuota_base, total_intereses,"
+                  " total_a_pagar, saldo_capital, fecha_desembolso)"
+                  " VALUES (1, 1, 'P-1', 100, 5, 'MENSUAL', 1, 'MENSUAL', 'FRANCES',"
+                  " '2025-01-01', '2025-02-01', 105, 5, 105, 100, '2025-01-01')")
+        c.execute("INSERT INTO cuotas (id, prestamo_id, numero_cuota, fecha_vencimiento,"
+                  " capital, intereses, cuota_total, saldo_restante)"
+                  " VALUES (1, 1, 1, '2025-02-01', 100, 5, 105, 0)")
+        c.execute("INSERT INTO cajas (id, fecha) VALUES (7, '2025-02-01')")
+        c.execute("INSERT INTO pagos (caja_id, cuota_id, prestamo_id, cliente_id, tipo_pago,"
+                  " monto_total, numero_recibo) VALUES (7, 1, 1, 1, 'CUOTA_NORMAL', 105, 'R-1')")
+    try:
+        assert migrar(c, PASOS) == [p.version for p in PASOS[1:]]
+        assert c.execute("SELECT cajero FROM cajas WHERE id = 7").fetchone()[0] == "PRINCIPAL"
+        assert c.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        # step 5: pesos became integer centavos
+        assert tuple(c.execute("SELECT monto_total, typeof(monto_total) FROM pagos").fetchone()) \
+            == (10500, "integer")
+        assert tuple(c.execute("SELECT cuota_total, saldo_capital FROM cuotas JOIN prestamos"
+                               " ON prestamos.id = cuotas.prestamo_id").fetchone()) == (10500, 10000)
+        # resumen triggers survived the rebuild
+        c.execute("UPDATE pagos SET anulado = 1")
+        c.commit()
+        assert c.execute("SELECT num_pagos FROM resumen_diario").fetchone()[0] == 0
+    finally:
+        connection.close_connection()
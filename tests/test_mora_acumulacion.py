@@ -0,0 +1,72 @@
+"""Tests for the nightly mora accrual job."""
+from datetime import date, timedelta
+
+from controllers.pago_controller import calcular_cuota_con_mora
+from models.prestamo import obtener_cuotas, obtener_prestamo
+from services.mora_acumulacion import ejecutar, ponerse_al_dia
+
+
+def test_acumula_igual_que_calculo_en_vivo(prestamo_vencido):
+    hoy = date.today()
+    resumen = ejecutar(hoy)
+
+    cuotas = obtener_cuotas(prestamo_vencido, en_centavos=True)
+    for c in cuotas:
+        assert c["mora_acumulada"] == calcular_cuota_con_mora(c, hoy)["monto_mora"]
+    vencidas = [c for c in cuotas if c["fecha_vencimiento"] < hoy.isoformat()]
+    assert len(vencidas) == 3
+    assert all(c["estado"] == "VENCIDA" for c in vencidas)
+    assert obtener_prestamo(prestamo_vencido)["estado"] == "VENCIDO"
+    assert resumen["prestamos_vencidos"] == 1
+
+
+def test_reejecutar_misma_fecha_es_idempotente(prestamo_vencido):
+    hoy = date.today()
+    ejecutar(hoy)
+    antes = obtener_cuotas(prestamo_vencido)
+    assert ejecutar(hoy)["cuotas_actualizadas"] == 0
+    assert obtener_cuotas(prestamo_vencido) == antes
+
+
+def test_ponerse_al_dia_solo_una_vez_por_fecha(prestamo_vencido):
+    hoy = date.today()
+    ejecutar(hoy - timedelta(days=5))
+    assert ponerse_al_dia(hoy) is not None
+    assert ponerse_al_dia(hoy) is None
+
+
+def test_funcion_sql_igual_que_calculo_en_vivo(prestamo_vencido, db_temporal):
+    from controllers.reporte_controller import dashboard, mora
+    from models.mora import MORA_CUOTA, parametros_mora
+    from services.dinero import pesos
+
+    hoy = date.today()
+    cuotas = obtener_cuotas(prestamo_vencido, solo_pendientes=True, en_centavos=True)
+    en_vivo = {c["id"]: calcular_cuota_con_mora(c, hoy)["monto_mora"] for c in cuotas}
+    en_sql = dict(db_temporal.execute(
+        f"SELECT cu.id, {MORA_CUOTA} FROM cuotas cu WHERE cu.prestamo_id = :pid",
+        {**parametros_mora(hoy.isoformat()), "pid": prestamo_vencido}).fetchall())
+    assert en_sql == en_vivo and sum(en_vivo.values()) > 0
+
+    total = pesos(sum(en_vivo.values()))
+    assert dashboard()["mora_por_cobrar"] == total
+    assert mora()[0]["mora_total"] == total
+
+
+def test_hilo_reintenta_tras_un_fallo(monkeypatch, caplog):
+    import threading
+    from services import mora_acumulacion
+
+    llamadas, listo = [], threading.Event()
+
+    def ponerse_al_dia():
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise RuntimeError("database is locked")
+        listo.set()
+
+    monkeypatch.setattr(mora_acumulacion, "ponerse_al_dia", ponerse_al_dia)
+    monkeypatch.setattr(mora_acumulacion, "REINTENTO", 0.01)
+    mora_acumulacion.iniciar_acumulacion_diaria()
+    assert listo.wait(5) and len(llamadas) == 2
+    assert "database is locked" in caplog.text
@@ -0,0 +1,38 @@
+"""Tests for keyset pagination of clients, loans and payments."""
+import pytest
+
+from controllers import cliente_controller, prestamo_controller
+from controllers.cliente_controller import guardar_cliente
+
+
+def _recorrer(func, **kw):
+    vistos, cursor = [], None
+    while True:
+        pag = func(cursor=cursor, **kw)
+        vistos += [f["id"] for f in pag["filas"]]
+        cursor = pag["siguiente"]
+        if not cursor:
+            return vistos, pag["total"]
+
+
+def test_paginas_de_clientes_cubren_todo_sin_repetir(prestamo_vencido):
+    for i in range(11):
+        guardar_cliente({"cedula": f"001-{i:07d}-9", "nombres": f"Cliente {i}",
+                         "apellidos": "Gómez" if i % 2 else "Abreu",
+                         "telefono_principal": "809-555-0000"})
+    ids, total = _recorrer(cliente_controller.pagina, limite=4)
+    assert total == 12
+    assert len(ids) == len(set(ids)) == 12
+    assert ids == [c["id"] for c in sorted(
+        cliente_controller.todos(), key=lambda c: (c["apellidos"], c["nombres"], c["id"]))]
+
+
+def test_paginas_de_prestamos_respetan_filtro(prestamo_vencido):
+    ids, total = _recorrer(prestamo_controller.pagina, limite=1)
+    assert ids == [prestamo_vencido] and total == 1
+    assert prestamo_controller.pagina(estado="CANCELADO")["filas"] == []
+
+
+def test_cursor_invalido(db_temporal):
+    with pytest.raises(ValueError):
+        cliente_controller.pagina(cursor="basura")
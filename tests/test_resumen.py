@@ -0,0 +1,55 @@
+"""The trigger-maintained dashboard counters must match a full recount."""
+from controllers import pago_controller
+from controllers.caja_controller import abrir
+from controllers.cliente_controller import desactivar
+from controllers.reporte_controller import dashboard
+from models.pago import anular_pago
+from models.prestamo import obtener_prestamo
+from services.mora_acumulacion import ejecutar
+from services.resumen import verificar
+
+
+def test_contadores_siguen_cada_operacion(prestamo_vencido):
+    assert verificar() == []
+    abrir(500)
+    cuota = pago_controller.calcular_pago_cuota_normal(prestamo_vencido)["cuota"]
+    pago = pago_controller.cobrar_cuota_normal(prestamo_vencido, cuota["id"])
+    assert verificar() == []
+    assert dashboard()["cobrado_hoy"] == pago["monto_total"]
+
+    ejecutar()
+    assert dashboard()["prestamos_vencidos"] == 1
+    anular_pago(pago["id"], "prueba")
+    pago_controller.cobrar_cancelacion_total(prestamo_vencido)
+    assert verificar() == []
+
+    desactivar(obtener_prestamo(prestamo_vencido)["cliente_id"])
+    d = dashboard()
+    assert (d["prestamos_activos"], d["prestamos_vencidos"], d["clientes_total"],
+            d["cartera_total"]) == (0, 0, 0, 0)
+    assert verificar() == []
+
+
+def test_verificar_detecta_y_repara(prestamo_vencido, db_temporal):
+    db_temporal.execute("UPDATE resumen_cartera SET cartera_total = 1")
+    db_temporal.commit()
+    diferencias = verificar(reparar=True)
+    assert [d["campo"] for d in diferencias] == ["cartera_total"]
+    assert verificar() == []
+
+
+def test_mora_en_vivo_sin_acumulacion(prestamo_vencido):
+    # three cuotas past due, no accrual run yet: already en mora
+    d = dashboard()
+    assert (d["prestamos_activos"], d["prestamos_vencidos"]) == (1, 1)
+    ejecutar()                                  # loan moves to VENCIDO: still active
+    d = dashboard()
+    assert (d["prestamos_activos"], d["prestamos_vencidos"]) == (1, 1)
+
+    abrir(0)
+    pagos = [pago_controller.cobrar_cuota_normal(prestamo_vencido, None) for _ in range(3)]
+    assert dashboard()["prestamos_vencidos"] == 0   # next cuota not due yet
+    assert verificar() == []
+    anular_pago(pagos[1]["id"], "prueba")
+    assert dashboard()["prestamos_vencidos"] == 1
+    assert verificar() == []
@@ -0,0 +1,35 @@
+"""Tests for the receipt/loan number sequences."""
+import pytest
+
+from database.seed import insertar_defaults
+from models.secuencia import reservar
+
+
+def test_reservas_consecutivas(db_temporal):
+    with db_temporal:
+        assert reservar("recibo") == 1
+        assert reservar("recibo", 5) == 2
+        assert reservar("recibo") == 7
+
+
+def test_rollback_devuelve_los_numeros(db_temporal):
+    with pytest.raises(RuntimeError):
+        with db_temporal:
+            reservar("recibo", 3)
+            raise RuntimeError("pago fallido")
+    with db_temporal:
+        assert reservar("recibo") == 1
+
+
+def test_migra_contador_desde_configuracion(db_temporal):
+    db_temporal.execute("DELETE FROM secuencias WHERE nombre = 'prestamo'")
+    db_temporal.execute(
+        "INSERT INTO configuracion (clave, valor) VALUES ('proximo_num_prestamo', '38')"
+    )
+    db_temporal.commit()
+    insertar_defaults()
+    with db_temporal:
+        assert reservar("prestamo") == 38
+    assert db_temporal.execute(
+        "SELECT COUNT(*) FROM configuracion WHERE clave LIKE 'proximo_num_%'"
+    ).fetchone()[0] == 0
@@ -0,0 +1,52 @@
+"""Tests for the production server: concurrent requests and graceful shutdown."""
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from services import servidor_web
+
+pytestmark = pytest.mark.skipif(not servidor_web.WAITRESS_AVAILABLE,
+                                reason="waitress no instalado")
+
+
+def _app_lenta(entradas: threading.Event):
+    from flask import Flask
+    app = Flask(__name__)
+
+    @app.route("/lenta")
+    def lenta():
+        entradas.set()
+        time.sleep(0.5)
+        return "listo"
+
+    @app.route("/hilo")
+    def hilo():
+        return threading.current_thread().name
+
+    return app
+
+
+def test_cierre_espera_peticiones_en_curso():
+    entradas, orden = threading.Event(), []
+    servidor = servidor_web.ServidorWeb(_app_lenta(entradas), "127.0.0.1", 0, hilos=2)
+    servidor.al_detener(lambda: orden.append("hook"))
+    servidor.iniciar()
+    url = f"http://127.0.0.1:{servidor.puerto}"
+
+    # a fast request is served by a worker while the slow one is running
+    respuesta = {}
+    lector = threading.Thread(target=lambda: respuesta.update(
+        cuerpo=urllib.request.urlopen(url + "/lenta", timeout=5).read()))
+    lector.start()
+    assert entradas.wait(5)
+    assert urllib.request.urlopen(url + "/hilo", timeout=5).read().startswith(b"waitress")
+
+    servidor.detener(espera=5)
+    orden.append("detenido")
+    lector.join(5)
+    assert respuesta["cuerpo"] == b"listo"
+    assert orden == ["hook", "detenido"]
+    with pytest.raises(OSError):
+        urllib.request.urlopen(url + "/hilo", timeout=1)
@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 
+from config import CAJERO
 from controllers.caja_controller import abrir
 
 
@@ -33,7 +34,7 @@ class AperturaCaja(QWidget):
         lbl_title.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         card_layout.addWidget(lbl_title)
 
-        lbl_sub = QLabel("Ingrese el efectivo inicial en caja")
+        lbl_sub = QLabel(f"Cajero {CAJERO} — ingrese el efectivo inicial en caja")
         lbl_sub.setObjectName("dim")
         lbl_sub.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         card_layout.addWidget(lbl_sub)
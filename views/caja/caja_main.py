@@ -4,7 +4,7 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt
 
 from controllers.caja_controller import caja_activa
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 
 class CajaMain(QWidget):
@@ -13,7 +13,6 @@ class CajaMain(QWidget):
         super().__init__(parent)
         self._navegar = navegar
         self._sub: QWidget | None = None
-        self._worker: Worker | None = None
         self._layout = QVBoxLayout(self)
         self._layout.setContentsMargins(0, 0, 0, 0)
         self._layout.setSpacing(0)
@@ -21,9 +20,7 @@ class CajaMain(QWidget):
 
     def refrescar(self):
         self._mostrar_loading()
-        self._worker = Worker(caja_activa)
-        self._worker.result.connect(self._mostrar_caja)
-        self._worker.start()
+        ejecutor().enviar(self, "caja", caja_activa, on_result=self._mostrar_caja)
 
     def _mostrar_loading(self):
         self._clear_sub()
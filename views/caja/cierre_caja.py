@@ -58,6 +58,7 @@ class CierreCaja(QDialog):
 
         datos = [
             ("Fecha",           caja["fecha"]),
+            ("Cajero",          caja["cajero"]),
             ("Hora Apertura",   caja["hora_apertura"]),
             ("Monto Apertura",  f"RD$ {caja['monto_apertura']:,.2f}"),
             ("Núm. de Cobros",  str(len(pagos))),
@@ -147,7 +148,7 @@ class CierreCaja(QDialog):
         try:
             from services.pdf_generator import generar_reporte_caja
             import subprocess
-            path = generar_reporte_caja(self._caja["fecha"])
+            path = generar_reporte_caja(self._caja["fecha"], self._caja["id"])
             subprocess.Popen(["open", path])
         except Exception as e:
             self._lbl_error.setText(str(e))
@@ -14,7 +14,7 @@ from controllers.pago_controller import (
 )
 from database.seed import get_config
 from views.components.modal_confirm import confirmar
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 
 class CobroRapido(QWidget):
@@ -26,7 +26,6 @@ class CobroRapido(QWidget):
         self._prestamo_seleccionado  = None
         self._cuota_info             = None
         self._moneda                 = get_config("moneda_simbolo") or "RD$"
-        self._worker: Worker | None  = None
         self._search_timer           = QTimer(self)
         self._search_timer.setSingleShot(True)
         self._search_timer.timeout.connect(self._ejecutar_busqueda)
@@ -45,7 +44,7 @@ class CobroRapido(QWidget):
         hl.setContentsMargins(16, 8, 16, 8)
 
         lbl_caja = QLabel(
-            f"💵  Caja del {self._caja['fecha']}  |  "
+            f"💵  Caja del {self._caja['fecha']} · {self._caja['cajero']}  |  "
             f"Abierta: {self._caja['hora_apertura']}"
         )
         lbl_caja.setStyleSheet("font-size: 13px; font-weight: bold;")
@@ -123,9 +122,8 @@ class CobroRapido(QWidget):
         self._clear_results()
         if not termino:
             return
-        self._worker = Worker(buscar_prestamos, termino)
-        self._worker.result.connect(self._on_busqueda_result)
-        self._worker.start()
+        ejecutor().enviar(self, "busqueda", buscar_prestamos, termino,
+                          on_result=self._on_busqueda_result)
 
     def _on_busqueda_result(self, r: list):
         self._mostrar_resultados(r[:20])
@@ -333,10 +331,9 @@ class CobroRapido(QWidget):
         p = self._prestamo_seleccionado
         tipo_id = self._tipo_group.checkedId()
         tipo = "CUOTA_NORMAL" if tipo_id == 0 else "CANCELACION_TOTAL"
-        self._worker = Worker(self._calcular_bg, p["id"], tipo)
-        self._worker.result.connect(self._on_calculo_result)
-        self._worker.error.connect(self._mostrar_error_calc)
-        self._worker.start()
+        ejecutor().enviar(self, "calculo", self._calcular_bg, p["id"], tipo,
+                          on_result=self._on_calculo_result,
+                          on_error=self._mostrar_error_calc)
 
     def _on_calculo_result(self, r):
         self._mostrar_calculo(r[0], r[1])
@@ -477,10 +474,9 @@ class CobroRapido(QWidget):
                 cobrar_cancelacion_total(p["id"], metodo_pago=metodo, referencia_pago=ref)
                 return "cancelacion", None
 
-        self._worker = Worker(_run)
-        self._worker.result.connect(self._post_cobro)
-        self._worker.error.connect(self._post_cobro_error)
-        self._worker.start()
+        ejecutor().enviar(self, None, _run,
+                          on_result=self._post_cobro,
+                          on_error=self._post_cobro_error)
 
     def _post_cobro(self, resultado: tuple):
         tipo, data = resultado
@@ -505,9 +501,7 @@ class CobroRapido(QWidget):
         def _bg():
             from models.caja import obtener_caja
             return obtener_caja(caja_id)
-        w = Worker(_bg)
-        w.result.connect(self._on_header_refresh)
-        w.start()
+        ejecutor().enviar(self, "encabezado", _bg, on_result=self._on_header_refresh)
 
     def _on_header_refresh(self, caja):
         if caja:
@@ -588,11 +582,14 @@ class _ReciboDialog(QDialog):
         layout.addWidget(btn_close)
 
     def _imprimir(self, pago: dict):
-        try:
-            from services.pdf_generator import generar_recibo
-            import subprocess
-            path = generar_recibo(pago["id"])
-            subprocess.Popen(["open", path])
-        except Exception as e:
-            from PyQt6.QtWidgets import QMessageBox
-            QMessageBox.warning(self, "Error PDF", str(e))
+        from services.cola_recibos import recibo
+        ejecutor().enviar(self, "pdf", recibo, pago,
+                          on_result=self._abrir_pdf, on_error=self._error_pdf)
+
+    def _abrir_pdf(self, path: str):
+        import subprocess
+        subprocess.Popen(["open", path])
+
+    def _error_pdf(self, msg: str):
+        from PyQt6.QtWidgets import QMessageBox
+        QMessageBox.warning(self, "Error PDF", msg)
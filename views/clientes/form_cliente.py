@@ -10,7 +10,7 @@ from PyQt6.QtCore import Qt
 from config import TIPOS_DOC, CALIFICACIONES, TIPOS_TASA
 from controllers.cliente_controller import guardar_cliente, obtener
 from database.seed import get_config
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 
 class FormCliente(QDialog):
@@ -23,7 +23,6 @@ class FormCliente(QDialog):
 
         self._cliente_id  = cliente_id
         self._on_guardado = on_guardado
-        self._worker: Worker | None = None
 
         self._build()
 
@@ -226,10 +225,9 @@ class FormCliente(QDialog):
         datos["notas"] = self._notas.toPlainText().strip()
         cliente_id = self._cliente_id
 
-        self._worker = Worker(guardar_cliente, datos, cliente_id)
-        self._worker.result.connect(lambda _: self._post_guardar())
-        self._worker.error.connect(lambda msg: self._lbl_error.setText(msg))
-        self._worker.start()
+        ejecutor().enviar(self, None, guardar_cliente, datos, cliente_id,
+                          on_result=lambda _: self._post_guardar(),
+                          on_error=lambda msg: self._lbl_error.setText(msg))
 
     def _post_guardar(self):
         if self._on_guardado:
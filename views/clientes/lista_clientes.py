@@ -3,10 +3,10 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
 )
-from controllers.cliente_controller import buscar, todos
+from controllers.cliente_controller import buscar, pagina
 from views.components.tabla import Tabla
 from views.components.search_bar import SearchBar
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 COLUMNAS = [
     ("cedula",             "Cédula / Doc.",     130),
@@ -23,7 +23,6 @@ class ListaClientes(QWidget):
     def __init__(self, navegar=None, parent=None):
         super().__init__(parent)
         self._navegar = navegar
-        self._worker: Worker | None = None
         self._build()
         self.refrescar()
 
@@ -105,24 +104,27 @@ class ListaClientes(QWidget):
 
     def refrescar(self):
         self._lbl_count.setText("Cargando...")
-        self._worker = Worker(todos)
-        self._worker.result.connect(self._mostrar)
-        self._worker.start()
+        ejecutor().enviar(self, "lista", pagina, on_result=self._mostrar_pagina)
+
+    def _mostrar_pagina(self, pag: dict):
+        self._tabla.cargar(pag["filas"], fuente=lambda cursor: pagina(cursor),
+                           siguiente=pag["siguiente"])
+        self._contar(pag["total"])
 
     def _mostrar(self, datos: list):
         self._tabla.cargar(datos)
-        n = len(datos)
+        self._contar(len(datos))
+
+    def _contar(self, n: int):
         self._lbl_count.setText(
             f"{n} cliente{'s' if n != 1 else ''} encontrado{'s' if n != 1 else ''}"
         )
 
     def _buscar(self, termino: str):
-        if termino.strip():
-            self._worker = Worker(buscar, termino)
-        else:
-            self._worker = Worker(todos)
-        self._worker.result.connect(self._mostrar)
-        self._worker.start()
+        if not termino.strip():
+            self.refrescar()
+            return
+        ejecutor().enviar(self, "lista", buscar, termino, on_result=self._mostrar)
 
     # ── Callbacks ───────────────────────────────────────────────────────
 
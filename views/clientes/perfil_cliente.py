@@ -12,7 +12,7 @@ from controllers.prestamo_controller import listar as listar_prestamos
 from models.cliente import nombre_completo, obtener_garantes, agregar_garante, eliminar_garante
 from views.components.tabla import Tabla
 from views.components.modal_confirm import confirmar
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 _CAL_COLORS = {
     "BUENO":   "#16A34A",
@@ -28,7 +28,6 @@ class PerfilCliente(QDialog):
         super().__init__(parent)
         self._cliente_id = cliente_id
         self._navegar    = navegar
-        self._worker: Worker | None = None
         self._garantes_data: list = []
 
         self._cliente = obtener(cliente_id)
@@ -268,7 +267,6 @@ class _AgregarGaranteDialog(QDialog):
         super().__init__(parent)
         self._cliente_id = cliente_id
         self._garante_seleccionado = None
-        self._worker: Worker | None = None
         self.setWindowTitle("Agregar Garante")
         self.resize(420, 300)
         self.setModal(True)
@@ -340,9 +338,8 @@ class _AgregarGaranteDialog(QDialog):
         if not termino:
             return
         from controllers.cliente_controller import buscar as buscar_clientes
-        self._worker = Worker(buscar_clientes, termino)
-        self._worker.result.connect(self._mostrar)
-        self._worker.start()
+        ejecutor().enviar(self, "busqueda", buscar_clientes, termino,
+                          on_result=self._mostrar)
 
     def _mostrar(self, resultados: list):
         if not resultados:
@@ -1,13 +1,142 @@
-"""Reusable table widget — PyQt6 (QTableWidget)."""
+"""Reusable table widget — PyQt6 (QTableView over a virtual model)."""
 
-from typing import Optional, List
+from typing import Callable, Dict, List, Optional
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem,
-    QHeaderView, QAbstractItemView,
+    QWidget, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
 
+from views.components.worker import ejecutor
+
+_ALINEACION = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+
+class ModeloTabla(QAbstractTableModel):
+    """
+    Read-only table model over a columnar store: one list per key instead of
+    one dict (or one QTableWidgetItem per cell) per row. Cells are formatted
+    only when the view paints them.
+
+    Rows are exposed to the view in batches of LOTE through canFetchMore /
+    fetchMore as the user scrolls. When a page source is given, fetchMore
+    pulls the next keyset page from it once the held rows run out, on the
+    shared executor; the rows are inserted when the page arrives, and no
+    other page is requested meanwhile.
+    """
+
+    LOTE = 200
+
+    def __init__(self, columnas: List[tuple], parent=None):
+        super().__init__(parent)
+        self._columnas = columnas
+        self._claves: List[str] = []
+        self._valores: Dict[str, list] = {}
+        self._cargadas = 0
+        self._visibles = 0
+        self._fuente: Optional[Callable[[str], dict]] = None
+        self._cursor: Optional[str] = None
+        self._pidiendo = False
+
+    # ── Store ──────────────────────────────────────────────────────────
+
+    def reiniciar(self, datos: List[dict], fuente=None, cursor: Optional[str] = None):
+        self.beginResetModel()
+        if self._pidiendo:
+            ejecutor().cancelar(self, "pagina")
+            self._pidiendo = False
+        self._claves = []
+        self._valores = {}
+        self._cargadas = 0
+        self._visibles = 0
+        self._fuente = fuente
+        self._cursor = cursor
+        self._anexar(datos)
+        self.endResetModel()
+
+    def _anexar(self, datos: List[dict]):
+        if not datos:
+            return
+        if not self._claves:
+            claves = list(datos[0].keys()) + [c[0] for c in self._columnas]
+            self._claves = list(dict.fromkeys(claves))
+            self._valores = {k: [] for k in self._claves}
+        for k, columna in self._valores.items():
+            columna.extend(d.get(k) for d in datos)
+        self._cargadas += len(datos)
+
+    def fila(self, row: int) -> Optional[dict]:
+        if 0 <= row < self._visibles:
+            return {k: self._valores[k][row] for k in self._claves}
+        return None
+
+    # ── QAbstractTableModel ────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visibles
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columnas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            columna = self._valores.get(self._columnas[index.column()][0])
+            if columna is None:
+                return ""
+            return str(columna[index.row()] or "")
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _ALINEACION
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole
+                and orientation == Qt.Orientation.Horizontal
+                and 0 <= section < len(self._columnas)):
+            return self._columnas[section][1]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return (self._visibles < self._cargadas
+                or (self._cursor is not None and not self._pidiendo))
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._visibles < self._cargadas:
+            self._mostrar()
+        elif self._cursor and self._fuente:
+            if not self._pidiendo:
+                self._pidiendo = True
+                ejecutor().enviar(self, "pagina", self._fuente, self._cursor,
+                                  on_result=self._al_recibir_pagina,
+                                  on_error=self._al_fallar_pagina)
+        else:
+            self._cursor = None
+
+    def _al_recibir_pagina(self, pagina: dict):
+        self._pidiendo = False
+        self._cursor = pagina.get("siguiente")
+        self._anexar(pagina.get("filas", []))
+        self._mostrar()
+
+    def _al_fallar_pagina(self, _mensaje: str):
+        self._pidiendo = False
+        self._cursor = None
+
+    def _mostrar(self):
+        n = min(self.LOTE, self._cargadas - self._visibles)
+        if n <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visibles, self._visibles + n - 1)
+        self._visibles += n
+        self.endInsertRows()
 
 class Tabla(QWidget):
     """
@@ -21,7 +150,6 @@ class Tabla(QWidget):
         super().__init__(parent)
         self._columnas  = columnas or []
         self._on_select = on_select
-        self._datos: List[dict] = []
         self._build(height)
 
     # ── Build ──────────────────────────────────────────────────────────
@@ -31,9 +159,9 @@ class Tabla(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
 
-        ncols = len(self._columnas)
-        self._table = QTableWidget(0, ncols)
-        self._table.setHorizontalHeaderLabels([c[1] for c in self._columnas])
+        self._modelo = ModeloTabla(self._columnas, self)
+        self._table = QTableView()
+        self._table.setModel(self._modelo)
         self._table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self._table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self._table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
@@ -42,6 +170,11 @@ class Tabla(QWidget):
         self._table.setShowGrid(False)
         self._table.horizontalHeader().setHighlightSections(False)
 
+        # Uniform row height: the view never has to measure rows it is not painting
+        vh = self._table.verticalHeader()
+        vh.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vh.setDefaultSectionSize(self._table.fontMetrics().height() + 14)
+
         # Column widths — last column stretches
         for i, (key, label, width) in enumerate(self._columnas):
             self._table.setColumnWidth(i, width)
@@ -59,37 +192,26 @@ class Tabla(QWidget):
 
     def _on_selection(self, selected, _deselected):
         if self._on_select and selected.indexes():
-            row = selected.indexes()[0].row()
-            if 0 <= row < len(self._datos):
-                self._on_select(self._datos[row])
+            fila = self._modelo.fila(selected.indexes()[0].row())
+            if fila is not None:
+                self._on_select(fila)
 
     # ── Public API — matches the CTk Tabla interface ───────────────────
 
-    def cargar(self, datos: List[dict]):
-        """Populate the table from a list of dicts."""
-        self._datos = list(datos)
-        self._table.setRowCount(0)
-        for row_data in self._datos:
-            row = self._table.rowCount()
-            self._table.insertRow(row)
-            for col, (key, _label, _width) in enumerate(self._columnas):
-                val = str(row_data.get(key, "") or "")
-                item = QTableWidgetItem(val)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                item.setTextAlignment(
-                    Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-                )
-                self._table.setItem(row, col, item)
-        self._table.resizeRowsToContents()
+    def cargar(self, datos: List[dict], fuente=None, siguiente: Optional[str] = None):
+        """
+        Populate the table from a list of dicts.
+        For keyset-paged listings pass the first page's rows, its
+        'siguiente' cursor and fuente(cursor) -> page dict; further pages
+        are fetched as the user scrolls.
+        """
+        self._modelo.reiniciar(list(datos), fuente, siguiente)
 
     def limpiar(self):
-        self._datos = []
-        self._table.setRowCount(0)
+        self._modelo.reiniciar([])
 
     def seleccionado(self) -> Optional[dict]:
         rows = self._table.selectionModel().selectedRows()
         if rows:
-            row = rows[0].row()
-            if 0 <= row < len(self._datos):
-                return self._datos[row]
+            return self._modelo.fila(rows[0].row())
         return None
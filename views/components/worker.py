@@ -1,28 +1,226 @@
-"""QThread-based background worker for non-blocking DB/IO calls."""
+"""Shared QThreadPool executor for non-blocking DB/IO calls.
 
-from PyQt6.QtCore import QThread, pyqtSignal
+Every view submits work to one pool instead of spawning a QThread per call:
 
+    ejecutor().enviar(self, "busqueda", buscar, termino,
+                      on_result=self._mostrar, on_error=self._error)
 
-class Worker(QThread):
-    """
-    Run any callable in a background thread.
-    Connect .result(object) and .error(str) signals before calling .start().
-    Keep a reference to the worker to prevent premature GC.
-    """
+Tasks are keyed by (owner, key):
+  * bounded concurrency — the pool never runs more than max_hilos tasks;
+  * coalescing — while a key is running, newer submissions wait in a
+    single slot; each new one replaces the previous waiter, so a burst of
+    keystrokes runs at most two queries;
+  * generation tokens — only the result of the latest submission for a
+    key is delivered; superseded results are dropped;
+  * owner lifetime — callbacks are never invoked on a deleted widget.
+
+Writes must not be coalesced away: submit them with clave=None, which gives
+each call its own key.
+"""
+
+import itertools
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database.instrumentacion import alcance
 
-    result = pyqtSignal(object)
-    error  = pyqtSignal(str)
+_Clave = Tuple[int, str]
 
-    def __init__(self, fn, *args, **kwargs):
+
+class _Senales(QObject):
+    # clave, generacion, resultado | mensaje, segundos
+    terminado = pyqtSignal(object, int, object, float)
+    fallido   = pyqtSignal(object, int, str, float)
+
+
+class _Tarea(QRunnable):
+
+    def __init__(self, senales: _Senales, clave: _Clave, generacion: int,
+                 fn: Callable, args: tuple, kwargs: dict, nombre: str):
         super().__init__()
-        self._fn     = fn
-        self._args   = args
-        self._kwargs = kwargs
-        self.finished.connect(self.deleteLater)
+        self._nombre     = nombre
+        self._senales    = senales
+        self._clave      = clave
+        self._generacion = generacion
+        self._fn         = fn
+        self._args       = args
+        self._kwargs     = kwargs
 
     def run(self):
+        t0 = time.perf_counter()
         try:
-            r = self._fn(*self._args, **self._kwargs)
-            self.result.emit(r)
+            with alcance(f"tarea {self._nombre}"):
+                r = self._fn(*self._args, **self._kwargs)
         except Exception as exc:
-            self.error.emit(str(exc))
+            self._senales.fallido.emit(self._clave, self._generacion, str(exc),
+                                       time.perf_counter() - t0)
+        else:
+            self._senales.terminado.emit(self._clave, self._generacion, r,
+                                         time.perf_counter() - t0)
+
+
+@dataclass
+class _Envio:
+    dueno: QObject
+    generacion: int
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    on_result: Optional[Callable]
+    on_error: Optional[Callable]
+
+
+@dataclass
+class Tiempos:
+    llamadas: int = 0
+    errores: int = 0
+    descartadas: int = 0
+    total: float = 0.0
+    maximo: float = 0.0
+    ultimo: float = 0.0
+
+    @property
+    def promedio(self) -> float:
+        return self.total / self.llamadas if self.llamadas else 0.0
+
+
+class Ejecutor(QObject):
+    """
+    Pool-backed task runner living on the GUI thread. Results and errors
+    are delivered on the GUI thread through queued signals.
+    """
+
+    # nombre, segundos, ok
+    tarea_terminada = pyqtSignal(str, float, bool)
+
+    def __init__(self, max_hilos: int = 4, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_hilos)
+        self._senales = _Senales(self)
+        self._senales.terminado.connect(self._al_terminar)
+        self._senales.fallido.connect(self._al_fallar)
+        self._generaciones: Dict[_Clave, int] = {}
+        self._en_curso: Dict[_Clave, _Envio] = {}
+        self._en_espera: Dict[_Clave, _Envio] = {}
+        self._duenos: Dict[int, QObject] = {}
+        self._anonimas = itertools.count()
+        self._tiempos: Dict[str, Tiempos] = {}
+
+    # ── Public API ─────────────────────────────────────────────────────
+
+    def enviar(self, dueno: QObject, clave: Optional[str], fn: Callable, *args,
+               on_result: Callable = None, on_error: Callable = None, **kwargs) -> int:
+        """Submit fn(*args, **kwargs); returns the generation token."""
+        if clave is None:
+            clave = f"_{next(self._anonimas)}"
+        k = (id(dueno), clave)
+        self._vigilar(dueno)
+        generacion = self._generaciones.get(k, 0) + 1
+        self._generaciones[k] = generacion
+        envio = _Envio(dueno, generacion, fn, args, kwargs, on_result, on_error)
+        if k in self._en_curso:
+            if k in self._en_espera:
+                self._nombre_tiempos(k).descartadas += 1
+            self._en_espera[k] = envio
+        else:
+            self._lanzar(k, envio)
+        return generacion
+
+    def cancelar(self, dueno: QObject, clave: str):
+        """Drop the waiting submission and any in-flight result for the key."""
+        k = (id(dueno), clave)
+        self._generaciones[k] = self._generaciones.get(k, 0) + 1
+        self._en_espera.pop(k, None)
+
+    def vigente(self, dueno: QObject, clave: str, generacion: int) -> bool:
+        return self._generaciones.get((id(dueno), clave)) == generacion
+
+    def estadisticas(self) -> Dict[str, Tiempos]:
+        """Per-task timing, keyed by '<OwnerClass>.<key>'."""
+        return dict(self._tiempos)
+
+    def esperar(self, ms: int = -1) -> bool:
+        return self._pool.waitForDone(ms)
+
+    # ── Internal ───────────────────────────────────────────────────────
+
+    def _vigilar(self, dueno: QObject):
+        i = id(dueno)
+        if i not in self._duenos:
+            self._duenos[i] = dueno
+            # weak: an owner outliving a collected executor must not call into it
+            ref = weakref.ref(self)
+            dueno.destroyed.connect(lambda *_: ref() is not None and ref()._olvidar(i))
+
+    def _olvidar(self, id_dueno: int):
+        self._duenos.pop(id_dueno, None)
+        for tabla in (self._generaciones, self._en_espera):
+            for k in [k for k in tabla if k[0] == id_dueno]:
+                del tabla[k]
+
+    def _lanzar(self, k: _Clave, envio: _Envio):
+        self._en_curso[k] = envio
+        self._pool.start(_Tarea(self._senales, k, envio.generacion,
+                                envio.fn, envio.args, envio.kwargs, self._nombre(k)))
+
+    def _nombre(self, k: _Clave) -> str:
+        dueno = self._duenos.get(k[0])
+        clase = type(dueno).__name__ if dueno is not None else "?"
+        clave = "tarea" if k[1].startswith("_") else k[1]
+        return f"{clase}.{clave}"
+
+    def _nombre_tiempos(self, k: _Clave) -> Tiempos:
+        return self._tiempos.setdefault(self._nombre(k), Tiempos())
+
+    def _registrar(self, k: _Clave, segundos: float, ok: bool):
+        t = self._nombre_tiempos(k)
+        t.llamadas += 1
+        t.errores  += 0 if ok else 1
+        t.total    += segundos
+        t.ultimo    = segundos
+        t.maximo    = max(t.maximo, segundos)
+        self.tarea_terminada.emit(self._nombre(k), segundos, ok)
+
+    def _cerrar(self, k: _Clave, generacion: int) -> Optional[_Envio]:
+        """Finish the running task and start the waiter; returns the envio if still current."""
+        envio = self._en_curso.pop(k, None)
+        siguiente = self._en_espera.pop(k, None)
+        if siguiente is not None:
+            self._lanzar(k, siguiente)
+        vigente = self._generaciones.get(k) == generacion
+        if k[1].startswith("_"):
+            self._generaciones.pop(k, None)
+        if envio is None or not vigente or sip.isdeleted(envio.dueno):
+            if envio is not None:
+                self._nombre_tiempos(k).descartadas += 1
+            return None
+        return envio
+
+    def _al_terminar(self, k, generacion: int, resultado, segundos: float):
+        self._registrar(k, segundos, True)
+        envio = self._cerrar(k, generacion)
+        if envio is not None and envio.on_result:
+            envio.on_result(resultado)
+
+    def _al_fallar(self, k, generacion: int, mensaje: str, segundos: float):
+        self._registrar(k, segundos, False)
+        envio = self._cerrar(k, generacion)
+        if envio is not None and envio.on_error:
+            envio.on_error(mensaje)
+
+
+_ejecutor: Optional[Ejecutor] = None
+
+
+def ejecutor() -> Ejecutor:
+    """Process-wide executor, created on first use (after QApplication)."""
+    global _ejecutor
+    if _ejecutor is None:
+        _ejecutor = Ejecutor()
+    return _ejecutor
@@ -9,7 +9,7 @@ from PyQt6.QtCore import Qt
 
 from controllers.reporte_controller import dashboard as get_dashboard
 from database.seed import get_config
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 _MESES = [
     "enero", "febrero", "marzo", "abril", "mayo", "junio",
@@ -105,7 +105,6 @@ class Dashboard(QWidget):
         self._navegar = navegar
         self._moneda  = get_config("moneda_simbolo") or "RD$"
         self._cards: dict[str, _Metrica] = {}
-        self._worker: Worker | None = None
         self._build()
         self.refrescar()
 
@@ -171,7 +170,7 @@ class Dashboard(QWidget):
         layout.addWidget(row1)
         layout.addSpacing(12)
 
-        # ── Row 2 — 2 metrics ──────────────────────────────────
+        # ── Row 2 — 3 metrics ──────────────────────────────────
         row2 = QWidget()
         row2.setStyleSheet("background: transparent;")
         row2_layout = QHBoxLayout(row2)
@@ -181,6 +180,7 @@ class Dashboard(QWidget):
         for key, icon, titulo, color in [
             ("clientes", "👤", "Clientes Total",  "#0F172A"),
             ("cartera",  "💼", "Cartera Total",   "#D97706"),
+            ("por_cobrar", "⏰", "Mora por Cobrar", "#EF4444"),
         ]:
             c = _Metrica(icon=icon, titulo=titulo, color=color)
             row2_layout.addWidget(c)
@@ -236,9 +236,8 @@ class Dashboard(QWidget):
         self._lbl_fecha.setText(_fecha_es())
         for card in self._cards.values():
             card.set_valor("...")
-        self._worker = Worker(get_dashboard)
-        self._worker.result.connect(self._actualizar_ui)
-        self._worker.start()
+        ejecutor().enviar(self, "dashboard", get_dashboard,
+                          on_result=self._actualizar_ui)
 
     def _actualizar_ui(self, datos: dict):
         m = self._moneda
@@ -247,3 +246,4 @@ class Dashboard(QWidget):
         self._cards["cobrado"].set_valor(f"{m} {datos['cobrado_hoy']:,.2f}")
         self._cards["clientes"].set_valor(str(datos["clientes_total"]))
         self._cards["cartera"].set_valor(f"{m} {datos['cartera_total']:,.2f}")
+        self._cards["por_cobrar"].set_valor(f"{m} {datos['mora_por_cobrar']:,.2f}")
@@ -10,7 +10,7 @@ from config import ESTADO_COLORS
 from controllers.prestamo_controller import obtener, cuotas as get_cuotas
 from controllers.pago_controller import historial_pagos_prestamo
 from views.components.tabla import Tabla
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 COLS_CUOTAS = [
     ("numero_cuota",      "#",           40),
@@ -40,7 +40,6 @@ class DetallePrestamo(QDialog):
         super().__init__(parent)
         self._prestamo_id = prestamo_id
         self._cuotas_data: list = []
-        self._worker: Worker | None = None
 
         prestamo = obtener(prestamo_id)
         if not prestamo:
@@ -182,9 +181,8 @@ class DetallePrestamo(QDialog):
             pagos  = historial_pagos_prestamo(self._prestamo_id)
             return cuotas, pagos
 
-        self._worker = Worker(_fetch)
-        self._worker.result.connect(lambda r: self._mostrar_datos(*r))
-        self._worker.start()
+        ejecutor().enviar(self, "datos", _fetch,
+                          on_result=lambda r: self._mostrar_datos(*r))
 
     def _mostrar_datos(self, cuotas: list, pagos: list):
         self._cuotas_data = cuotas
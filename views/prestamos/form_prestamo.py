@@ -12,7 +12,7 @@ from config import FRECUENCIAS, TIPOS_TASA, TIPOS_AMORT
 from controllers.cliente_controller import buscar as buscar_clientes, todos
 from controllers.prestamo_controller import previsualizar, crear
 from views.components.tabla import Tabla
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 COLUMNAS_TABLA = [
     ("numero_cuota",      "#",         40),
@@ -35,7 +35,6 @@ class FormPrestamo(QDialog):
         self._on_guardado            = on_guardado
         self._cliente_seleccionado   = None
         self._resultado              = None
-        self._worker: Worker | None  = None
         self._search_timer           = QTimer(self)
         self._search_timer.setSingleShot(True)
         self._search_timer.timeout.connect(self._ejecutar_busqueda_cliente)
@@ -224,9 +223,8 @@ class FormPrestamo(QDialog):
     def _ejecutar_busqueda_cliente(self):
         termino = self._entry_search.text().strip()
         fn = (lambda: buscar_clientes(termino)) if termino else (lambda: todos()[:20])
-        self._worker = Worker(fn)
-        self._worker.result.connect(lambda r: self._mostrar_clientes(r[:15]))
-        self._worker.start()
+        ejecutor().enviar(self, "clientes", fn,
+                          on_result=lambda r: self._mostrar_clientes(r[:15]))
 
     def _mostrar_clientes(self, resultados: list):
         # Clear existing
@@ -267,10 +265,9 @@ class FormPrestamo(QDialog):
         self._lbl_total.setText("")
         self._lbl_intereses.setText("")
         datos = self._get_form_data()
-        self._worker = Worker(previsualizar, datos)
-        self._worker.result.connect(self._mostrar_calculo)
-        self._worker.error.connect(lambda msg: self._lbl_error.setText(msg))
-        self._worker.start()
+        ejecutor().enviar(self, "previsualizar", previsualizar, datos,
+                          on_result=self._mostrar_calculo,
+                          on_error=lambda msg: self._lbl_error.setText(msg))
 
     def _mostrar_calculo(self, resultado: dict):
         self._resultado = resultado
@@ -305,10 +302,9 @@ class FormPrestamo(QDialog):
         datos["notas"] = self._notas.toPlainText().strip()
         cliente_id = self._cliente_seleccionado["id"]
         self._lbl_error.setText("Guardando...")
-        self._worker = Worker(crear, cliente_id, datos)
-        self._worker.result.connect(lambda _: self._post_guardar())
-        self._worker.error.connect(lambda msg: self._lbl_error.setText(msg))
-        self._worker.start()
+        ejecutor().enviar(self, None, crear, cliente_id, datos,
+                          on_result=lambda _: self._post_guardar(),
+                          on_error=lambda msg: self._lbl_error.setText(msg))
 
     def _post_guardar(self):
         if self._on_guardado:
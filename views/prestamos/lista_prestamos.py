@@ -4,10 +4,10 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QFrame, QComboBox,
 )
-from controllers.prestamo_controller import listar, buscar
+from controllers.prestamo_controller import pagina, buscar
 from views.components.tabla import Tabla
 from views.components.search_bar import SearchBar
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 COLUMNAS = [
     ("numero_prestamo",   "Número",        130),
@@ -28,7 +28,6 @@ class ListaPrestamos(QWidget):
     def __init__(self, navegar=None, parent=None):
         super().__init__(parent)
         self._navegar = navegar
-        self._worker: Worker | None = None
         self._build()
         self.refrescar()
 
@@ -121,26 +120,36 @@ class ListaPrestamos(QWidget):
 
     def refrescar(self):
         self._lbl_count.setText("Cargando...")
+        estado = self._estado()
+        ejecutor().enviar(self, "lista", pagina, estado=estado,
+                          on_result=lambda pag: self._mostrar_pagina(pag, estado))
+
+    def _estado(self):
         estado = self._cb_estado.currentText()
-        fn = listar if estado == "Todos" else lambda: listar(estado=estado)
-        self._worker = Worker(fn)
-        self._worker.result.connect(self._mostrar)
-        self._worker.start()
+        return None if estado == "Todos" else estado
+
+    def _mostrar_pagina(self, pag: dict, estado):
+        self._tabla.cargar(
+            pag["filas"],
+            fuente=lambda cursor: pagina(estado=estado, cursor=cursor),
+            siguiente=pag["siguiente"],
+        )
+        self._contar(pag["total"])
 
     def _mostrar(self, datos: list):
         self._tabla.cargar(datos)
-        n = len(datos)
+        self._contar(len(datos))
+
+    def _contar(self, n: int):
         self._lbl_count.setText(
             f"{n} préstamo{'s' if n != 1 else ''} encontrado{'s' if n != 1 else ''}"
         )
 
     def _buscar(self, termino: str):
-        if termino.strip():
-            self._worker = Worker(buscar, termino)
-        else:
-            self._worker = Worker(listar)
-        self._worker.result.connect(self._mostrar)
-        self._worker.start()
+        if not termino.strip():
+            self.refrescar()
+            return
+        ejecutor().enviar(self, "lista", buscar, termino, on_result=self._mostrar)
 
     # ── Callbacks ───────────────────────────────────────────────────────
 
@@ -7,11 +7,13 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 
-from controllers.reporte_controller import caja, mora, proyeccion
+from controllers.reporte_controller import (
+    caja, mora, proyeccion, antiguedad, tendencia_antiguedad,
+)
 from models.caja import listar_cajas
 from models.pago import listar_pagos_caja
 from views.components.tabla import Tabla
-from views.components.worker import Worker
+from views.components.worker import ejecutor
 
 
 class ReportesMain(QWidget):
@@ -19,7 +21,6 @@ class ReportesMain(QWidget):
     def __init__(self, navegar=None, parent=None):
         super().__init__(parent)
         self._navegar = navegar
-        self._workers: list = []
         self._build()
 
     def _build(self):
@@ -46,14 +47,17 @@ class ReportesMain(QWidget):
         tab2 = QWidget()
         tab3 = QWidget()
         tab4 = QWidget()
+        tab5 = QWidget()
 
         self._tabs.addTab(tab1, "📊  Caja Diaria")
         self._tabs.addTab(tab2, "⚠️  Mora")
+        self._tabs.addTab(tab5, "⏳  Antigüedad")
         self._tabs.addTab(tab3, "📈  Proyección")
         self._tabs.addTab(tab4, "🗂️  Historial Cajas")
 
         self._build_caja_tab(tab1)
         self._build_mora_tab(tab2)
+        self._build_antiguedad_tab(tab5)
         self._build_proyeccion_tab(tab3)
         self._build_historial_tab(tab4)
 
@@ -95,6 +99,12 @@ class ReportesMain(QWidget):
         btn_xl.clicked.connect(self._excel_caja)
         tl.addWidget(btn_xl)
 
+        btn_rec = QPushButton("🧾  Reimprimir recibos")
+        btn_rec.setObjectName("btn_secondary")
+        btn_rec.setFixedHeight(36)
+        btn_rec.clicked.connect(self._recibos_caja)
+        tl.addWidget(btn_rec)
+
         tl.addStretch()
         layout.addWidget(top)
 
@@ -123,10 +133,8 @@ class ReportesMain(QWidget):
         self._cargar_caja()
 
     def _cargar_caja(self):
-        w = Worker(caja, self._fecha_entry.text())
-        w.result.connect(self._mostrar_caja)
-        self._workers.append(w)
-        w.start()
+        ejecutor().enviar(self, "caja", caja, self._fecha_entry.text(),
+                          on_result=self._mostrar_caja)
 
     def _mostrar_caja(self, reporte: dict):
         for i in reversed(range(self._resumen_layout.count())):
@@ -141,6 +149,7 @@ class ReportesMain(QWidget):
             ("Intereses", f"RD$ {t.get('total_intereses', 0):,.2f}"),
             ("Mora",      f"RD$ {t.get('total_mora', 0):,.2f}"),
             ("TOTAL",     f"RD$ {t.get('total_cobrado', 0):,.2f}"),
+            ("Sesiones",  str(len(reporte.get("sesiones", [])))),
         ]:
             col = QWidget()
             col.setStyleSheet("background: transparent;")
@@ -170,11 +179,19 @@ class ReportesMain(QWidget):
         except Exception as e:
             self._show_error(str(e))
 
+    def _recibos_caja(self):
+        from services.pdf_generator import generar_recibos_caja
+        ejecutor().enviar(self, "recibos", generar_recibos_caja, self._fecha_entry.text(),
+                          on_result=self._abrir, on_error=self._show_error)
+
+    def _abrir(self, path: str):
+        import subprocess
+        subprocess.Popen(["open", path])
+
     def _excel_caja(self):
         try:
-            from services.excel_exporter import exportar_caja
-            reporte = caja(self._fecha_entry.text())
-            path = exportar_caja(reporte)
+            from controllers.reporte_controller import excel_caja
+            path = excel_caja(self._fecha_entry.text())
             import subprocess
             subprocess.Popen(["open", path])
         except Exception as e:
@@ -215,6 +232,7 @@ class ReportesMain(QWidget):
             ("primera_cuota_vencida", "Primera Vencida",  120),
             ("cuotas_vencidas",       "Cuotas Venc.",      90),
             ("monto_pendiente",       "Monto Pend.",       100),
+            ("mora_total",            "Mora al Día",       100),
             ("saldo_capital",         "Saldo Capital",     100),
         ]
         self._tabla_mora = Tabla(columnas=cols)
@@ -222,15 +240,98 @@ class ReportesMain(QWidget):
         self._cargar_mora()
 
     def _cargar_mora(self):
-        w = Worker(mora)
-        w.result.connect(self._tabla_mora.cargar)
-        self._workers.append(w)
-        w.start()
+        ejecutor().enviar(self, "mora", mora, on_result=self._tabla_mora.cargar)
 
     def _excel_mora(self):
         try:
-            from services.excel_exporter import exportar_mora
-            path = exportar_mora(mora())
+            from controllers.reporte_controller import excel_mora
+            path = excel_mora()
+            import subprocess
+            subprocess.Popen(["open", path])
+        except Exception as e:
+            self._show_error(str(e))
+
+    # ── Antigüedad Tab ──────────────────────────────────────────────────
+
+    def _build_antiguedad_tab(self, parent: QWidget):
+        layout = QVBoxLayout(parent)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(8)
+
+        top = QWidget()
+        top.setStyleSheet("background: transparent;")
+        tl = QHBoxLayout(top)
+        tl.setContentsMargins(0, 0, 0, 0)
+        tl.setSpacing(6)
+
+        lbl = QLabel("Fecha:")
+        lbl.setObjectName("dim")
+        tl.addWidget(lbl)
+
+        self._fecha_antig = QLineEdit(date.today().isoformat())
+        self._fecha_antig.setFixedSize(140, 36)
+        tl.addWidget(self._fecha_antig)
+
+        btn_con = QPushButton("Consultar")
+        btn_con.setFixedHeight(36)
+        btn_con.clicked.connect(self._cargar_antiguedad)
+        tl.addWidget(btn_con)
+
+        btn_xl = QPushButton("📥  Excel")
+        btn_xl.setObjectName("btn_secondary")
+        btn_xl.setFixedHeight(36)
+        btn_xl.clicked.connect(self._excel_antiguedad)
+        tl.addWidget(btn_xl)
+
+        self._lbl_par = QLabel("")
+        self._lbl_par.setStyleSheet("font-weight: bold; color: #2563EB;")
+        tl.addSpacing(12)
+        tl.addWidget(self._lbl_par)
+
+        tl.addStretch()
+        layout.addWidget(top)
+
+        self._tabla_antig = Tabla(columnas=[
+            ("tramo",         "Tramo (días)",   110),
+            ("prestamos",     "Préstamos",       90),
+            ("saldo_capital", "Saldo Capital",  130),
+            ("monto_vencido", "Monto Vencido",  130),
+            ("pct_cartera",   "% Cartera",       90),
+        ])
+        layout.addWidget(self._tabla_antig)
+
+        lbl_t = QLabel("Tendencia (fotos diarias, últimos 90 días)")
+        lbl_t.setObjectName("dim")
+        layout.addWidget(lbl_t)
+
+        self._tabla_tendencia = Tabla(columnas=[
+            ("fecha",         "Fecha",          100),
+            ("prestamos",     "Préstamos",       90),
+            ("cartera_total", "Cartera",        130),
+            ("monto_vencido", "Monto Vencido",  130),
+            ("par30",         "PAR30 %",         80),
+            ("par90",         "PAR90 %",         80),
+        ])
+        layout.addWidget(self._tabla_tendencia, 1)
+        self._cargar_antiguedad()
+
+    def _cargar_antiguedad(self):
+        ejecutor().enviar(self, "antiguedad", antiguedad, self._fecha_antig.text(),
+                          on_result=self._mostrar_antiguedad)
+        ejecutor().enviar(self, "tendencia", tendencia_antiguedad,
+                          on_result=lambda filas: self._tabla_tendencia.cargar(filas[::-1]))
+
+    def _mostrar_antiguedad(self, informe: dict):
+        self._lbl_par.setText(
+            f"Cartera RD$ {informe['cartera_total']:,.2f}   ·   "
+            f"PAR30 {informe['par30']:.2f} %   ·   PAR90 {informe['par90']:.2f} %"
+        )
+        self._tabla_antig.cargar(informe["tramos"])
+
+    def _excel_antiguedad(self):
+        try:
+            from controllers.reporte_controller import excel_antiguedad
+            path = excel_antiguedad(self._fecha_antig.text())
             import subprocess
             subprocess.Popen(["open", path])
         except Exception as e:
@@ -287,19 +388,17 @@ class ReportesMain(QWidget):
             dias = int(self._dias_entry.text() or 30)
         except ValueError:
             dias = 30
-        w = Worker(proyeccion, dias)
-        w.result.connect(self._tabla_proy.cargar)
-        self._workers.append(w)
-        w.start()
+        ejecutor().enviar(self, "proyeccion", proyeccion, dias,
+                          on_result=self._tabla_proy.cargar)
 
     def _excel_proyeccion(self):
         try:
-            from services.excel_exporter import exportar_proyeccion
+            from controllers.reporte_controller import excel_proyeccion
             try:
                 dias = int(self._dias_entry.text() or 30)
             except ValueError:
                 dias = 30
-            path = exportar_proyeccion(proyeccion(dias))
+            path = excel_proyeccion(dias)
             import subprocess
             subprocess.Popen(["open", path])
         except Exception as e:
@@ -332,6 +431,7 @@ class ReportesMain(QWidget):
 
         cols_cajas = [
             ("fecha",          "Fecha",          100),
+            ("cajero",         "Cajero",          100),
             ("hora_apertura",  "Apertura",         80),
             ("hora_cierre",    "Cierre",           80),
             ("estado",         "Estado",           80),
@@ -359,10 +459,8 @@ class ReportesMain(QWidget):
         self._cargar_historial()
 
     def _cargar_historial(self):
-        w = Worker(listar_cajas, 60)
-        w.result.connect(self._tabla_hist.cargar)
-        self._workers.append(w)
-        w.start()
+        ejecutor().enviar(self, "historial", listar_cajas, 60,
+                          on_result=self._tabla_hist.cargar)
 
     def _on_caja_select(self, caja_row: dict):
         # Clear detail area
@@ -377,7 +475,7 @@ class ReportesMain(QWidget):
         hl.setContentsMargins(0, 0, 0, 4)
 
         estado_color = "#2563EB" if caja_row["estado"] == "ABIERTA" else "#64748B"
-        lbl_h = QLabel(f"Pagos de la caja del {caja_row['fecha']}")
+        lbl_h = QLabel(f"Pagos de la caja del {caja_row['fecha']} · {caja_row['cajero']}")
         lbl_h.setStyleSheet("font-weight: bold;")
         hl.addWidget(lbl_h)
 
@@ -412,10 +510,8 @@ class ReportesMain(QWidget):
         tabla_pagos = Tabla(columnas=cols_pagos)
         self._detalle_layout.addWidget(tabla_pagos)
 
-        w = Worker(listar_pagos_caja, caja_row["id"])
-        w.result.connect(tabla_pagos.cargar)
-        self._workers.append(w)
-        w.start()
+        ejecutor().enviar(tabla_pagos, "pagos", listar_pagos_caja, caja_row["id"],
+                          on_result=tabla_pagos.cargar)
 
     # ── Helpers ─────────────────────────────────────────────────────────
 